@@ -0,0 +1,78 @@
+"""
+CPU per request versus bytes saved for a nested catalog response.
+
+    python benchmarks/bench_compression.py [courses]
+
+The payload mimics /dashboard/filter/course: courses with their lessons and
+questions expanded. "cached" is a hit in the strong-ETag body cache of
+utils.compression, which is what hot catalog responses pay after the first request.
+"""
+import gzip
+import json
+import sys
+import timeit
+import uuid
+
+from api_naturalize.utils import compression
+
+
+def _payload(courses: int) -> bytes:
+    items = []
+    for c in range(courses):
+        lessons = []
+        for l in range(8):
+            questions = [{
+                "id": str(uuid.uuid4()),
+                "name": f"What is the answer to question {q} of lesson {l}?",
+                "options": ["Option A", "Option B", "Option C", "Option D"],
+                "correct_answer": "Option A",
+                "lesson_id": f"lesson-{c}-{l}",
+                "course_id": f"course-{c}",
+                "created_at": "2026-01-01T00:00:00",
+                "updated_at": "2026-01-01T00:00:00",
+            } for q in range(10)]
+            lessons.append({
+                "id": str(uuid.uuid4()),
+                "name": f"Lesson {l}",
+                "description": "An introduction to the civics test. " * 5,
+                "course_id": f"course-{c}",
+                "questions": questions,
+            })
+        items.append({
+            "id": str(uuid.uuid4()),
+            "name": f"Course {c}",
+            "description": "Everything you need for the naturalization interview. " * 4,
+            "image_url": f"https://mamadou.mtscorporate.com/static/{uuid.uuid4()}.png",
+            "lessons": lessons,
+        })
+    return json.dumps(items).encode()
+
+
+def main():
+    courses = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    body = _payload(courses)
+    repeat, number = 5, 20
+    print(f"body: {len(body)} bytes")
+    print(f"{'encoding':<14}{'bytes':>10}{'saved':>9}{'ms/request':>13}{'us/KB saved':>14}")
+
+    cases = [(f"gzip-{level}", lambda level=level: gzip.compress(body, compresslevel=level, mtime=0)) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        cases += [(f"br-{q}", lambda q=q: compression.brotli.compress(body, quality=q)) for q in (4, 5, 11)]
+    else:
+        print("(brotli not installed, skipping br)")
+
+    for name, func in cases:
+        size = len(func())
+        seconds = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+        saved = len(body) - size
+        print(f"{name:<14}{size:>10}{saved / len(body):>8.0%}{seconds * 1e3:>13.3f}{seconds * 1e6 / (saved / 1024):>14.2f}")
+
+    cache = compression.CompressedBodyCache(16, 1 << 20)
+    key = ("/api/v1/dashboard/filter/course?", '"etag"', "gzip")
+    cache.put(key, compression.compress(body, "gzip"))
+    seconds = min(timeit.repeat(lambda: cache.get(key), number=number * 100, repeat=repeat)) / (number * 100)
+    print(f"{'cached':<14}{len(cache.get(key)):>10}{'':>9}{seconds * 1e3:>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Login throughput and tail latency of unrelated requests during a login storm.
+
+    python benchmarks/bench_password_hashing.py [logins] [concurrency]
+
+"inline" verifies argon2 on the event loop, as the login handler used to.
+"pool" uses utils.get_hashed_password.verify_and_update_password.
+The probe stands in for an unrelated endpoint: a coroutine that should run
+every millisecond, its scheduling lag is what other requests would wait.
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from api_naturalize.utils import get_hashed_password as hashing
+
+
+async def _probe(lags, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + 0.001
+        await asyncio.sleep(0.001)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _storm(verify, logins: int, concurrency: int, stored: str):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            await verify("correct horse battery staple", stored)
+
+    lags = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    return logins / elapsed, statistics.median(lags) if lags else 0.0, p99
+
+
+async def _inline(plain, stored):
+    return hashing.verify_password(plain, stored)
+
+
+async def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    stored = hashing.get_hashed_password("correct horse battery staple")
+    print(f"argon2 t={hashing.ARGON2_TIME_COST} m={hashing.ARGON2_MEMORY_COST} p={hashing.ARGON2_PARALLELISM}, "
+          f"{hashing.PASSWORD_HASH_WORKERS} workers")
+    print(f"{'mode':<8}{'logins/s':>10}{'probe p50 ms':>15}{'probe p99 ms':>15}")
+    for name, verify in (("inline", _inline), ("pool", hashing.verify_and_update_password)):
+        throughput, p50, p99 = await _storm(verify, logins, concurrency, stored)
+        print(f"{name:<8}{throughput:>10.1f}{p50 * 1e3:>15.2f}{p99 * 1e3:>15.2f}")
+    print(hashing.hash_pool_stats())
+    hashing.shutdown_hash_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
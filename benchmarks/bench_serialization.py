@@ -0,0 +1,85 @@
+"""
+Per-item cost of building responses for the most used response models.
+
+    python benchmarks/bench_serialization.py [items]
+
+"validated" is the old path: model_validate on the document, then the same
+validation FastAPI runs again for response_model, then JSON encoding.
+"trusted" is utils.serialization: model_construct plus a cached TypeAdapter.
+"""
+import sys
+import timeit
+from typing import List
+
+from api_naturalize.answer.models.answer_model import AnswerModel
+from api_naturalize.answer.schemas.answer_schemas import AnswerResponse
+from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.auth.schemas.user_schemas import UserResponse
+from api_naturalize.course.models.course_model import CourseModel
+from api_naturalize.course.schemas.course_schemas import CourseResponseAdmin, CourseResponse
+from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
+from api_naturalize.leader_board.schemas.leader_board_schemas import LeaderboardResponse
+from api_naturalize.lesson.models.lesson_model import LessonModel
+from api_naturalize.lesson.schemas.lesson_schemas import LessonResponse, LessonResponseAdmin
+from api_naturalize.notification.models.notification_model import notificationModel
+from api_naturalize.notification.schemas.notification_schemas import NotificationResponse
+from api_naturalize.progress_lesson.models.progress_lesson_model import ProgressLessonModel
+from api_naturalize.progress_lesson.schemas.progress_lesson_schemas import ProgresslessonResponse, FilteredLessonResponse
+from api_naturalize.question.models.question_model import QuestionModel
+from api_naturalize.question.schemas.question_schemas import QuestionResponse
+from api_naturalize.utils.serialization import construct, get_adapter
+
+
+def _docs():
+    # model_construct avoids needing an initialized Beanie collection
+    return {
+        UserResponse: UserModel.model_construct(email="user@example.com", first_name="John", last_name="Doe"),
+        CourseResponseAdmin: CourseModel.model_construct(name="Course", description="x" * 200, image_url="https://x/a.png"),
+        CourseResponse: CourseModel.model_construct(name="Course", description="x" * 200, image_url="https://x/a.png"),
+        LessonResponseAdmin: LessonModel.model_construct(name="Lesson", description="x" * 200, course_id="c"),
+        LessonResponse: LessonModel.model_construct(name="Lesson", description="x" * 200, course_id="c"),
+        QuestionResponse: QuestionModel.model_construct(name="Q?", lesson_id="l", course_id="c",
+                                                        options=["a", "b", "c", "d"], correct_answer="a"),
+        AnswerResponse: AnswerModel.model_construct(user_id="u", question_id="q", submit_answer="a", right_answer="a"),
+        ProgresslessonResponse: ProgressLessonModel.model_construct(lesson_id="l", course_id="c", user_id="u", progress=50),
+        FilteredLessonResponse: LessonModel.model_construct(name="Lesson", description="x" * 200, course_id="c"),
+        LeaderboardResponse: LeaderBoardModel.model_construct(user_id="u", total_score=10),
+        NotificationResponse: notificationModel.model_construct(user_id="u", title="Hi", description="Welcome"),
+    }
+
+
+EXTRA = {
+    CourseResponse: {"course_progress": 10.0},
+    FilteredLessonResponse: {"my_progress": 50.0, "total_right_answers": 3, "total_questions": 10},
+}
+
+
+def validated(schema, docs):
+    items = []
+    for doc in docs:
+        data = doc.model_dump()
+        data.update(EXTRA.get(schema, {}))
+        items.append(schema(**data))
+    # FastAPI validates the returned value against response_model once more
+    items = [schema.model_validate(item.model_dump()) for item in items]
+    return get_adapter(List[schema]).dump_json(items)
+
+
+def trusted(schema, docs):
+    items = [construct(schema, doc, **EXTRA.get(schema, {})) for doc in docs]
+    return get_adapter(List[schema]).dump_json(items)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeat = 20
+    print(f"{'model':<26}{'validated us/item':>20}{'trusted us/item':>18}{'speedup':>10}")
+    for schema, doc in _docs().items():
+        docs = [doc] * count
+        slow = min(timeit.repeat(lambda: validated(schema, docs), number=1, repeat=repeat)) / count * 1e6
+        fast = min(timeit.repeat(lambda: trusted(schema, docs), number=1, repeat=repeat)) / count * 1e6
+        print(f"{schema.__name__:<26}{slow:>20.2f}{fast:>18.2f}{slow / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from beanie import Document, before_event, Replace, Save
 from datetime import datetime, timezone
+from pymongo import DESCENDING, IndexModel
 from pydantic import Field
 import uuid
 
@@ -23,3 +24,7 @@ class AnswerModel(Document):
 
     class Settings:
         name = "answers"
+        # (sort key, _id) indexes back keyset pagination
+        indexes = [
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+        ]
@@ -1,28 +1,31 @@
 
 from fastapi import APIRouter, HTTPException, status
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timezone
 
 from fastapi.params import Depends
 
 from api_naturalize.answer.models.answer_model import AnswerModel
 from api_naturalize.answer.schemas.answer_schemas import AnswerCreate, AnswerUpdate, AnswerResponse
 from api_naturalize.auth.models.user_model import UserModel
-from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
-from api_naturalize.progress_lesson.models.progress_lesson_model import ProgressLessonModel
 from api_naturalize.question.models.question_model import QuestionModel
-from api_naturalize.utils.user_info import get_user_info
+from api_naturalize.utils.event_bus import event_bus
+from api_naturalize.utils.events import AnswerSubmitted
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct_many, json_response
+from api_naturalize.utils.user_info import get_current_user
 
 router = APIRouter(prefix="/answers", tags=["answers"])
 
 
 # GET all answers
 @router.get("/", response_model=List[AnswerResponse], status_code=status.HTTP_200_OK)
-async def get_all_answers(skip: int = 0, limit: int = 10):
+async def get_all_answers(skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     """
-    Get all answers with pagination
+    Get all answers with pagination, pass the X-Next-Cursor header back as cursor for the next page
     """
-    answers = await AnswerModel.find_all().skip(skip).limit(limit).to_list()
-    return answers
+    answers, next_cursor, _ = await paginate(AnswerModel.find_all(), skip, limit, cursor, descending=False)
+    return json_response(List[AnswerResponse], construct_many(AnswerResponse, answers), headers=cursor_headers(next_cursor))
 
 
 # GET answer by ID
@@ -38,14 +41,11 @@ async def get_answer(id: str):
 
 
 @router.post("/", response_model=AnswerResponse, status_code=status.HTTP_201_CREATED)
-async def create_answer(answer_data: AnswerCreate, user: dict = Depends(get_user_info)):
-    user_id = user["user_id"]
-    db_user = await UserModel.get(user_id)
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def create_answer(answer_data: AnswerCreate, db_user: UserModel = Depends(get_current_user)):
+    user_id = db_user.id
 
     """
-    Create a new answer with lesson progress and update leaderboard
+    Create a new answer, the leaderboard and lesson progress follow through AnswerSubmitted
     """
     # Get the question to check correct answer
     db_question = await QuestionModel.get(answer_data.question_id)
@@ -87,72 +87,14 @@ async def create_answer(answer_data: AnswerCreate, user: dict = Depends(get_user
         )
         await answer.insert()
 
-    # Update leaderboard
-    db_leaderboard = await LeaderBoardModel.find_one(
-        LeaderBoardModel.user_id == user_id
-    )
-
-    if db_leaderboard:
-        # Adjust leaderboard score: subtract old score and add new score
-        if db_submitted_answer:
-            # For update: subtract old score and add new score
-            db_leaderboard.total_score = db_leaderboard.total_score - old_score + score
-        else:
-            # For new answer: just add the score
-            db_leaderboard.total_score += score
-        await db_leaderboard.save()
-    else:
-        # Create new leaderboard entry
-        leaderboard_data = LeaderBoardModel(
-            user_id=user_id,
-            total_score=score
-        )
-        await leaderboard_data.insert()
-
-    # Calculate progress after creating/updating the answer
-    db_questions = await QuestionModel.find(
-        QuestionModel.lesson_id == db_question.lesson_id
-    ).to_list()
-
-    total_questions = len(db_questions)
-
-    # Get all answers for this lesson and user - Beanie syntax ঠিক করুন
-    db_lesson_answers = await AnswerModel.find(
-        AnswerModel.lesson_id == db_question.lesson_id,
-        AnswerModel.user_id == user_id
-    ).to_list()
-
-    # Remove duplicates by question_id to get unique answered questions
-    unique_answered_questions = {}
-    for ans in db_lesson_answers:
-        unique_answered_questions[ans.question_id] = ans
-
-    total_answered = len(unique_answered_questions)
-
-    # Calculate correct progress percentage
-    progress_percentage = 0
-    if total_questions > 0:
-        progress_percentage = (total_answered / total_questions) * 100
-
-    # Check if progress record exists - Beanie syntax
-    db_progress = await ProgressLessonModel.find_one(
-        ProgressLessonModel.lesson_id == db_question.lesson_id,
-        ProgressLessonModel.user_id == user_id
-    )
-
-    if db_progress:
-        # Update existing progress
-        db_progress.progress = progress_percentage
-        await db_progress.save()
-    else:
-        # Create new progress record
-        progress_data = ProgressLessonModel(
-            lesson_id=db_question.lesson_id,
-            progress=progress_percentage,
-            user_id=user_id,
-            course_id=db_question.course_id
-        )
-        await progress_data.insert()
+    # Leaderboard and lesson progress are updated in the background
+    await event_bus.publish(AnswerSubmitted(
+        user_id=user_id,
+        question_id=answer_data.question_id,
+        lesson_id=db_question.lesson_id,
+        course_id=db_question.course_id,
+        score_delta=score - old_score
+    ))
 
     return answer
 
@@ -177,6 +119,7 @@ async def update_answer(id: str, answer_data: AnswerUpdate):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Answer not found")
 
     update_data = answer_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await answer.update({"$set": update_data})
     return await AnswerModel.get(id)
 
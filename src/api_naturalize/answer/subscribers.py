@@ -0,0 +1,89 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+from pymongo import UpdateOne
+import uuid
+from api_naturalize.answer.models.answer_model import AnswerModel
+from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
+from api_naturalize.progress_lesson.models.progress_lesson_model import ProgressLessonModel
+from api_naturalize.question.models.question_model import QuestionModel
+from api_naturalize.utils.event_bus import event_bus
+from api_naturalize.utils.events import AnswerSubmitted, LessonCompleted
+from api_naturalize.utils.fieldsets import count_by
+
+
+def _insert_defaults(now: datetime) -> dict:
+    return {"_id": str(uuid.uuid4()), "created_at": now}
+
+
+async def _update_leaderboard(events: List[AnswerSubmitted], now: datetime):
+    deltas: Dict[str, int] = defaultdict(int)
+    for event in events:
+        deltas[event.user_id] += event.score_delta
+    await LeaderBoardModel.get_pymongo_collection().bulk_write([
+        UpdateOne(
+            {"user_id": user_id},
+            {"$inc": {"total_score": delta}, "$set": {"updated_at": now}, "$setOnInsert": _insert_defaults(now)},
+            upsert=True
+        )
+        for user_id, delta in deltas.items()
+    ], ordered=False)
+
+
+async def _answered_counts(pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    """
+    Distinct answered questions per (user, lesson) for the whole batch in one aggregation
+    """
+    pipeline = [
+        {"$group": {"_id": {"u": "$user_id", "l": "$lesson_id", "q": "$question_id"}}},
+        {"$group": {"_id": {"u": "$_id.u", "l": "$_id.l"}, "count": {"$sum": 1}}},
+    ]
+    rows = await AnswerModel.find({
+        "user_id": {"$in": list({user_id for user_id, _ in pairs})},
+        "lesson_id": {"$in": list({lesson_id for _, lesson_id in pairs})},
+    }).aggregate(pipeline).to_list()
+    return {(row["_id"]["u"], row["_id"]["l"]): row["count"] for row in rows}
+
+
+async def _update_progress(events: List[AnswerSubmitted], now: datetime):
+    courses = {(event.user_id, event.lesson_id): event.course_id for event in events}
+    pairs = list(courses)
+    lesson_ids = list({lesson_id for _, lesson_id in pairs})
+
+    total_questions = await count_by(QuestionModel, "lesson_id", lesson_ids)
+    answered = await _answered_counts(pairs)
+    existing = await ProgressLessonModel.find({
+        "user_id": {"$in": list({user_id for user_id, _ in pairs})},
+        "lesson_id": {"$in": lesson_ids},
+    }).to_list()
+    previous = {(progress.user_id, progress.lesson_id): progress.progress for progress in existing}
+
+    operations = []
+    completed = []
+    for user_id, lesson_id in pairs:
+        total = total_questions.get(lesson_id, 0)
+        progress = (answered.get((user_id, lesson_id), 0) / total) * 100 if total > 0 else 0
+        operations.append(UpdateOne(
+            {"user_id": user_id, "lesson_id": lesson_id},
+            {
+                "$set": {"progress": progress, "updated_at": now},
+                "$setOnInsert": {**_insert_defaults(now), "course_id": courses[(user_id, lesson_id)]},
+            },
+            upsert=True
+        ))
+        if progress >= 100 and previous.get((user_id, lesson_id), 0) < 100:
+            completed.append(LessonCompleted(user_id=user_id, lesson_id=lesson_id, course_id=courses[(user_id, lesson_id)]))
+
+    await ProgressLessonModel.get_pymongo_collection().bulk_write(operations, ordered=False)
+    for event in completed:
+        await event_bus.publish(event)
+
+
+@event_bus.subscriber(AnswerSubmitted, batch_size=200, max_wait=0.05)
+async def update_leaderboard_and_progress(events: List[AnswerSubmitted]):
+    """
+    Apply a batch of answers: one $inc per user on the leaderboard and one progress upsert per (user, lesson)
+    """
+    now = datetime.now(timezone.utc)
+    await _update_leaderboard(events, now)
+    await _update_progress(events, now)
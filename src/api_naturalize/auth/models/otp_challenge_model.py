@@ -0,0 +1,21 @@
+from beanie import Document
+from datetime import datetime, timezone
+from pymongo import ASCENDING, IndexModel
+from pydantic import Field
+
+
+class OtpChallengeModel(Document):
+    # One open challenge per user, keyed by the user's id
+    id: str = Field(alias="_id")
+    email: str = ""
+    otp_hash: str = ""
+    attempts: int = 0
+    expires_at: datetime
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "otp_challenges"
+        indexes = [
+            # MongoDB removes a challenge as soon as it expires
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
@@ -1,10 +1,12 @@
-from beanie import Document, before_event, Replace, Save
+from beanie import Document, after_event, before_event, Delete, Replace, Save, Update
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import EmailStr, Field
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime, timezone
 import uuid
 
 from api_naturalize.utils.account_status import AccountStatus
+from api_naturalize.utils.user_cache import invalidate_user
 from api_naturalize.utils.user_role import UserRole
 
 
@@ -18,9 +20,9 @@ class UserModel(Document):
     password: Optional[str] = None
     is_verified: bool = False
     account_status: AccountStatus = Field(default=AccountStatus.ACTIVE)
-    otp: Optional[str] = None
     role: Optional[UserRole] = Field(default=UserRole.USER)
     profile_image: Optional[str] = Field(default="https://cdn.pixabay.com/photo/2017/06/13/12/54/profile-2398783_1280.png")
+    profile_image_variants: Dict[str, str] = {}
     auth_provider: str =  Field(default="email")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -30,7 +32,17 @@ class UserModel(Document):
     def update_timestamp(self):
         self.updated_at = datetime.now(timezone.utc)
 
+    # Drop the cached copy used by get_current_user
+    @after_event([Save, Replace, Update, Delete])
+    def invalidate_cache(self):
+        invalidate_user(self.id)
+
     class Settings:
         name = "users"
+        # (sort key, _id) indexes back keyset pagination
+        indexes = [
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("account_status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        ]
 
 
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends,status
 from fastapi.security import OAuth2PasswordRequestForm
+from datetime import datetime, timezone
 from api_naturalize.auth.models.user_model import UserModel
 from api_naturalize.auth.schemas.user_schemas import UserCreate, UserUpdate, UserResponse, VerifyOTP, ResetPasswordRequest, \
     ResendOTPRequest
-from api_naturalize.notification.routers.notification_routes import create_notification
-from api_naturalize.notification.schemas.notification_schemas import NotificationCreate
-from api_naturalize.utils.email_config import SendOtpModel, send_otp
-from api_naturalize.utils.get_hashed_password import get_hashed_password,verify_password
-from api_naturalize.utils.otp_generate import generate_otp
+from api_naturalize.utils.event_bus import event_bus
+from api_naturalize.utils.events import UserLoggedIn, UserVerified, PasswordChanged
+from api_naturalize.utils.google_auth import get_google_provider
+from api_naturalize.utils.email_config import SendOtpModel, queue_otp
+from api_naturalize.utils.get_hashed_password import get_hashed_password_async, verify_and_update_password
+from api_naturalize.utils.rate_limit import rate_limiter, limit_by_ip
+from api_naturalize.utils.otp_generate import issue_otp, check_otp
 from api_naturalize.utils.token_generation import create_access_token
-import requests
 from api_naturalize.utils.user_role import UserRole
 
 
@@ -18,49 +20,51 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 # POST create new user
-@router.post("/" ,response_model=UserResponse,status_code=status.HTTP_201_CREATED)
+@router.post("/" ,response_model=UserResponse,status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(limit_by_ip("signup"))])
 async def create_user(user: UserCreate):
-    hashed_password = get_hashed_password(user.password)
+    await rate_limiter.hit("signup:account", user.email)
+    hashed_password = await get_hashed_password_async(user.password)
     db_user = await UserModel.find_one(UserModel.email == user.email)
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    otp = generate_otp()
     new_user = UserModel(
         first_name=user.first_name,
         last_name=user.last_name,
         email=user.email,
         phone_number=user.phone_number,
-        password=hashed_password,
-        otp=otp
+        password=hashed_password
     )
     await new_user.insert()
-    send_otp_data = SendOtpModel(email=new_user.email, otp=new_user.otp)
-    await send_otp(send_otp_data)
+    otp = await issue_otp(new_user.id, new_user.email)
+    send_otp_data = SendOtpModel(email=new_user.email, otp=otp)
+    await queue_otp(send_otp_data)
     return new_user
 
 
 
 
 # POST create new user
-@router.post("/signup/admin" ,response_model=UserResponse,status_code=status.HTTP_201_CREATED)
+@router.post("/signup/admin" ,response_model=UserResponse,status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(limit_by_ip("signup"))])
 async def create_admin(user: UserCreate):
-    hashed_password = get_hashed_password(user.password)
+    await rate_limiter.hit("signup:account", user.email)
+    hashed_password = await get_hashed_password_async(user.password)
     db_user = await UserModel.find_one(UserModel.email == user.email)
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    otp = generate_otp()
     new_user = UserModel(
         first_name=user.first_name,
         last_name=user.last_name,
         email=user.email,
         phone_number=user.phone_number,
         password=hashed_password,
-        otp=otp,
         role=UserRole.ADMIN
     )
     await new_user.insert()
-    send_otp_data = SendOtpModel(email=new_user.email, otp=new_user.otp)
-    await send_otp(send_otp_data)
+    otp = await issue_otp(new_user.id, new_user.email)
+    send_otp_data = SendOtpModel(email=new_user.email, otp=otp)
+    await queue_otp(send_otp_data)
     return new_user
 
 
@@ -70,23 +74,17 @@ async def verify_otp(user:VerifyOTP):
     db_user =await UserModel.find_one(UserModel.email == user.email)
     if db_user is None :
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
-    if user.otp != db_user.otp:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Wrong OTP")
+    await check_otp(db_user.id, user.otp)
 
-    db_user.is_verified=True
-    notification=NotificationCreate(
-        user_id=db_user.id,
-        title=f"Welcome {db_user.first_name}{db_user.last_name}",
-        description="Your account has been created successfully.Let’s get started with your first theme"
-    )
-    await create_notification(notification)
-    await db_user.save()
+    await db_user.set({UserModel.is_verified: True, UserModel.updated_at: datetime.now(timezone.utc)})
+    await event_bus.publish(UserVerified(user_id=db_user.id, first_name=db_user.first_name, last_name=db_user.last_name))
     return {"message":"You have  verified","data":db_user}
 
 
 
-@router.post("/login", status_code=status.HTTP_200_OK)
+@router.post("/login", status_code=status.HTTP_200_OK, dependencies=[Depends(limit_by_ip("login"))])
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    await rate_limiter.hit("login:account", form_data.username)
     db_user = await UserModel.find_one(
         {"$or": [{"email": form_data.username}, {"phone_number": form_data.username}]}
     )
@@ -94,41 +92,39 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    if not verify_password(form_data.password, db_user.password):
+    valid, new_hash = await verify_and_update_password(form_data.password, db_user.password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Wrong password")
+    if new_hash:
+        # Stored hash used older argon2 parameters
+        await db_user.set({UserModel.password: new_hash, UserModel.updated_at: datetime.now(timezone.utc)})
 
     if not db_user.is_verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Your account is not verified with OTP")
 
 
-    notification=NotificationCreate(
-        user_id=db_user.id,
-        title=f"Welcome back! {db_user.first_name}{db_user.last_name}",
-        description="You’re successfully logged in. Let’s continue where you left off"
-    )
-    await create_notification(notification)
+    await event_bus.publish(UserLoggedIn(user_id=db_user.id, first_name=db_user.first_name, last_name=db_user.last_name))
 
     token = create_access_token(data={"sub": db_user.email, "role": db_user.role.value, "user_id": db_user.id})
     return {"access_token": token, "token_type": "bearer"}
 
 
 
-@router.post("/resend_otp", status_code=status.HTTP_200_OK)
+@router.post("/resend_otp", status_code=status.HTTP_200_OK, dependencies=[Depends(limit_by_ip("resend_otp"))])
 async def resend_otp(request: ResendOTPRequest):
+    await rate_limiter.hit("resend_otp:account", request.email)
     db_user = await UserModel.find_one(UserModel.email == request.email)
     if db_user is None :
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
-    otp=generate_otp()
-    db_user.otp=otp
-    await db_user.save()
-    send_otp_data = SendOtpModel(email=db_user.email, otp=db_user.otp)
-    await send_otp(send_otp_data)
+    otp = await issue_otp(db_user.id, db_user.email)
+    send_otp_data = SendOtpModel(email=db_user.email, otp=otp)
+    await queue_otp(send_otp_data)
 
 
     return {
         "message": "User registered successfully.Please check your email.A 6 digit otp has been sent.",
         "data":db_user,
-        "otp":db_user.otp
+        "otp":otp
     }
 
 
@@ -143,37 +139,26 @@ async def reset_password(request: ResetPasswordRequest):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Your account is not verified with otp")
 
-    hashed_password = get_hashed_password(request.new_password)
+    hashed_password = await get_hashed_password_async(request.new_password)
     db_user.password = hashed_password
-
-
-    notification=NotificationCreate(
-        user_id=db_user.id,
-        title="Password updated successfully",
-        description="Your account password was changed successfully.If this wasn’t you, please reset your password immediately."
-    )
-    await create_notification(notification)
-
-
     await db_user.save()
+
+    await event_bus.publish(PasswordChanged(user_id=db_user.id))
     return {"message":"successfully reset password"}
 
 
 
 @router.post("/google-login",status_code=status.HTTP_201_CREATED)
-async def google_login_token(access_token: str):
+async def google_login_token(access_token: str, google_provider=Depends(get_google_provider)):
 
     if access_token is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="please give me token")
 
 
-    response = requests.get(
-        f'https://www.googleapis.com/oauth2/v2/userinfo?access_token={access_token}'
-    )
-    if response.status_code != 200:
+    user_info = await google_provider.fetch_user_info(access_token)
+    if user_info is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Google token")
 
-    user_info = response.json()
     email = user_info["email"]
     name = user_info.get("name", "")
     picture = user_info.get("picture", "")
@@ -197,12 +182,12 @@ async def google_login_token(access_token: str):
 
     # 3️⃣ Generate JWT token
 
-    notification = NotificationCreate(
+    await event_bus.publish(UserLoggedIn(
         user_id=db_user.id,
-        title="Account created securely",
-        description="You signed up using your Google account.No password needed—your account is protected."
-    )
-    await create_notification(notification)
+        first_name=db_user.first_name,
+        last_name=db_user.last_name,
+        auth_provider="google"
+    ))
 
     token = create_access_token(data={"sub": db_user.email, "role": db_user.role.value, "user_id": db_user.id})
     return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
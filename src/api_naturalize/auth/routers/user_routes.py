@@ -1,42 +1,50 @@
 from fastapi import APIRouter, HTTPException, Depends,status,File, UploadFile, Form,Request
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timezone
 from api_naturalize.auth.models.user_model import UserModel
 from api_naturalize.auth.schemas.user_schemas import UserUpdate, UserResponse
 from api_naturalize.dashboard.routers.dashboard import get_in_progress_lessons
 from api_naturalize.dashboard.schemas.dashboard import ExtendedDashboardResponse, ExtendedAppUserResponse
+from api_naturalize.jobs.queue import enqueue_job
 from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
 from api_naturalize.lesson.models.lesson_model import LessonModel
 from api_naturalize.question.models.question_model import QuestionModel
+from api_naturalize.storage.refs import release_urls
+from api_naturalize.storage.variants import request_variants
+from api_naturalize.utils.conditional import conditional
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct, construct_many, json_response
+from api_naturalize.utils.uploads import save_upload, static_url
 from api_naturalize.utils.user_info import get_user_info
-from pathlib import Path
 from typing import Annotated
-import shutil
-import uuid
-
-UPLOAD_DIR = "uploaded_images"
-Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
 
 user_router = APIRouter(prefix="/users", tags=["Users"])
 
 # GET all users
 @user_router.get("/", response_model=List[UserResponse],status_code=status.HTTP_200_OK)
-async def get_all_users(skip: int = 0, limit: int = 20):
+async def get_all_users(request: Request, skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     """
-    Get all users with pagination
+    Get all users with pagination, pass the X-Next-Cursor header back as cursor for the next page
     """
-    users = await UserModel.find_all().sort("-created_at").skip(skip).limit(limit).to_list()
-    return users
+    users, next_cursor, _ = await paginate(UserModel.find_all(), skip, limit, cursor)
+    not_modified, headers = conditional(request, users, next_cursor, private=True)
+    if not_modified:
+        return not_modified
+    return json_response(List[UserResponse], construct_many(UserResponse, users), headers=cursor_headers(next_cursor, headers))
 
 # GET user by ID
 @user_router.get("/{id}", response_model=UserResponse,status_code=status.HTTP_200_OK)
-async def get_user(id: str):
+async def get_user(id: str, request: Request):
     """
-    Get user by ID
+    Get user by ID, answers 304 when If-None-Match still matches
     """
     user = await UserModel.get(id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    not_modified, headers = conditional(request, [user], private=True)
+    if not_modified:
+        return not_modified
+    return json_response(UserResponse, construct(UserResponse, user), headers=headers)
 
 @user_router.patch("/update/info", status_code=status.HTTP_200_OK)
 async def update_user(user_data: UserUpdate, user_info: dict = Depends(get_user_info)):
@@ -54,6 +62,7 @@ async def update_user(user_data: UserUpdate, user_info: dict = Depends(get_user_
     if not update_data:
         raise HTTPException(status_code=400, detail="No data provided for update")
 
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await user_obj.set(update_data)
 
     return {"message":"Successfully update profile"}
@@ -70,25 +79,18 @@ async def update_profile_image(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
 
-    file_extension = Path(profile_image.filename).suffix
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = Path(UPLOAD_DIR) / unique_filename
-
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(profile_image.file, buffer)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Image upload failed: {str(e)}"
-        )
-
-
-    base_url = str(request.base_url).replace("http://", "https://")
-    image_url = f"{base_url}static/{unique_filename}"
+    path = await save_upload(profile_image)
+    image_url = static_url(request, path)
 
 
-    await db_user.set({UserModel.profile_image: image_url})
+    previous_image = db_user.profile_image
+    await db_user.set({
+        UserModel.profile_image: image_url,
+        UserModel.profile_image_variants: {},
+        UserModel.updated_at: datetime.now(timezone.utc),
+    })
+    await release_urls([previous_image])
+    await request_variants("user", db_user.id, image_url)
 
     return {
         "message": "Successfully updated profile image",
@@ -99,14 +101,16 @@ async def update_profile_image(
 @user_router.delete("/{id}",status_code=status.HTTP_200_OK)
 async def delete_user(id: str):
     """
-    Delete user by ID
+    Delete user by ID, their answers, progress, scores and notifications are removed by a background job
     """
     user = await UserModel.get(id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     await user.delete()
-    return {"message": "User deleted successfully"}
+    await release_urls([user.profile_image])
+    job = await enqueue_job("user.cascade_delete", {"user_id": id}, priority=1)
+    return {"message": "User deleted successfully", "job_id": job.id}
 
 @user_router.get("/info/me", response_model=ExtendedAppUserResponse,status_code=status.HTTP_200_OK)
 async def get_extended_dashboard_stats(user: dict = Depends(get_user_info)):
@@ -117,22 +121,7 @@ async def get_extended_dashboard_stats(user: dict = Depends(get_user_info)):
 
 
     # Convert user model to UserResponse
-    user_response = UserResponse(
-        id=db_user.id,
-        first_name=db_user.first_name,
-        last_name=db_user.last_name,
-        email=db_user.email,
-        phone_number=db_user.phone_number,
-        is_verified=db_user.is_verified,
-        profile_image=db_user.profile_image,
-        auth_provider=db_user.auth_provider,
-        created_at=db_user.created_at,
-        updated_at=db_user.updated_at,
-        role=db_user.role,
-        otp=db_user.otp,
-        plan=db_user.plan,
-        account_status=db_user.account_status
-    )
+    user_response = construct(UserResponse, db_user)
 
     # Get total_score from LeaderBoardModel
     leaderboard_data = await LeaderBoardModel.find_one(LeaderBoardModel.user_id == user_id)
@@ -148,10 +137,10 @@ async def get_extended_dashboard_stats(user: dict = Depends(get_user_info)):
     # Get in-progress lessons (progress > 0 and < 100)
     in_progress_lessons = await get_in_progress_lessons(user_id)
 
-    return ExtendedAppUserResponse(
+    return json_response(ExtendedAppUserResponse, ExtendedAppUserResponse.model_construct(
         total_score=total_score,
         total_lessons=total_lessons,
         success_rate=success_rate,
         user_details=user_response,
         in_progress_lessons=in_progress_lessons
-    )
\ No newline at end of file
+    ))
\ No newline at end of file
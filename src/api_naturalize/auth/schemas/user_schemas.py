@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr,Field
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 from api_naturalize.utils.account_status import AccountStatus
@@ -30,11 +30,11 @@ class UserResponse(BaseModel):
     plan: Optional[str]
     is_verified: bool
     profile_image: Optional[str]
+    profile_image_variants: Dict[str, str] = {}
     auth_provider: str
     created_at: datetime
     updated_at: datetime
     role: Optional[UserRole] = Field(default=UserRole.USER)
-    otp:Optional[str]
     account_status: AccountStatus
 
     class Config:
@@ -1,14 +1,22 @@
 
-from fastapi import APIRouter, HTTPException,status
-from typing import List
+from fastapi import APIRouter, HTTPException,status,Request
+from typing import List, Optional
+from datetime import datetime, timezone
 
 from fastapi.params import Depends
 
 from api_naturalize.course.models.course_model import CourseModel
 from api_naturalize.course.schemas.course_schemas import CourseCreate, CourseUpdate, CourseResponse, CourseResponseAdmin
+from api_naturalize.jobs.queue import enqueue_job
 from api_naturalize.lesson.models.lesson_model import LessonModel
+from api_naturalize.lesson.schemas.lesson_schemas import LessonResponse
 from api_naturalize.progress_lesson.models.progress_lesson_model import ProgressLessonModel
 from api_naturalize.question.models.question_model import QuestionModel
+from api_naturalize.storage.refs import release_urls
+from api_naturalize.storage.variants import request_variants
+from api_naturalize.utils.conditional import conditional
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct, construct_many, json_response
 from api_naturalize.utils.user_info import get_user_info
 
 router = APIRouter(prefix="/courses", tags=["courses"])
@@ -19,11 +27,12 @@ router = APIRouter(prefix="/courses", tags=["courses"])
 async def get_all_courses(
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
     user_data: dict = Depends(get_user_info)
 ):
     user_id = user_data["user_id"]
 
-    courses = await CourseModel.find_all().sort("-created_at").skip(skip).limit(limit).to_list()
+    courses, next_cursor, _ = await paginate(CourseModel.find_all(), skip, limit, cursor)
     course_responses = []
 
     for course in courses:
@@ -35,42 +44,36 @@ async def get_all_courses(
         total_lesson_progress=0
 
         for lesson in lessons:
-            lesson_dict = lesson.model_dump()
-
             db_progress_lesson = await ProgressLessonModel.find_one(
                 ProgressLessonModel.lesson_id == lesson.id,
                 ProgressLessonModel.user_id == user_id
             )
 
-            lesson_dict["my_progress"] = (
-                db_progress_lesson.progress if db_progress_lesson else 0
-            )
+            my_progress = db_progress_lesson.progress if db_progress_lesson else 0
 
 
-            total_lesson_progress+=lesson_dict["my_progress"]
+            total_lesson_progress+=my_progress
 
 
-            lesson_list.append(lesson_dict)
+            lesson_list.append(construct(LessonResponse, lesson, my_progress=my_progress))
 
 
         total_questions = await QuestionModel.find(
             QuestionModel.course_id == course.id
         ).count()
 
-        course_dict = course.model_dump()
-        course_dict["lessons"] = lesson_list
-        course_dict["total_questions"] = total_questions
-
+        course_progress = total_lesson_progress / len(lessons) if lessons else 0
 
-        if lessons:
-            course_dict["course_progress"] = total_lesson_progress / len(lessons)
-        else:
-            course_dict["course_progress"] = 0
+        course_responses.append(construct(
+            CourseResponse,
+            course,
+            lessons=lesson_list,
+            total_questions=total_questions,
+            course_progress=course_progress
+        ))
 
-        course_responses.append(CourseResponse(**course_dict))
 
-
-    return course_responses
+    return json_response(List[CourseResponse], course_responses, headers=cursor_headers(next_cursor))
 
 
 
@@ -86,9 +89,9 @@ async def get_all_courses(
 
 # GET course by ID with nested lessons and total questions
 @router.get("/{id}", response_model=CourseResponse,status_code=status.HTTP_200_OK)
-async def get_course(id: str):
+async def get_course(id: str, request: Request):
     """
-    Get course by ID with nested lessons and total questions count
+    Get course by ID with nested lessons and total questions count, answers 304 when If-None-Match still matches
     """
     course = await CourseModel.get(id)
     if not course:
@@ -100,12 +103,20 @@ async def get_course(id: str):
     # Calculate total questions for this course
     total_questions = await QuestionModel.find(QuestionModel.course_id == id).count()
 
-    # Convert course to dict and add nested data
-    course_dict = course.model_dump()
-    course_dict["lessons"] = lessons
-    course_dict["total_questions"] = total_questions
+    not_modified, headers = conditional(request, [course, *lessons], total_questions)
+    if not_modified:
+        return not_modified
+
+    # Build the response from trusted documents, nested lessons included
+    course_response = construct(
+        CourseResponse,
+        course,
+        lessons=construct_many(LessonResponse, lessons),
+        total_questions=total_questions,
+        course_progress=None
+    )
 
-    return CourseResponse(**course_dict)
+    return json_response(CourseResponse, course_response, headers=headers)
 
 # POST create new course
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -117,6 +128,7 @@ async def create_course(course_data: CourseCreate):
     course_dict = course_data.model_dump()
     course = CourseModel(**course_dict)
     await course.create()
+    await request_variants("course", course.id, course.image_url)
     return course
 
 # PATCH update course
@@ -131,7 +143,17 @@ async def update_course(id: str, course_data: CourseUpdate):
         raise HTTPException(status_code=404, detail="Course not found")
 
     update_data = course_data.model_dump(exclude_unset=True)
+    if "image_url" in update_data:
+        # The old variants belong to the old image
+        update_data["image_variants"] = {}
+    update_data["updated_at"] = datetime.now(timezone.utc)
+    previous_image = course.image_url
     await course.update({"$set": update_data})
+    if "image_url" in update_data:
+        # The replaced image loses its reference, as in update_profile_image
+        if update_data["image_url"] != previous_image:
+            await release_urls([previous_image])
+        await request_variants("course", id, update_data["image_url"])
     return await CourseModel.get(id)
 
 # DELETE course
@@ -139,14 +161,16 @@ async def update_course(id: str, course_data: CourseUpdate):
 async def delete_course(id: str):
     
     """
-    Delete course by ID
+    Delete course by ID, its lessons, questions, answers and progress are removed by a background job
     """
     course = await CourseModel.get(id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
 
     await course.delete()
-    return {"message": "Course deleted successfully"}
+    await release_urls([course.image_url])
+    job = await enqueue_job("course.cascade_delete", {"course_id": id}, priority=1)
+    return {"message": "Course deleted successfully", "job_id": job.id}
 
 
 # Bulk create with custom response
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional,List
+from typing import Dict, Optional,List
 from datetime import datetime
 
 from api_naturalize.lesson.schemas.lesson_schemas import LessonResponse
@@ -27,6 +27,7 @@ class CourseResponseAdmin(BaseModel):
     name: str
     description: str
     image_url: str
+    image_variants: Dict[str, str] = {}
     created_at: datetime
     updated_at: datetime
 
@@ -41,6 +42,7 @@ class CourseResponse(BaseModel):
     name: str
     description: str
     image_url: str
+    image_variants: Dict[str, str] = {}
     lessons: List[LessonResponse] = []  # Nested lessons
     total_questions: int = 0  # New field for total questions in this course
     created_at: datetime
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException,status,File, UploadFile, Form,Request
+from fastapi import APIRouter, HTTPException,status,File, UploadFile, Form,Request,Response
 from typing import List,Optional
 from api_naturalize.answer.models.answer_model import AnswerModel
 from api_naturalize.auth.models.user_model import UserModel
@@ -11,25 +11,33 @@ from api_naturalize.dashboard.schemas.dashboard import ExtendedDashboardResponse
 from api_naturalize.database.database import get_database
 from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
 from api_naturalize.lesson.models.lesson_model import LessonModel
-from api_naturalize.lesson.schemas.lesson_schemas import LessonResponseAdmin, LessonRes
+from api_naturalize.lesson.schemas.lesson_schemas import LessonResponseAdmin, LessonRes, LessonResponse
 from api_naturalize.progress_lesson.models.progress_lesson_model import ProgressLessonModel
 from api_naturalize.progress_lesson.schemas.progress_lesson_schemas import FilteredLessonResponse
 from api_naturalize.question.models.question_model import QuestionModel
+from api_naturalize.notification.hub import notification_hub
+from api_naturalize.scheduler.models.scheduled_task_model import ScheduledTaskModel
+from api_naturalize.scheduler.scheduler import scheduler
+from api_naturalize.storage.variants import request_variants
+from api_naturalize.time_storage.accumulator import time_accumulator
 from datetime import datetime, timedelta,timezone
 from api_naturalize.utils.account_status import AccountStatus
+from api_naturalize.utils.compression import compression_stats
+from api_naturalize.utils.get_hashed_password import hash_pool_stats
+from api_naturalize.utils.rate_limit import rate_limiter
+from api_naturalize.utils.event_bus import event_bus
+from api_naturalize.utils.fieldsets import parse_fields, parse_expand, projection_model, count_by, group_by
+from api_naturalize.utils.pagination import paginate, cursor_headers, NEXT_CURSOR_HEADER
+from api_naturalize.utils.serialization import construct, construct_many, json_response
+from api_naturalize.utils.uploads import save_upload, static_url, upload_stats
 from api_naturalize.utils.user_role import UserRole
-from pathlib import Path
 from typing import Annotated
-import shutil
-import uuid
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from dateutil.relativedelta import relativedelta
 
 
 
-UPLOAD_DIR = "uploaded_images"
-Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
@@ -37,12 +45,17 @@ router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 @router.get("/course/all",response_model=List[CourseResponseAdmin],status_code=status.HTTP_200_OK)
 async def get_all_course(
     skip: int = 0,
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = None
 ):
 
-    courses = await CourseModel.find_all().sort("-created_at").skip(skip).limit(limit).to_list()
+    courses, next_cursor, _ = await paginate(CourseModel.find_all(), skip, limit, cursor)
 
-    return courses
+    return json_response(
+        List[CourseResponseAdmin],
+        construct_many(CourseResponseAdmin, courses),
+        headers=cursor_headers(next_cursor)
+    )
 
 
 @router.post("/create/course", status_code=status.HTTP_201_CREATED)
@@ -57,26 +70,8 @@ async def create_course(
     """
 
 
-    file_extension = Path(course_image.filename).suffix
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = Path(UPLOAD_DIR) / unique_filename
-
-
-    try:
-
-        with open(file_path, "wb") as buffer:
-
-            shutil.copyfileobj(course_image.file, buffer)
-    except Exception as e:
-
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Image upload failed: {e}"
-        )
-
-
-    base_url = str(request.base_url).replace("http://", "https://")
-    image_url = f"{base_url}static/{unique_filename}"
+    path = await save_upload(course_image)
+    image_url = static_url(request, path)
 
 
     course_data = {
@@ -88,6 +83,7 @@ async def create_course(
 
     course = CourseModel(**course_data)
     await course.create()
+    await request_variants("course", course.id, image_url)
 
     # Response
     return {"message": "Course created successfully", "course_data": course_data}
@@ -95,10 +91,14 @@ async def create_course(
 
 @router.get("/user/all", status_code=status.HTTP_200_OK)
 async def get_all_user(
+        response: Response,
         skip: int = 0,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None
 ):
-    db_users = await UserModel.find_all().sort("-created_at").skip(skip).limit(limit).to_list()
+    db_users, next_cursor, _ = await paginate(UserModel.find_all(), skip, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     res = []
 
     for db_user in db_users:
@@ -117,7 +117,7 @@ async def get_all_user(
         if total_ans > 0:
             success_rate = (total_r8_ans / total_ans) * 100
 
-        user_res = UserResponse(**db_user.model_dump())
+        user_res = construct(UserResponse, db_user)
 
         res.append({
             "user": user_res,
@@ -150,23 +150,8 @@ async def create_lesson(
     Create a new lesson
     """
 
-    file_extension = Path(image_url.filename).suffix
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = Path(UPLOAD_DIR) / unique_filename
-
-    try:
-        with open(file_path, "wb") as buffer:
-
-            shutil.copyfileobj(image_url.file, buffer)
-    except Exception as e:
-
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Image upload failed: {e}"
-        )
-
-    base_url = str(request.base_url).replace("http://", "https://")
-    image_url = f"{base_url}static/{unique_filename}"
+    path = await save_upload(image_url)
+    image_url = static_url(request, path)
 
 
     lesson_data = {
@@ -178,18 +163,24 @@ async def create_lesson(
 
     lesson = LessonModel(**lesson_data)
     await lesson.create()
+    await request_variants("lesson", lesson.id, image_url)
     return lesson
 
 
 @router.get("/lesson/all",response_model=List[LessonResponseAdmin], status_code=status.HTTP_200_OK)
 async def get_all_lesson(
     skip: int = 0,
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = None
 ):
 
-    lessons = await LessonModel.find_all().sort("-created_at").skip(skip).limit(limit).to_list()
+    lessons, next_cursor, _ = await paginate(LessonModel.find_all(), skip, limit, cursor)
 
-    return lessons
+    return json_response(
+        List[LessonResponseAdmin],
+        construct_many(LessonResponseAdmin, lessons),
+        headers=cursor_headers(next_cursor)
+    )
 
 
 # GET lesson by Course ID
@@ -245,23 +236,7 @@ async def get_extended_dashboard_stats(
         raise HTTPException(status_code=404, detail="User not found")
 
     # Convert user model to UserResponse
-    user_response = UserResponse(
-        id=user.id,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        email=user.email,
-        phone_number=user.phone_number,
-        is_verified=user.is_verified,
-        profile_image=user.profile_image,
-        auth_provider=user.auth_provider,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        role=user.role,
-        otp=user.otp,
-        plan=user.plan,
-        account_status=user.account_status
-
-    )
+    user_response = construct(UserResponse, user)
 
     # Get total_score from LeaderBoardModel
     leaderboard_data = await LeaderBoardModel.find_one(LeaderBoardModel.user_id == id)
@@ -282,7 +257,7 @@ async def get_extended_dashboard_stats(
         ProgressLessonModel.progress == 100
     ).count()
 
-    return ExtendedDashboardResponse(
+    return json_response(ExtendedDashboardResponse, ExtendedDashboardResponse.model_construct(
         total_score=total_score,
         total_lessons=total_lessons,
         success_rate=success_rate,
@@ -290,7 +265,7 @@ async def get_extended_dashboard_stats(
         in_progress_lessons=in_progress_lessons,
         average_score=success_rate,
         completed_lesson=completed_lesson
-    )
+    ))
 
 # Helper function to get in-progress lessons
 async def get_in_progress_lessons(user_id: str) -> List[FilteredLessonResponse]:
@@ -323,17 +298,12 @@ async def get_in_progress_lessons(user_id: str) -> List[FilteredLessonResponse]:
         total_right_answers = sum(1 for answer in user_answers if answer.score == 1)
 
         # Create filtered lesson response
-        filtered_lesson = FilteredLessonResponse(
-            id=lesson.id,
-            name=lesson.name,
-            description=lesson.description,
-            image_url=lesson.image_url,
-            course_id=lesson.course_id,
+        filtered_lesson = construct(
+            FilteredLessonResponse,
+            lesson,
             my_progress=progress.progress,
             total_right_answers=total_right_answers,
-            total_questions=total_questions,
-            created_at=lesson.created_at,
-            updated_at=lesson.updated_at
+            total_questions=total_questions
         )
 
         in_progress_lessons.append(filtered_lesson)
@@ -360,12 +330,16 @@ async def get_course(id: str):
     # Calculate total questions for this course
     total_questions = await QuestionModel.find(QuestionModel.course_id == course_id).count()
 
-    # Convert course to dict and add nested data
-    course_dict = course.model_dump()
-    course_dict["lessons"] = lessons
-    course_dict["total_questions"] = total_questions
+    # Build the response from trusted documents, nested lessons included
+    course_response = construct(
+        CourseResponse,
+        course,
+        lessons=construct_many(LessonResponse, lessons),
+        total_questions=total_questions,
+        course_progress=None
+    )
 
-    return CourseResponse(**course_dict)
+    return json_response(CourseResponse, course_response)
 
 
 # GET question statistics with filtering - FINAL FIXED VERSION
@@ -610,6 +584,79 @@ async def get_overall_statistics():
     }
 
 
+# GET password hashing pool metrics
+@router.get("/statistics/password-hashing", status_code=status.HTTP_200_OK)
+async def get_password_hashing_statistics():
+    """
+    Queue depth and timings of the argon2 worker pool
+    """
+    return hash_pool_stats()
+
+
+# GET rate limiter counters
+@router.get("/statistics/rate-limits", status_code=status.HTTP_200_OK)
+async def get_rate_limit_statistics():
+    """
+    Allowed and rejected requests per rate limit rule
+    """
+    return rate_limiter.stats()
+
+
+# GET event bus queues
+@router.get("/statistics/events", status_code=status.HTTP_200_OK)
+async def get_event_statistics():
+    """
+    Queue depth, processed and failed events per subscriber
+    """
+    return event_bus.stats()
+
+
+# GET study time buffer
+@router.get("/statistics/study-time-buffer", status_code=status.HTTP_200_OK)
+async def get_study_time_buffer_statistics():
+    """
+    Buffered heartbeats and flush timings of this process
+    """
+    return time_accumulator.stats()
+
+
+# GET response compression
+@router.get("/statistics/compression", status_code=status.HTTP_200_OK)
+async def get_compression_statistics():
+    """
+    Compressed responses, ratio and body cache usage on this worker
+    """
+    return compression_stats()
+
+
+# GET upload throughput
+@router.get("/statistics/uploads", status_code=status.HTTP_200_OK)
+async def get_upload_statistics():
+    """
+    Uploads, bytes per second and rejected files on this worker
+    """
+    return upload_stats()
+
+
+# GET notification streams
+@router.get("/statistics/notification-streams", status_code=status.HTTP_200_OK)
+async def get_notification_stream_statistics():
+    """
+    Open SSE streams on this worker and how many events reached them
+    """
+    return notification_hub.stats()
+
+
+# GET scheduled tasks
+@router.get("/statistics/scheduler", status_code=status.HTTP_200_OK)
+async def get_scheduler_statistics():
+    """
+    Leader state of this process and the last run of every scheduled task
+    """
+    tasks = await ScheduledTaskModel.find_all().to_list()
+    return {**scheduler.stats(), "tasks": tasks}
+
+
 # GET question performance by course
 @router.get("/statistics/course/{course_id}")
 async def get_question_statistics_by_course(course_id: str):
@@ -844,7 +891,8 @@ async def get_users_by_status(
         status: UserStatusFilter = UserStatusFilter.ALL,
         skip: int = 0,
         limit: int = 50,
-        verified_only: bool = False
+        verified_only: bool = False,
+        cursor: Optional[str] = None
 ):
     """
     Get users filtered by status with pagination
@@ -859,33 +907,10 @@ async def get_users_by_status(
         query["is_verified"] = True
 
     # Execute query
-    if query:
-        users = await UserModel.find(query).skip(skip).limit(limit).to_list()
-    else:
-        users = await UserModel.find_all().skip(skip).limit(limit).to_list()
+    users, next_cursor, _ = await paginate(UserModel.find(query), skip, limit, cursor, descending=False)
 
     # Convert to response format
-    user_responses = []
-    for user in users:
-        user_responses.append(UserResponse(
-            id=user.id,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            email=user.email,
-            phone_number=user.phone_number,
-            is_verified=user.is_verified,
-            profile_image=user.profile_image,
-            auth_provider=user.auth_provider,
-            created_at=user.created_at,
-            updated_at=user.updated_at,
-            role=user.role,
-            otp=user.otp,
-            account_status=user.account_status,
-            plan=user.plan
-
-        ))
-
-    return user_responses
+    return json_response(List[UserResponse], construct_many(UserResponse, users), headers=cursor_headers(next_cursor))
 
 
 # GET user activity statistics
@@ -971,29 +996,58 @@ async def get_user_demographics():
 
 
 @router.get("/filter/course", status_code=status.HTTP_200_OK)
-async def all_course(skip: int = 0, limit: int = 10):
+async def all_course(
+        response: Response,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        expand: Optional[str] = None
+):
+    """
+    Courses with their lessons and questions
+    - fields=id,name limits the course fields
+    - expand=lessons or expand=none skips embedding, total_lesson and total_question are always returned
+    """
 
     safe_skip = int(skip)
     safe_limit = int(limit)
-
-
-    courses = await CourseModel.find_all().sort("-created_at").skip(safe_skip).limit(safe_limit).to_list()
+    selected = parse_fields(fields, CourseResponseAdmin)
+    expanded = parse_expand(expand, {"lessons", "questions"})
+
+    query = CourseModel.find_all()
+    if selected is not None:
+        query = query.project(projection_model(CourseModel, selected | {"created_at"}))
+    courses, next_cursor, _ = await paginate(query, safe_skip, safe_limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    # Nested data for the whole page, loaded only when expanded and counted otherwise
+    course_ids = [course.id for course in courses]
+    if "lessons" in expanded:
+        lessons_by_course = await group_by(LessonModel, "course_id", course_ids)
+        lesson_counts = {course_id: len(lessons) for course_id, lessons in lessons_by_course.items()}
+    else:
+        lesson_counts = await count_by(LessonModel, "course_id", course_ids)
+    if "questions" in expanded:
+        questions_by_course = await group_by(QuestionModel, "course_id", course_ids)
+        question_counts = {course_id: len(questions) for course_id, questions in questions_by_course.items()}
+    else:
+        question_counts = await count_by(QuestionModel, "course_id", course_ids)
 
     res = []
     for course in courses:
 
-        db_lessons = await LessonModel.find(LessonModel.course_id == course.id).to_list()
-        db_question = await QuestionModel.find(QuestionModel.course_id == course.id).to_list()
-
-
         res_dic = {
-            "course": course,
-            "lessons": db_lessons,
-            "questions": db_question,
-            "total_question": len(db_question),
-            "total_lesson": len(db_lessons),
+            "course": jsonable_encoder(course, include=selected),
+            "total_question": question_counts.get(course.id, 0),
+            "total_lesson": lesson_counts.get(course.id, 0),
             "status": "published"
         }
+        if "lessons" in expanded:
+            res_dic["lessons"] = lessons_by_course[course.id]
+        if "questions" in expanded:
+            res_dic["questions"] = questions_by_course[course.id]
         res.append(res_dic)
 
 
@@ -1018,24 +1072,54 @@ async def all_course(skip: int = 0, limit: int = 10):
 
 
 @router.get("/filter/lesson", status_code=status.HTTP_200_OK)
-async def all_lessons(skip: int = 0, limit: int = 10):
+async def all_lessons(
+        response: Response,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        expand: Optional[str] = None
+):
+    """
+    Lessons with their course and questions
+    - fields=id,name limits the lesson fields
+    - expand=course or expand=none skips embedding, total_question is always returned
+    """
     safe_skip = int(skip)
     safe_limit = int(limit)
-
-    lessons = await LessonModel.find_all().sort("-created_at").skip(safe_skip).limit(safe_limit).to_list()
+    selected = parse_fields(fields, LessonResponseAdmin)
+    expanded = parse_expand(expand, {"course", "questions"})
+
+    query = LessonModel.find_all()
+    if selected is not None:
+        query = query.project(projection_model(LessonModel, selected | {"created_at", "course_id"}))
+    lessons, next_cursor, _ = await paginate(query, safe_skip, safe_limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    # Nested data for the whole page, loaded only when expanded and counted otherwise
+    lesson_ids = [lesson.id for lesson in lessons]
+    if "course" in expanded:
+        course_ids = list({lesson.course_id for lesson in lessons})
+        db_courses = await CourseModel.find({"_id": {"$in": course_ids}}).to_list()
+        courses_by_id = {db_course.id: db_course for db_course in db_courses}
+    if "questions" in expanded:
+        questions_by_lesson = await group_by(QuestionModel, "lesson_id", lesson_ids)
+        question_counts = {lesson_id: len(questions) for lesson_id, questions in questions_by_lesson.items()}
+    else:
+        question_counts = await count_by(QuestionModel, "lesson_id", lesson_ids)
 
     res = []
     for lesson in lessons:
-        db_course = await CourseModel.get(lesson.course_id)
-        db_question = await QuestionModel.find(QuestionModel.lesson_id == lesson.id).to_list()
-
         res_dic = {
-            "course": db_course,
-            "lesson": lesson,
-            "questions": db_question,
-            "total_question": len(db_question),
+            "lesson": jsonable_encoder(lesson, include=selected),
+            "total_question": question_counts.get(lesson.id, 0),
             "status": "published"
         }
+        if "course" in expanded:
+            res_dic["course"] = courses_by_id.get(lesson.course_id)
+        if "questions" in expanded:
+            res_dic["questions"] = questions_by_lesson[lesson.id]
         res.append(res_dic)
 
     encoded_res = jsonable_encoder(res)
@@ -1056,10 +1140,12 @@ async def all_lessons(skip: int = 0, limit: int = 10):
 
 
 @router.get("filter/questions",status_code=status.HTTP_200_OK)
-async def all_questions(skip: int = 0, limit: int = 10):
+async def all_questions(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     safe_skip = int(skip)
     safe_limit = int(limit)
-    db_questions=await QuestionModel.find_all().sort("-created_at").skip(safe_skip).limit(safe_limit).to_list()
+    db_questions, next_cursor, _ = await paginate(QuestionModel.find_all(), safe_skip, safe_limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     res=[]
     for db_question in db_questions:
         res_dict={}
@@ -1113,7 +1199,10 @@ async def change_status(id: str, acc_status: str):
             detail="Account status must be (active, suspend, or inactive)"
         )
 
-    await db_user.set({UserModel.account_status: status_map[acc_status]})
+    await db_user.set({
+        UserModel.account_status: status_map[acc_status],
+        UserModel.updated_at: datetime.now(timezone.utc),
+    })
 
     return {"message": f"Successfully updated account status to {acc_status}"}
 
@@ -1121,8 +1210,10 @@ async def change_status(id: str, acc_status: str):
 @router.get("/user/all/filter/{acc_status}", status_code=status.HTTP_200_OK)
 async def get_all_acc_status_user(
         acc_status: str,
+        response: Response,
         skip: int = 0,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None
 ):
     status_map = {
         "active": AccountStatus.ACTIVE,
@@ -1140,9 +1231,11 @@ async def get_all_acc_status_user(
     target_status = status_map[acc_status]
 
 
-    db_users = await UserModel.find(
-        UserModel.account_status == target_status
-    ).sort("-created_at").skip(skip).limit(limit).to_list()
+    db_users, next_cursor, _ = await paginate(
+        UserModel.find(UserModel.account_status == target_status), skip, limit, cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     res = []
 
@@ -1160,7 +1253,7 @@ async def get_all_acc_status_user(
         success_rate = (total_r8_ans / total_ans * 100) if total_ans > 0 else 0
 
         res.append({
-            "user": UserResponse(**db_user.model_dump()),
+            "user": construct(UserResponse, db_user),
             "score": total_r8_ans,
             "success_rate": round(success_rate, 2),
             "subscription": "basic"
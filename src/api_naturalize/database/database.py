@@ -2,17 +2,26 @@ from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
 from typing import Optional
 import os
+from api_naturalize.database.migrations import run_migrations
 from api_naturalize.answer.models.answer_model import AnswerModel
 from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.auth.models.otp_challenge_model import OtpChallengeModel
 from api_naturalize.course.models.course_model import CourseModel
+from api_naturalize.email_outbox.models.email_outbox_model import EmailOutboxModel
 from api_naturalize.frequent_question.models.frequent_question_model import FrequentQuestionModel
+from api_naturalize.jobs.models.job_model import JobModel
 from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
 from api_naturalize.lesson.models.lesson_model import LessonModel
+from api_naturalize.notification.models.notification_counter_model import NotificationCounterModel
 from api_naturalize.notification.models.notification_model import notificationModel
 from api_naturalize.payments.models.payments_model import PaymentsModel
 from api_naturalize.progress_lesson.models.progress_lesson_model import ProgressLessonModel
 from api_naturalize.question.models.question_model import QuestionModel
+from api_naturalize.scheduler.models.scheduled_task_model import ScheduledTaskModel
+from api_naturalize.scheduler.models.scheduler_lease_model import SchedulerLeaseModel
+from api_naturalize.storage.models.stored_file_model import StoredFileModel
 from api_naturalize.subscription_plan.models.subscription_plan_model import SubscriptionPlanModel
+from api_naturalize.time_storage.models.study_day_model import StudyDayModel
 from api_naturalize.time_storage.models.time_storage_model import TimeStorageModel
 
 # MongoDB connection settings
@@ -31,6 +40,9 @@ async def initialize_database():
     global client
     client = AsyncIOMotorClient(MONGODB_URL)
 
+    # Data fixes the indexes below depend on, such as merging rows a new unique index would reject
+    await run_migrations(client[DATABASE_NAME])
+
     await init_beanie(
         database=client[DATABASE_NAME],
         document_models=[
@@ -45,7 +57,15 @@ async def initialize_database():
             TimeStorageModel,
             notificationModel,
             PaymentsModel,
-            SubscriptionPlanModel
+            SubscriptionPlanModel,
+            EmailOutboxModel,
+            OtpChallengeModel,
+            JobModel,
+            SchedulerLeaseModel,
+            ScheduledTaskModel,
+            StudyDayModel,
+            NotificationCounterModel,
+            StoredFileModel
         ],
     )
 
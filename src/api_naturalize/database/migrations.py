@@ -0,0 +1,169 @@
+"""
+One-shot data migrations, run by initialize_database before init_beanie builds the indexes.
+Each one runs once per database: the first process to start claims it in the migrations
+collection, the others wait for it to finish. Every migration is idempotent, so one that
+failed half way is simply run again on the next start.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import os
+import socket
+from api_naturalize.utils.notification_category import NotificationCategory, NOTIFICATION_RETENTION_DAYS
+
+MIGRATIONS_COLLECTION = "migrations"
+# A claim whose runner has not checked in for this long belongs to a dead process and is taken over
+MIGRATION_STALE_SECONDS = float(os.getenv("MIGRATION_STALE_SECONDS", "60"))
+MIGRATION_HEARTBEAT_SECONDS = 10
+
+# Titles the login notifications had before categories existed
+LEGACY_LOGIN_TITLES = "^(Welcome back!|Account created securely)"
+
+Migration = Callable[[AsyncIOMotorDatabase], Awaitable[None]]
+
+_migrations: List[tuple] = []
+
+
+def migration(name: str) -> Callable[[Migration], Migration]:
+    """
+    Register a migration, they run in registration order
+    """
+    def register(func: Migration) -> Migration:
+        _migrations.append((name, func))
+        return func
+    return register
+
+
+async def merge_duplicates(
+        collection: AsyncIOMotorCollection,
+        keys: List[str],
+        merge: Callable[[List[dict]], dict]
+) -> int:
+    """
+    Collapse rows sharing the same keys into the oldest one, so a unique index can be built on them.
+    merge gets the rows oldest first and returns the fields to $set on the kept row.
+    Returns how many rows were removed.
+    """
+    groups = collection.aggregate([
+        {"$group": {"_id": {key: f"${key}" for key in keys}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    removed = 0
+    async for group in groups:
+        rows = await collection.find({"_id": {"$in": group["ids"]}}).sort("created_at", ASCENDING).to_list(None)
+        if len(rows) < 2:
+            continue
+        kept, duplicates = rows[0], [row["_id"] for row in rows[1:]]
+        await collection.update_one(
+            {"_id": kept["_id"]}, {"$set": {**merge(rows), "updated_at": datetime.now(timezone.utc)}}
+        )
+        result = await collection.delete_many({"_id": {"$in": duplicates}})
+        removed += result.deleted_count
+    return removed
+
+
+def _furthest_progress(rows: List[dict]) -> dict:
+    furthest = max(rows, key=lambda row: row.get("progress", 0))
+    return {"progress": furthest.get("progress", 0), "course_id": furthest.get("course_id", "")}
+
+
+@migration("2026-10-leaderboard-progress-dedupe")
+async def dedupe_leaderboard_and_progress(db: AsyncIOMotorDatabase):
+    # Left by the old find-then-insert race, the unique user_id and (user_id, lesson_id) indexes need them gone
+    removed = await merge_duplicates(
+        db["leader_boards"], ["user_id"],
+        lambda rows: {"total_score": sum(row.get("total_score", 0) for row in rows)}
+    )
+    print(f"Merged {removed} duplicate leaderboard rows")
+    removed = await merge_duplicates(db["progress_lessons"], ["user_id", "lesson_id"], _furthest_progress)
+    print(f"Merged {removed} duplicate lesson progress rows")
+
+
+@migration("2026-10-time-storage-dedupe")
+async def dedupe_time_storage(db: AsyncIOMotorDatabase):
+    # Concurrent first heartbeats each inserted a row, the unique user_id index needs one per user
+    removed = await merge_duplicates(
+        db["time_storages"], ["user_id"],
+        lambda rows: {"total_time": sum(row.get("total_time", 0) for row in rows)}
+    )
+    print(f"Merged {removed} duplicate study time rows")
+
+
+def _expiry_from_created_at(category: NotificationCategory) -> list:
+    return [{"$set": {
+        "category": category.value,
+        "expires_at": {"$add": ["$created_at", NOTIFICATION_RETENTION_DAYS[category] * 24 * 3600 * 1000]},
+    }}]
+
+
+@migration("2026-10-notification-retention-backfill")
+async def backfill_notification_retention(db: AsyncIOMotorDatabase):
+    # Notifications stored before categories existed get an expiry, so the TTL index can remove them
+    collection = db["notifications"]
+    legacy = {"expires_at": {"$exists": False}}
+    await collection.update_many(
+        {**legacy, "title": {"$regex": LEGACY_LOGIN_TITLES}}, _expiry_from_created_at(NotificationCategory.LOGIN)
+    )
+    await collection.update_many(legacy, _expiry_from_created_at(NotificationCategory.GENERAL))
+
+
+async def _claim(collection: AsyncIOMotorCollection, name: str, owner: str) -> Optional[bool]:
+    """
+    True when this process runs the migration, False when it is done, None while another process runs it
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        await collection.insert_one({"_id": name, "status": "running", "owner": owner, "heartbeat_at": now})
+        return True
+    except DuplicateKeyError:
+        pass
+    taken = await collection.find_one_and_update(
+        {"_id": name, "status": "running", "heartbeat_at": {"$lt": now - timedelta(seconds=MIGRATION_STALE_SECONDS)}},
+        {"$set": {"owner": owner, "heartbeat_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if taken is not None:
+        return True
+    current = await collection.find_one({"_id": name}, {"status": 1})
+    if current is None:
+        # The runner failed and released it, claim it on the next round
+        return None
+    return None if current["status"] == "running" else False
+
+
+async def _heartbeat(collection: AsyncIOMotorCollection, name: str, owner: str):
+    while True:
+        await asyncio.sleep(MIGRATION_HEARTBEAT_SECONDS)
+        await collection.update_one(
+            {"_id": name, "owner": owner}, {"$set": {"heartbeat_at": datetime.now(timezone.utc)}}
+        )
+
+
+async def run_migrations(db: AsyncIOMotorDatabase):
+    collection = db[MIGRATIONS_COLLECTION]
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    for name, func in _migrations:
+        while True:
+            claimed = await _claim(collection, name, owner)
+            if claimed is not None:
+                break
+            await asyncio.sleep(1)
+        if not claimed:
+            continue
+        print(f"Running migration {name}")
+        heartbeat = asyncio.create_task(_heartbeat(collection, name, owner))
+        try:
+            await func(db)
+        except Exception:
+            # Released, so the next start runs it again
+            await collection.delete_one({"_id": name, "owner": owner})
+            raise
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+        await collection.update_one(
+            {"_id": name}, {"$set": {"status": "done", "finished_at": datetime.now(timezone.utc)}}
+        )
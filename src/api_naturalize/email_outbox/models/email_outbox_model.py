@@ -0,0 +1,38 @@
+from beanie import Document, before_event, Replace, Save
+from datetime import datetime, timezone
+from pymongo import ASCENDING, IndexModel
+from pydantic import Field
+from typing import Optional
+import uuid
+from api_naturalize.utils.email_status import EmailStatus
+
+
+class EmailOutboxModel(Document):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id")
+    to: str
+    subject: str = ""
+    body: str = ""
+    status: EmailStatus = EmailStatus.PENDING
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    failed_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    # Auto-update "updated_at" on update
+    @before_event([Save, Replace])
+    def update_timestamp(self):
+        self.updated_at = datetime.now(timezone.utc)
+
+    class Settings:
+        name = "email_outbox"
+        indexes = [
+            # The sender claims the oldest due message
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+            # Sent messages are kept for a week and failed ones for a month, pending ones until delivered
+            IndexModel([("sent_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+            IndexModel([("failed_at", ASCENDING)], expireAfterSeconds=30 * 24 * 3600),
+        ]
@@ -0,0 +1,206 @@
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import List, Optional
+from pymongo import ASCENDING, ReturnDocument
+import aiosmtplib
+import asyncio
+import os
+import random
+from api_naturalize.email_outbox.models.email_outbox_model import EmailOutboxModel
+from api_naturalize.utils.email_status import EmailStatus
+
+APP_PASSWORD = os.getenv("APP_PASSWORD")
+EMAIL = os.getenv("EMAIL")
+HOST_NAME = os.getenv("HOST_NAME")
+# Point these at a local SMTP stand-in (e.g. `python -m aiosmtpd -n -l localhost:1025`) in development
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+SMTP_TIMEOUT_SECONDS = 30
+# A claimed message whose sender died is picked up again after the lease. The lease of the
+# unsent rest of a batch is renewed before every message, so it only has to cover one worst-case
+# send: connect, login and send, then the same again after a stale connection, each up to the timeout.
+OUTBOX_LEASE_SECONDS = SMTP_TIMEOUT_SECONDS * 6 + 30
+# Close the SMTP connection after this long without mail, servers drop idle clients anyway
+SMTP_IDLE_SECONDS = 60
+
+
+def backoff_delay(attempts: int) -> float:
+    """
+    Exponential backoff with jitter: ~2s, 4s, 8s ... capped at 15 minutes
+    """
+    return min(2 ** attempts, 900) * random.uniform(0.5, 1.0)
+
+
+async def enqueue_email(to: str, subject: str, body: str) -> EmailOutboxModel:
+    """
+    Store a message in the outbox, the sender delivers it in the background
+    """
+    message = EmailOutboxModel(to=to, subject=subject, body=body)
+    await message.insert()
+    email_sender.wake()
+    return message
+
+
+class EmailSender:
+    """
+    Background outbox worker with one persistent SMTP connection.
+    Messages are claimed with find_one_and_update, so several app workers can run a sender each.
+    """
+
+    def __init__(self):
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._idle_since: Optional[float] = None
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self._disconnect()
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                batch = await self._claim_batch()
+                if batch:
+                    await self._deliver(batch)
+                    continue
+            except Exception as e:
+                print(f"Email outbox error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._smtp is not None and self._idle_since is not None \
+                    and asyncio.get_running_loop().time() - self._idle_since > SMTP_IDLE_SECONDS:
+                await self._disconnect()
+
+    async def _claim_batch(self) -> List[dict]:
+        collection = EmailOutboxModel.get_pymongo_collection()
+        now = datetime.now(timezone.utc)
+        batch = []
+        for _ in range(OUTBOX_BATCH_SIZE):
+            doc = await collection.find_one_and_update(
+                {
+                    "$or": [
+                        {"status": EmailStatus.PENDING.value, "next_attempt_at": {"$lte": now}},
+                        {"status": EmailStatus.SENDING.value, "locked_until": {"$lt": now}},
+                    ]
+                },
+                {"$set": {
+                    "status": EmailStatus.SENDING.value,
+                    "locked_until": now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+                    "updated_at": now,
+                }},
+                sort=[("next_attempt_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                break
+            batch.append(doc)
+        return batch
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        smtp = aiosmtplib.SMTP(hostname=HOST_NAME, port=SMTP_PORT, use_tls=SMTP_USE_TLS, timeout=SMTP_TIMEOUT_SECONDS)
+        await smtp.connect()
+        if EMAIL and APP_PASSWORD:
+            await smtp.login(EMAIL, APP_PASSWORD)
+        self._smtp = smtp
+        return smtp
+
+    async def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        self._idle_since = None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+    async def _deliver(self, batch: List[dict]):
+        # One connection for the whole batch, the handshake and login are paid once
+        for index, doc in enumerate(batch):
+            if index:
+                await self._renew_lease(batch[index:])
+            message = EmailMessage()
+            message["From"] = EMAIL
+            message["To"] = doc["to"]
+            message["Subject"] = doc["subject"]
+            message.set_content(doc["body"])
+            try:
+                try:
+                    smtp = await self._connect()
+                    await smtp.send_message(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The kept connection went stale, reconnect once before counting an attempt
+                    self._smtp = None
+                    smtp = await self._connect()
+                    await smtp.send_message(message)
+            except (aiosmtplib.SMTPException, OSError) as e:
+                await self._failed(doc, e)
+                if isinstance(e, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, OSError)):
+                    await self._disconnect()
+                continue
+            await self._sent(doc)
+        self._idle_since = asyncio.get_running_loop().time()
+
+    async def _renew_lease(self, docs: List[dict]):
+        now = datetime.now(timezone.utc)
+        await EmailOutboxModel.get_pymongo_collection().update_many(
+            {"_id": {"$in": [doc["_id"] for doc in docs]}, "status": EmailStatus.SENDING.value},
+            {"$set": {"locked_until": now + timedelta(seconds=OUTBOX_LEASE_SECONDS), "updated_at": now}}
+        )
+
+    async def _sent(self, doc: dict):
+        now = datetime.now(timezone.utc)
+        # The body may hold a one-time code, it is not kept once delivered
+        await EmailOutboxModel.get_pymongo_collection().update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"status": EmailStatus.SENT.value, "sent_at": now, "locked_until": None, "updated_at": now},
+             "$unset": {"body": ""},
+             "$inc": {"attempts": 1}}
+        )
+
+    async def _failed(self, doc: dict, error: Exception):
+        now = datetime.now(timezone.utc)
+        attempts = doc.get("attempts", 0) + 1
+        # 5xx replies such as an unknown mailbox will not succeed on retry, a rejected login is our config
+        permanent = isinstance(error, aiosmtplib.SMTPRecipientsRefused) or (
+            isinstance(error, aiosmtplib.SMTPResponseException)
+            and not isinstance(error, aiosmtplib.SMTPAuthenticationError)
+            and error.code >= 500
+        )
+        operations = {}
+        if permanent or attempts >= OUTBOX_MAX_ATTEMPTS:
+            update = {"status": EmailStatus.FAILED.value, "failed_at": now}
+            operations["$unset"] = {"body": ""}
+            print(f"Email to {doc['to']} failed permanently: {error}")
+        else:
+            update = {
+                "status": EmailStatus.PENDING.value,
+                "next_attempt_at": now + timedelta(seconds=backoff_delay(attempts)),
+            }
+        update.update({"attempts": attempts, "locked_until": None, "last_error": str(error), "updated_at": now})
+        await EmailOutboxModel.get_pymongo_collection().update_one({"_id": doc["_id"]}, {"$set": update, **operations})
+
+
+email_sender = EmailSender()
@@ -1,24 +1,31 @@
 from fastapi import APIRouter, HTTPException,status
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timezone
 
 from fastapi.params import Depends
 
 from api_naturalize.auth.models.user_model import UserModel
 from api_naturalize.frequent_question.models.frequent_question_model import FrequentQuestionModel
 from api_naturalize.frequent_question.schemas.frequent_question_schemas import FrequentquestionCreate, FrequentquestionUpdate, FrequentquestionResponse
-from api_naturalize.utils.user_info import get_user_info
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct_many, json_response
+from api_naturalize.utils.user_info import get_current_user
 
 router = APIRouter(prefix="/fqn", tags=["frequent_questions"])
 
 # GET all frequent_questions
 @router.get("/", response_model=List[FrequentquestionResponse],status_code=status.HTTP_200_OK)
-async def get_all_frequent_questions(skip: int = 0, limit: int = 10):
+async def get_all_frequent_questions(skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     
     """
-    Get all frequent_questions with pagination
+    Get all frequent_questions with pagination, pass the X-Next-Cursor header back as cursor for the next page
     """
-    frequent_questions = await FrequentQuestionModel.find_all().skip(skip).limit(limit).to_list()
-    return frequent_questions
+    frequent_questions, next_cursor, _ = await paginate(FrequentQuestionModel.find_all(), skip, limit, cursor, descending=False)
+    return json_response(
+        List[FrequentquestionResponse],
+        construct_many(FrequentquestionResponse, frequent_questions),
+        headers=cursor_headers(next_cursor)
+    )
 
 # GET frequent_question by ID
 @router.get("/{id}", response_model=FrequentquestionResponse,status_code=status.HTTP_200_OK)
@@ -34,15 +41,12 @@ async def get_frequent_question(id: str):
 
 # POST create new frequent_question
 @router.post("/", response_model=FrequentquestionResponse,status_code=status.HTTP_201_CREATED)
-async def create_frequent_question(frequent_question_data: FrequentquestionCreate,user:dict=Depends(get_user_info)):
+async def create_frequent_question(frequent_question_data: FrequentquestionCreate,db_user:UserModel=Depends(get_current_user)):
     
     """
     Create a new frequent_question
     """
-    user_id=user["user_id"]
-    db_user=await UserModel.get(user_id)
-    if not db_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    user_id=db_user.id
 
     frequent_question = FrequentQuestionModel(
         user_id= user_id,
@@ -65,6 +69,7 @@ async def update_frequent_question(id: str, frequent_question_data: Frequentques
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="FrequentQuestion not found")
 
     update_data = frequent_question_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await frequent_question.update({"$set": update_data})
     return await FrequentQuestionModel.get(id)
 
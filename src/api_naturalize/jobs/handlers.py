@@ -0,0 +1,216 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+import os
+import uuid
+from api_naturalize.answer.models.answer_model import AnswerModel
+from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.jobs.queue import JobContext, job_handler, enqueue_job
+from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
+from api_naturalize.lesson.models.lesson_model import LessonModel
+from api_naturalize.notification.delivery import deliver
+from api_naturalize.notification.models.notification_counter_model import NotificationCounterModel
+from api_naturalize.notification.models.notification_model import notificationModel
+from api_naturalize.progress_lesson.models.progress_lesson_model import ProgressLessonModel
+from api_naturalize.question.models.question_model import QuestionModel
+from api_naturalize.storage.gc import UploadCollector
+from api_naturalize.storage.refs import release_urls
+from api_naturalize.storage.variants import PERMANENT_ERRORS, VARIANT_TARGETS, render_variants, variant_urls
+from api_naturalize.time_storage.models.study_day_model import StudyDayModel
+from api_naturalize.time_storage.models.time_storage_model import TimeStorageModel
+from api_naturalize.utils.notification_category import NotificationCategory
+from api_naturalize.utils.uploads import UPLOAD_DIR
+
+REBUILD_BATCH_SIZE = 1000
+# Answers newer than this may still have their score event in flight, the rebuild leaves them to the subscriber
+REBUILD_SETTLE_SECONDS = 60
+BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "1000"))
+
+
+async def _delete_steps(context: JobContext, steps: List[Tuple[str, object, dict]]) -> dict:
+    """
+    Delete matching documents collection by collection, reporting progress after each step.
+    Every step is idempotent, so a retried job simply continues.
+    """
+    deleted = {}
+    for index, (label, document, query) in enumerate(steps):
+        result = await document.get_pymongo_collection().delete_many(query)
+        deleted[label] = result.deleted_count
+        await context.set_progress((index + 1) / len(steps) * 100, f"deleted {label}")
+    return deleted
+
+
+@job_handler("course.cascade_delete")
+async def cascade_delete_course(context: JobContext):
+    course_id = context.payload["course_id"]
+    lessons = LessonModel.get_pymongo_collection().find({"course_id": course_id}, {"image_url": 1})
+    await release_urls([lesson.get("image_url") async for lesson in lessons])
+    deleted = await _delete_steps(context, [
+        ("answers", AnswerModel, {"course_id": course_id}),
+        ("progress", ProgressLessonModel, {"course_id": course_id}),
+        ("questions", QuestionModel, {"course_id": course_id}),
+        ("lessons", LessonModel, {"course_id": course_id}),
+    ])
+    if deleted["answers"]:
+        await enqueue_job("leaderboard.rebuild", priority=-1)
+    return deleted
+
+
+@job_handler("lesson.cascade_delete")
+async def cascade_delete_lesson(context: JobContext):
+    lesson_id = context.payload["lesson_id"]
+    deleted = await _delete_steps(context, [
+        ("answers", AnswerModel, {"lesson_id": lesson_id}),
+        ("progress", ProgressLessonModel, {"lesson_id": lesson_id}),
+        ("questions", QuestionModel, {"lesson_id": lesson_id}),
+    ])
+    if deleted["answers"]:
+        await enqueue_job("leaderboard.rebuild", priority=-1)
+    return deleted
+
+
+@job_handler("user.cascade_delete")
+async def cascade_delete_user(context: JobContext):
+    # Payments and submitted FAQs are kept for the records
+    user_id = context.payload["user_id"]
+    return await _delete_steps(context, [
+        ("answers", AnswerModel, {"user_id": user_id}),
+        ("progress", ProgressLessonModel, {"user_id": user_id}),
+        ("leaderboards", LeaderBoardModel, {"user_id": user_id}),
+        ("notifications", notificationModel, {"user_id": user_id}),
+        ("notification_counters", NotificationCounterModel, {"_id": user_id}),
+        ("time_storages", TimeStorageModel, {"user_id": user_id}),
+        ("study_days", StudyDayModel, {"user_id": user_id}),
+    ])
+
+
+async def _set_totals(collection, operations: List[UpdateOne]) -> int:
+    """
+    Returns how many rows were left alone because the subscriber updated them after the cutoff
+    """
+    try:
+        await collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        # The filter skips rows updated since the cutoff, the upsert then meets the unique user_id index
+        if any(error["code"] != 11000 for error in errors):
+            raise
+        return len(errors)
+    return 0
+
+
+@job_handler("leaderboard.rebuild")
+async def rebuild_leaderboard(context: JobContext):
+    """
+    Recompute every total_score from the answers, fixing drift from deletes or lost events.
+    Works on a snapshot: answers up to a cutoff, written only to rows the subscriber has not
+    touched since, so concurrent $incs are neither lost nor counted twice.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=REBUILD_SETTLE_SECONDS)
+    collection = LeaderBoardModel.get_pymongo_collection()
+    # Only drives the progress bar, an estimate from the collection metadata is enough
+    total_users = await collection.estimated_document_count() or 1
+    totals = AnswerModel.get_pymongo_collection().aggregate([
+        # $not keeps answers without a created_at in the snapshot
+        {"$match": {"created_at": {"$not": {"$gt": cutoff}}}},
+        {"$group": {"_id": "$user_id", "total_score": {"$sum": "$score"}}},
+    ], allowDiskUse=True)
+    operations = []
+    updated = 0
+    skipped = 0
+    async for row in totals:
+        operations.append(UpdateOne(
+            {"user_id": row["_id"], "updated_at": {"$lte": cutoff}},
+            {"$set": {"total_score": row["total_score"], "updated_at": now},
+             "$setOnInsert": {"_id": str(uuid.uuid4()), "created_at": now}},
+            upsert=True
+        ))
+        if len(operations) >= REBUILD_BATCH_SIZE:
+            skipped += await _set_totals(collection, operations)
+            updated += len(operations)
+            operations = []
+            await context.set_progress(min(updated / total_users * 100, 99), f"{updated} users rebuilt")
+    if operations:
+        skipped += await _set_totals(collection, operations)
+        updated += len(operations)
+    # Users whose answers are all gone keep their row with a zero score
+    reset = await collection.update_many(
+        {"updated_at": {"$lte": cutoff}, "total_score": {"$ne": 0}},
+        {"$set": {"total_score": 0, "updated_at": now}}
+    )
+    return {"users": updated - skipped, "skipped": skipped, "reset": reset.modified_count}
+
+
+async def _broadcast_chunk(payload: dict, user_ids: List[str]) -> int:
+    notifications = [
+        notificationModel(
+            # Fixed per broadcast and user, so a retried job skips users it already reached
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"broadcast:{payload['broadcast_id']}:{user_id}")),
+            user_id=user_id,
+            category=NotificationCategory.BROADCAST,
+            title=payload["title"],
+            description=payload["description"],
+        )
+        for user_id in user_ids
+    ]
+    return len(await deliver(notifications))
+
+
+@job_handler("notification.broadcast")
+async def broadcast_notification(context: JobContext):
+    """
+    Walk the user ids with a projected cursor and insert the notifications in fixed-size chunks
+    """
+    users = UserModel.get_pymongo_collection()
+    total = await users.estimated_document_count() or 1
+    processed = sent = 0
+    chunk = []
+    cursor = users.find({}, {"_id": 1}).sort("_id", ASCENDING).batch_size(BROADCAST_CHUNK_SIZE)
+    async for user in cursor:
+        chunk.append(user["_id"])
+        if len(chunk) >= BROADCAST_CHUNK_SIZE:
+            sent += await _broadcast_chunk(context.payload, chunk)
+            processed += len(chunk)
+            chunk = []
+            await context.set_progress(min(processed / total * 100, 99), f"{processed} users")
+    if chunk:
+        sent += await _broadcast_chunk(context.payload, chunk)
+        processed += len(chunk)
+    return {"users": processed, "sent": sent}
+
+
+@job_handler("image.variants")
+async def generate_image_variants(context: JobContext):
+    """
+    Render thumbnails and a WebP copy of an uploaded image, then point the document at them
+    """
+    payload = context.payload
+    document, field, variants_field = VARIANT_TARGETS[payload["target"]]
+    try:
+        variants = await render_variants(payload["path"], UPLOAD_DIR)
+    except FileNotFoundError:
+        return {"variants": 0, "skipped": "original is gone"}
+    except PERMANENT_ERRORS as e:
+        # Not an image Pillow can read, or too large to decode, retrying will not change that
+        return {"variants": 0, "skipped": str(e)}
+    if not variants:
+        return {"variants": 0, "skipped": "Pillow is not installed"}
+    # Matching the URL as well leaves documents alone whose image changed in the meantime
+    result = await document.get_pymongo_collection().update_one(
+        {"_id": payload["document_id"], field: payload["url"]},
+        {"$set": {
+            variants_field: variant_urls(payload["url"], payload["path"], variants),
+            "updated_at": datetime.now(timezone.utc),
+        }}
+    )
+    return {"variants": len(variants), "updated": result.modified_count}
+
+
+@job_handler("uploads.gc")
+async def collect_uploads(context: JobContext):
+    """
+    Mark every referenced upload, then sweep the files nothing points at, see storage/gc.py
+    """
+    return await UploadCollector(progress=context.set_progress).run()
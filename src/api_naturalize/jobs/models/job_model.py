@@ -0,0 +1,46 @@
+from beanie import Document, before_event, Replace, Save
+from datetime import datetime, timezone
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pydantic import Field
+from typing import Any, Dict, Optional
+import uuid
+from api_naturalize.utils.job_status import JobStatus
+
+
+class JobModel(Document):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id")
+    name: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    status: JobStatus = JobStatus.QUEUED
+    # Higher runs first
+    priority: int = 0
+    attempts: int = 0
+    max_attempts: int = 5
+    run_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    locked_by: Optional[str] = None
+    lease_until: Optional[datetime] = None
+    progress: float = 0.0
+    progress_message: Optional[str] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    # Auto-update "updated_at" on update
+    @before_event([Save, Replace])
+    def update_timestamp(self):
+        self.updated_at = datetime.now(timezone.utc)
+
+    class Settings:
+        name = "jobs"
+        indexes = [
+            # Claim order: highest priority, then oldest due
+            IndexModel([("status", ASCENDING), ("priority", DESCENDING), ("run_at", ASCENDING)]),
+            # Expired leases of crashed workers
+            IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)]),
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+            # Finished jobs are kept for two weeks for the throughput numbers
+            IndexModel([("finished_at", ASCENDING)], expireAfterSeconds=14 * 24 * 3600),
+        ]
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+import asyncio
+import os
+import random
+import socket
+import traceback
+import uuid
+from api_naturalize.jobs.models.job_model import JobModel
+from api_naturalize.utils.job_status import JobStatus
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+
+JobHandler = Callable[["JobContext"], Awaitable[Optional[Dict[str, Any]]]]
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(name: str):
+    """
+    Register the decorated coroutine as the handler for jobs called name.
+    It receives a JobContext and may return a dict that is stored as the job's result.
+    """
+    def decorator(handler: JobHandler) -> JobHandler:
+        _handlers[name] = handler
+        return handler
+    return decorator
+
+
+async def enqueue_job(
+        name: str,
+        payload: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        delay_seconds: float = 0,
+        max_attempts: int = 5
+) -> JobModel:
+    job = JobModel(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+    )
+    await job.insert()
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Exponential backoff with jitter: ~10s, 20s, 40s ... capped at an hour
+    """
+    return min(10 * 2 ** (attempts - 1), 3600) * random.uniform(0.5, 1.0)
+
+
+class LeaseLost(Exception):
+    """
+    Another worker took the job over after our lease expired
+    """
+
+
+class JobContext:
+    def __init__(self, job: dict, worker_id: str):
+        self.job_id: str = job["_id"]
+        self.name: str = job["name"]
+        self.payload: Dict[str, Any] = job.get("payload") or {}
+        self.attempt: int = job["attempts"]
+        self.worker_id = worker_id
+
+    async def set_progress(self, progress: float, message: Optional[str] = None):
+        """
+        Report progress (0-100), this also renews the lease
+        """
+        await _renew_lease(self.job_id, self.worker_id, {"progress": progress, "progress_message": message})
+
+
+async def _renew_lease(job_id: str, worker_id: str, extra: Optional[dict] = None):
+    now = datetime.now(timezone.utc)
+    result = await JobModel.get_pymongo_collection().update_one(
+        {"_id": job_id, "locked_by": worker_id, "status": JobStatus.RUNNING.value},
+        {"$set": {"lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS), "updated_at": now, **(extra or {})}}
+    )
+    if result.matched_count == 0:
+        raise LeaseLost(job_id)
+
+
+class JobWorker:
+    """
+    Claims due jobs one at a time with find_one_and_update and runs up to `concurrency` of them.
+    A lease that is not renewed expires, and the job is picked up again by any worker.
+    """
+
+    def __init__(self, concurrency: int = 1, worker_id: Optional[str] = None):
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stopping = asyncio.Event()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._running: set = set()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        print(f"Job worker {self.worker_id} started, handlers: {', '.join(sorted(_handlers))}")
+        while not self._stopping.is_set():
+            await self._slots.acquire()
+            job = None
+            if not self._stopping.is_set():
+                try:
+                    job = await self._claim()
+                except Exception as e:
+                    print(f"Job claim failed: {e}")
+            if job is None:
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        # Let running jobs finish, their leases keep them safe from other workers meanwhile
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        print(f"Job worker {self.worker_id} stopped")
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await JobModel.get_pymongo_collection().find_one_and_update(
+            {
+                "name": {"$in": list(_handlers)},
+                "$or": [
+                    {"status": JobStatus.QUEUED.value, "run_at": {"$lte": now}},
+                    {"status": JobStatus.RUNNING.value, "lease_until": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": JobStatus.RUNNING.value,
+                    "locked_by": self.worker_id,
+                    "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", DESCENDING), ("run_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                await _renew_lease(job_id, self.worker_id)
+            except LeaseLost:
+                # The final status write is guarded by locked_by, so it cannot overwrite the new owner
+                print(f"Job {job_id} lost its lease while running")
+                return
+            except Exception as e:
+                print(f"Job {job_id} lease renewal failed: {e}")
+
+    async def _execute(self, job: dict):
+        context = JobContext(job, self.worker_id)
+        heartbeat = asyncio.create_task(self._heartbeat(context.job_id))
+        try:
+            result = await _handlers[context.name](context)
+            await self._finish_succeeded(context.job_id, result)
+        except LeaseLost:
+            print(f"Job {context.job_id} lost its lease, leaving it to the other worker")
+        except Exception as e:
+            print(f"Job {context.name} {context.job_id} failed: {e}")
+            await self._finish_failed(job, "".join(traceback.format_exception_only(type(e), e)).strip())
+        finally:
+            heartbeat.cancel()
+            self._slots.release()
+
+    async def _finish_succeeded(self, job_id: str, result: Optional[Dict[str, Any]]):
+        now = datetime.now(timezone.utc)
+        await JobModel.get_pymongo_collection().update_one(
+            {"_id": job_id, "locked_by": self.worker_id},
+            {"$set": {
+                "status": JobStatus.SUCCEEDED.value,
+                "progress": 100.0,
+                "result": result,
+                "lease_until": None,
+                "finished_at": now,
+                "updated_at": now,
+            }}
+        )
+
+    async def _finish_failed(self, job: dict, error: str):
+        now = datetime.now(timezone.utc)
+        if job["attempts"] < job.get("max_attempts", 5):
+            update = {"status": JobStatus.QUEUED.value, "run_at": now + timedelta(seconds=retry_delay(job["attempts"]))}
+        else:
+            update = {"status": JobStatus.FAILED.value, "finished_at": now}
+        update.update({"last_error": error, "lease_until": None, "locked_by": None, "updated_at": now})
+        await JobModel.get_pymongo_collection().update_one(
+            {"_id": job["_id"], "locked_by": self.worker_id},
+            {"$set": update}
+        )
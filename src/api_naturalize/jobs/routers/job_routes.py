@@ -0,0 +1,110 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from api_naturalize.jobs.models.job_model import JobModel
+from api_naturalize.jobs.schemas.job_schemas import JobResponse
+from api_naturalize.utils.job_status import JobStatus
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct_many, json_response
+from api_naturalize.utils.user_info import get_current_admin
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], dependencies=[Depends(get_current_admin)])
+
+
+# GET queue depth and throughput
+@router.get("/stats", status_code=status.HTTP_200_OK)
+async def get_job_stats():
+    """
+    Jobs per name and status, due backlog and the last hour's throughput
+    """
+    now = datetime.now(timezone.utc)
+    hour_ago = now - timedelta(hours=1)
+
+    depth = await JobModel.aggregate([
+        {"$group": {"_id": {"name": "$name", "status": "$status"}, "count": {"$sum": 1}}},
+    ]).to_list()
+    by_name = {}
+    for row in depth:
+        by_name.setdefault(row["_id"]["name"], {})[row["_id"]["status"]] = row["count"]
+
+    due = await JobModel.find({"status": JobStatus.QUEUED.value, "run_at": {"$lte": now}}).count()
+    oldest = await JobModel.find({"status": JobStatus.QUEUED.value, "run_at": {"$lte": now}}).sort("run_at").first_or_none()
+
+    throughput = await JobModel.aggregate([
+        {"$match": {"finished_at": {"$gte": hour_ago}}},
+        {"$group": {
+            "_id": {"name": "$name", "status": "$status"},
+            "count": {"$sum": 1},
+            "avg_ms": {"$avg": {"$subtract": ["$finished_at", "$started_at"]}},
+        }},
+    ]).to_list()
+
+    oldest_wait = None
+    if oldest is not None:
+        run_at = oldest.run_at if oldest.run_at.tzinfo else oldest.run_at.replace(tzinfo=timezone.utc)
+        oldest_wait = round((now - run_at).total_seconds(), 1)
+
+    return {
+        "by_name": by_name,
+        "due": due,
+        "oldest_due_wait_seconds": oldest_wait,
+        "last_hour": [
+            {
+                "name": row["_id"]["name"],
+                "status": row["_id"]["status"],
+                "count": row["count"],
+                "avg_duration_ms": round(row["avg_ms"] or 0, 1),
+            }
+            for row in throughput
+        ],
+    }
+
+
+# GET all jobs
+@router.get("/", response_model=List[JobResponse], status_code=status.HTTP_200_OK)
+async def get_all_jobs(
+        status_filter: Optional[JobStatus] = None,
+        name: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None
+):
+    """
+    Newest jobs first, optionally filtered by status and name
+    """
+    query = {}
+    if status_filter is not None:
+        query["status"] = status_filter.value
+    if name:
+        query["name"] = name
+    jobs, next_cursor, _ = await paginate(JobModel.find(query), skip, limit, cursor)
+    return json_response(List[JobResponse], construct_many(JobResponse, jobs), headers=cursor_headers(next_cursor))
+
+
+# GET job by ID
+@router.get("/{id}", response_model=JobResponse, status_code=status.HTTP_200_OK)
+async def get_job(id: str):
+    job = await JobModel.get(id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+# POST retry a failed job
+@router.post("/{id}/retry", response_model=JobResponse, status_code=status.HTTP_200_OK)
+async def retry_job(id: str):
+    job = await JobModel.get(id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status != JobStatus.FAILED:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only failed jobs can be retried")
+
+    await job.set({
+        JobModel.status: JobStatus.QUEUED,
+        JobModel.attempts: 0,
+        JobModel.run_at: datetime.now(timezone.utc),
+        JobModel.finished_at: None,
+        JobModel.last_error: None,
+        JobModel.updated_at: datetime.now(timezone.utc),
+    })
+    return job
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+from api_naturalize.utils.job_status import JobStatus
+
+
+# Schema for job response
+class JobResponse(BaseModel):
+    id: str
+    name: str
+    payload: Dict[str, Any]
+    status: JobStatus
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    locked_by: Optional[str] = None
+    progress: float
+    progress_message: Optional[str] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
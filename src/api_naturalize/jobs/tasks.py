@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, timezone
+import os
+from api_naturalize.jobs.models.job_model import JobModel
+from api_naturalize.scheduler.scheduler import scheduler
+from api_naturalize.utils.job_status import JobStatus
+
+# Due jobs waiting longer than this mean no worker is running
+JOB_UNCLAIMED_WARN_SECONDS = float(os.getenv("JOB_UNCLAIMED_WARN_SECONDS", "300"))
+
+
+@scheduler.interval("jobs.unclaimed_check", seconds=300, jitter=30)
+async def warn_unclaimed_jobs():
+    """
+    Cascade deletes, variants and broadcasts only run in `python -m api_naturalize.jobs.worker`,
+    say so loudly when nothing picks them up
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=JOB_UNCLAIMED_WARN_SECONDS)
+    unclaimed = await JobModel.find({"status": JobStatus.QUEUED.value, "run_at": {"$lte": stale_before}}).count()
+    if unclaimed:
+        print(
+            f"WARNING: {unclaimed} jobs have been due for over {JOB_UNCLAIMED_WARN_SECONDS:g}s without a worker "
+            f"claiming them. Start one with `python -m api_naturalize.jobs.worker` (see docker-compose.yml)."
+        )
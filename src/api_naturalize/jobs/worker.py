@@ -0,0 +1,64 @@
+"""
+Run job workers next to the API:
+
+    python -m api_naturalize.jobs.worker --processes 2 --concurrency 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import signal
+from api_naturalize.database.database import initialize_database, close_database
+from api_naturalize.jobs.queue import JobWorker
+from api_naturalize.storage.variants import shutdown_variant_pool
+# Registers the job handlers
+import api_naturalize.jobs.handlers
+
+
+async def _serve(concurrency: int):
+    await initialize_database()
+    worker = JobWorker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        shutdown_variant_pool()
+        await close_database()
+
+
+def run_worker(concurrency: int):
+    asyncio.run(_serve(concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs each process runs at once")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(args.concurrency)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.concurrency,), name=f"job-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    # The parent forwards SIGTERM so every child can finish its running jobs
+    def forward(signum, _frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
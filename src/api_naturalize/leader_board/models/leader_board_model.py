@@ -1,5 +1,6 @@
 from beanie import Document, before_event, Replace, Save
 from datetime import datetime, timezone
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import Field
 import uuid
 
@@ -18,3 +19,10 @@ class LeaderBoardModel(Document):
 
     class Settings:
         name = "leader_boards"
+        # (sort key, _id) indexes back keyset pagination
+        indexes = [
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("total_score", DESCENDING), ("_id", DESCENDING)]),
+            # One row per user, answer flushes upsert on it
+            IndexModel([("user_id", ASCENDING)], unique=True),
+        ]
@@ -1,34 +1,33 @@
 from fastapi import APIRouter, HTTPException,status
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
 
 from api_naturalize.auth.models.user_model import UserModel
 from api_naturalize.auth.schemas.user_schemas import UserResponse
 from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
 from api_naturalize.leader_board.schemas.leader_board_schemas import LeaderboardCreate, LeaderboardUpdate, \
     LeaderboardResponse, Leaderboard_Response
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct, construct_many, json_response
 
 router = APIRouter(prefix="/leaderboards", tags=["leaderboards"])
 
 # GET all leader_boards
 @router.get("/", response_model=List[LeaderboardResponse],status_code=status.HTTP_200_OK)
-async def get_all_leader_boards(skip: int = 0, limit: int = 10):
+async def get_all_leader_boards(skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     
     """
-    Get all leader_boards with pagination
+    Get all leader_boards with pagination, pass the X-Next-Cursor header back as cursor for the next page
     """
-    leader_boards = await LeaderBoardModel.find_all().skip(skip).limit(limit).to_list()
-    return leader_boards
+    leader_boards, next_cursor, _ = await paginate(LeaderBoardModel.find_all(), skip, limit, cursor, descending=False)
+    return json_response(List[LeaderboardResponse], construct_many(LeaderboardResponse, leader_boards), headers=cursor_headers(next_cursor))
 
 @router.get("/filter", response_model=list[Leaderboard_Response])
-async def get_all_leader_boards(skip: int = 0, limit: int = 10):
-
-    leader_boards = (
-        await LeaderBoardModel
-        .find_all()
-        .sort(-LeaderBoardModel.total_score)  
-        .skip(skip)
-        .limit(limit)
-        .to_list()
+async def get_all_leader_boards(skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
+
+    leader_boards, next_cursor, offset = await paginate(
+        LeaderBoardModel.find_all(), skip, limit, cursor, sort_field="total_score"
     )
 
     # user collect
@@ -41,16 +40,17 @@ async def get_all_leader_boards(skip: int = 0, limit: int = 10):
     user_map = {str(u.id): u for u in users}
 
     res = []
-    for index, lb in enumerate(leader_boards, start=skip + 1):
-        data = lb.model_dump()
+    for index, lb in enumerate(leader_boards, start=offset + 1):
         user = user_map.get(lb.user_id)
 
-        data["user"] = UserResponse.model_validate(user) if user else None
-        data["rank"] = index   # 🥇 rank calculate
-
-        res.append(Leaderboard_Response(**data))
+        res.append(construct(
+            Leaderboard_Response,
+            lb,
+            user=construct(UserResponse, user) if user else None,
+            rank=index   # 🥇 rank calculate
+        ))
 
-    return res
+    return json_response(List[Leaderboard_Response], res, headers=cursor_headers(next_cursor))
 
 # GET leader_board by ID
 @router.get("/{id}", response_model=LeaderboardResponse,status_code=status.HTTP_200_OK)
@@ -73,7 +73,10 @@ async def create_leader_board(leader_board_data: LeaderboardCreate):
     """
     leader_board_dict = leader_board_data.model_dump()
     leader_board = LeaderBoardModel(**leader_board_dict)
-    await leader_board.create()
+    try:
+        await leader_board.create()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This user already has a leader_board entry")
     return leader_board
 
 # PATCH update leader_board
@@ -88,6 +91,7 @@ async def update_leader_board(id: str, leader_board_data: LeaderboardUpdate):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="LeaderBoard not found")
 
     update_data = leader_board_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await leader_board.update({"$set": update_data})
     return await LeaderBoardModel.get(id)
 
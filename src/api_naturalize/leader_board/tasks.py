@@ -0,0 +1,17 @@
+from api_naturalize.jobs.models.job_model import JobModel
+from api_naturalize.jobs.queue import enqueue_job
+from api_naturalize.scheduler.scheduler import scheduler
+from api_naturalize.utils.job_status import JobStatus
+
+
+@scheduler.cron("leaderboard.reconcile", "30 3 * * *", jitter=600)
+async def reconcile_leaderboard():
+    """
+    Nightly rebuild of the leaderboard from the answers, in case score events were lost
+    """
+    pending = await JobModel.find({
+        "name": "leaderboard.rebuild",
+        "status": {"$in": [JobStatus.QUEUED.value, JobStatus.RUNNING.value]},
+    }).count()
+    if not pending:
+        await enqueue_job("leaderboard.rebuild", priority=-1)
@@ -1,6 +1,8 @@
 from beanie import Document, before_event, Replace, Save
 from datetime import datetime, timezone
+from pymongo import DESCENDING, IndexModel
 from pydantic import Field
+from typing import Dict
 import uuid
 
 
@@ -9,6 +11,8 @@ class LessonModel(Document):
     name: str = ""
     description: str = ""
     image_url: str = ""
+    # Thumbnail and WebP URLs by name ("w160", "w480", "webp"), filled in by the image.variants job
+    image_variants: Dict[str, str] = {}
     course_id: str = ""
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -20,3 +24,7 @@ class LessonModel(Document):
 
     class Settings:
         name = "lessons"
+        # (sort key, _id) indexes back keyset pagination
+        indexes = [
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+        ]
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException,status
-from typing import List
+from fastapi import APIRouter, HTTPException,status,Request
+from typing import List, Optional
+from datetime import datetime, timezone
 from fastapi.params import Depends
 from api_naturalize.answer.models.answer_model import AnswerModel
 from api_naturalize.auth.models.user_model import UserModel
@@ -7,9 +8,17 @@ from api_naturalize.lesson.models.lesson_model import LessonModel
 from api_naturalize.lesson.schemas.lesson_schemas import LessonCreate, LessonUpdate, LessonResponse, BulkLessonResponse, \
     BulkLessonCreate
 from api_naturalize.course.models.course_model import CourseModel
+from api_naturalize.jobs.queue import enqueue_job
 from api_naturalize.progress_lesson.models.progress_lesson_model import ProgressLessonModel
 from api_naturalize.question.models.question_model import QuestionModel
-from api_naturalize.utils.user_info import get_user_info
+from api_naturalize.question.schemas.question_schemas import QuestionResponse
+from api_naturalize.storage.refs import release_urls
+from api_naturalize.storage.variants import request_variants
+from api_naturalize.utils.conditional import conditional
+from api_naturalize.utils.fieldsets import parse_fields, parse_expand, projection_model, count_by, group_by
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct, construct_many, json_response
+from api_naturalize.utils.user_info import get_current_user
 
 router = APIRouter(prefix="/lessons", tags=["lessons"])
 
@@ -18,44 +27,77 @@ router = APIRouter(prefix="/lessons", tags=["lessons"])
 # GET all lessons without user dependency
 @router.get("/", response_model=List[LessonResponse], status_code=status.HTTP_200_OK)
 async def get_all_lessons_public(
+        request: Request,
         skip: int = 0,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        expand: Optional[str] = None
 ):
     """
     Get all lessons with pagination and questions (without user progress)
+    - fields=id,name,total_questions returns only those lesson fields
+    - expand=none returns total_questions without embedding the questions
     """
-    lessons = await LessonModel.find_all().sort("-created_at").skip(skip).limit(limit).to_list()
+    selected = parse_fields(fields, LessonResponse)
+    expanded = parse_expand(expand, {"questions"})
+    embed_questions = "questions" in expanded and (selected is None or "questions" in selected)
+    count_questions = selected is None or "total_questions" in selected
+
+    query = LessonModel.find_all()
+    if selected is not None:
+        query = query.project(projection_model(LessonModel, selected | {"created_at", "updated_at"}))
+    lessons, next_cursor, _ = await paginate(query, skip, limit, cursor)
+
+    # Nested data for the whole page in one query instead of one per lesson
+    lesson_ids = [lesson.id for lesson in lessons]
+    questions_by_lesson = {}
+    question_counts = {}
+    if embed_questions:
+        questions_by_lesson = await group_by(QuestionModel, "lesson_id", lesson_ids)
+        question_counts = {lesson_id: len(questions) for lesson_id, questions in questions_by_lesson.items()}
+    elif count_questions:
+        question_counts = await count_by(QuestionModel, "lesson_id", lesson_ids)
+
+    nested_questions = [question for questions in questions_by_lesson.values() for question in questions]
+    not_modified, headers = conditional(
+        request, [*lessons, *nested_questions], question_counts, next_cursor, fields, expand
+    )
+    if not_modified:
+        return not_modified
 
     lesson_responses = []
     for lesson in lessons:
-        # Fetch questions for this lesson
-        questions = await QuestionModel.find(QuestionModel.lesson_id == lesson.id).to_list()
-        total_questions = len(questions)
-
-        # Convert lesson to dict and add nested data
-        lesson_dict = lesson.dict()
-        lesson_dict["questions"] = questions
-        lesson_dict["my_progress"] = 0.0  # Default 0 for public access
-        lesson_dict["total_right_answers"] = 0  # Default 0 for public access
-        lesson_dict["total_questions"] = total_questions
-
-        lesson_responses.append(LessonResponse(**lesson_dict))
-
-    return lesson_responses
+        # Build the response from trusted documents, nested questions included
+        lesson_responses.append(construct(
+            LessonResponse,
+            lesson,
+            questions=construct_many(QuestionResponse, questions_by_lesson.get(lesson.id, [])),
+            my_progress=0.0,  # Default 0 for public access
+            total_right_answers=0,  # Default 0 for public access
+            total_questions=question_counts.get(lesson.id, 0)
+        ))
+
+    if selected is None and not embed_questions:
+        selected = set(LessonResponse.model_fields) - {"questions"}
+    include = {"__all__": selected} if selected is not None else None
+    return json_response(
+        List[LessonResponse],
+        lesson_responses,
+        headers=cursor_headers(next_cursor, headers),
+        include=include
+    )
 
 
 
 
 # GET lesson by ID - simplified
 @router.get("/{id}", response_model=LessonResponse, status_code=status.HTTP_200_OK)
-async def get_lesson(id: str, user: dict = Depends(get_user_info)):
+async def get_lesson(id: str, request: Request, db_user: UserModel = Depends(get_current_user)):
     """
-    Get lesson by ID with simplified progress
+    Get lesson by ID with simplified progress, answers 304 when If-None-Match still matches
     """
-    user_id = user["user_id"]
-    db_user = await UserModel.get(user_id)
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = db_user.id
 
     lesson = await LessonModel.get(id)
     if not lesson:
@@ -86,14 +128,24 @@ async def get_lesson(id: str, user: dict = Depends(get_user_info)):
 
         total_right_answers = sum(1 for answer in user_answers if answer.score == 1)
 
-    # Convert lesson to dict and add nested data
-    lesson_dict = lesson.model_dump()
-    lesson_dict["questions"] = questions
-    lesson_dict["my_progress"] = my_progress  # Only progress percentage
-    lesson_dict["total_right_answers"] = total_right_answers
-    lesson_dict["total_questions"] = total_questions
+    # Progress is per user, so the validator includes it and the response stays private
+    not_modified, headers = conditional(
+        request, [lesson, *questions], user_id, my_progress, total_right_answers, private=True
+    )
+    if not_modified:
+        return not_modified
+
+    # Build the response from trusted documents, nested questions included
+    lesson_response = construct(
+        LessonResponse,
+        lesson,
+        questions=construct_many(QuestionResponse, questions),
+        my_progress=my_progress,  # Only progress percentage
+        total_right_answers=total_right_answers,
+        total_questions=total_questions
+    )
 
-    return LessonResponse(**lesson_dict)
+    return json_response(LessonResponse, lesson_response, headers=headers)
 
 
 
@@ -118,6 +170,7 @@ async def create_lesson(lesson_data: LessonCreate):
     lesson_dict = lesson_data.model_dump()
     lesson = LessonModel(**lesson_dict)
     await lesson.create()
+    await request_variants("lesson", lesson.id, lesson.image_url)
     return lesson
 
 # PATCH update lesson
@@ -132,7 +185,17 @@ async def update_lesson(id: str, lesson_data: LessonUpdate):
         raise HTTPException(status_code=404, detail="Lesson not found")
 
     update_data = lesson_data.model_dump(exclude_unset=True)
+    if "image_url" in update_data:
+        # The old variants belong to the old image
+        update_data["image_variants"] = {}
+    update_data["updated_at"] = datetime.now(timezone.utc)
+    previous_image = lesson.image_url
     await lesson.update({"$set": update_data})
+    if "image_url" in update_data:
+        # The replaced image loses its reference, as in update_profile_image
+        if update_data["image_url"] != previous_image:
+            await release_urls([previous_image])
+        await request_variants("lesson", id, update_data["image_url"])
     return await LessonModel.get(id)
 
 # DELETE lesson
@@ -140,14 +203,16 @@ async def update_lesson(id: str, lesson_data: LessonUpdate):
 async def delete_lesson(id: str):
     
     """
-    Delete lesson by ID
+    Delete lesson by ID, its questions, answers and progress are removed by a background job
     """
     lesson = await LessonModel.get(id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
 
     await lesson.delete()
-    return {"message": "Lesson deleted successfully"}
+    await release_urls([lesson.image_url])
+    job = await enqueue_job("lesson.cascade_delete", {"lesson_id": id}, priority=1)
+    return {"message": "Lesson deleted successfully", "job_id": job.id}
 
 # POST create bulk lessons
 @router.post("/bulk", response_model=BulkLessonResponse, status_code=status.HTTP_201_CREATED)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 from typing import List
 
@@ -29,6 +29,7 @@ class LessonResponseAdmin(BaseModel):
     name: str
     description: str
     image_url: str
+    image_variants: Dict[str, str] = {}
     course_id: str
     created_at: datetime
     updated_at: datetime
@@ -44,6 +45,7 @@ class LessonResponse(BaseModel):
     name: str
     description: str
     image_url: str
+    image_variants: Dict[str, str] = {}
     course_id: str
     questions: List[QuestionResponse] = []
     my_progress: float = 0.0  # Only progress percentage
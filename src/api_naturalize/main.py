@@ -13,18 +13,49 @@ from api_naturalize.payments.routers.payments_routes import router as payment_ro
 from api_naturalize.progress_lesson.routers.progress_lesson_routes import router as progress_lesson_router
 from api_naturalize.leader_board.routers.leader_board_routes import router as leaderboard_router
 from api_naturalize.dashboard.routers.dashboard import router as dashboard_router
-from fastapi.staticfiles import StaticFiles
 from api_naturalize.time_storage.routers.time_storage_routes import router as time_storage_router
 from api_naturalize.notification.routers.notification_routes import router as notification_router
 from api_naturalize.subscription_plan.routers.subscription_plan_routes import router as subscription_router
+from api_naturalize.jobs.routers.job_routes import router as job_router
+from api_naturalize.utils.pagination import NEXT_CURSOR_HEADER
+from api_naturalize.utils.compression import CompressionMiddleware
+from api_naturalize.utils.static_files import ImmutableStaticFiles
+from api_naturalize.utils.uploads import UPLOAD_DIR
+from api_naturalize.utils.get_hashed_password import shutdown_hash_pool
+from api_naturalize.email_outbox.sender import email_sender
+from api_naturalize.utils.http_client import open_http_client, close_http_client
+from api_naturalize.utils.event_bus import event_bus
+from api_naturalize.scheduler.scheduler import scheduler
+from api_naturalize.time_storage.accumulator import time_accumulator
+from api_naturalize.notification.hub import notification_hub
+# Registers the event subscribers
+import api_naturalize.answer.subscribers
+import api_naturalize.notification.subscribers
+# Registers the scheduled tasks
+import api_naturalize.jobs.tasks
+import api_naturalize.leader_board.tasks
+import api_naturalize.storage.tasks
 
 
 
 @asynccontextmanager
 async def lifespan_context(_: FastAPI):
     await initialize_database()
+    await open_http_client()
+    email_sender.start()
+    event_bus.start()
+    scheduler.start()
+    time_accumulator.start()
+    notification_hub.start()
     yield
+    await notification_hub.stop()
+    await scheduler.stop()
+    await time_accumulator.stop()
+    await event_bus.drain()
+    await email_sender.stop()
+    await close_http_client()
     await close_database()
+    shutdown_hash_pool()
 
 app = FastAPI(
     title="Api_naturalize",
@@ -34,7 +65,8 @@ app = FastAPI(
 )
 
 
-app.mount("/static", StaticFiles(directory="uploaded_images"), name="static")
+# Uploads are content-addressed, see utils/static_files.py for the caching headers
+app.mount("/static", ImmutableStaticFiles(directory=UPLOAD_DIR), name="static")
 
 
 # CORS
@@ -44,12 +76,16 @@ origins = [
     "https://mamadou.mtscorporate.com",
 ]
 
+# gzip/brotli for large JSON bodies, see utils/compression.py for the env settings
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
 
 
@@ -72,4 +108,5 @@ app.include_router(leaderboard_router,prefix="/api/v1")
 app.include_router(time_storage_router,prefix="/api/v1")
 app.include_router(notification_router,prefix="/api/v1")
 app.include_router(payment_router,prefix="/api/v1")
-app.include_router(subscription_router,prefix="/api/v1")
\ No newline at end of file
+app.include_router(subscription_router,prefix="/api/v1")
+app.include_router(job_router,prefix="/api/v1")
\ No newline at end of file
@@ -252,6 +252,7 @@ def create_router_file(main_folder, model_name, fields):
     # Use chr(10) for newlines instead of \n in f-strings
     router_content = f'''from fastapi import APIRouter, HTTPException,status
 from typing import List
+from datetime import datetime, timezone
 from models.{snake_name}_model import {model_name}Model
 from schemas.{snake_name}_schemas import {camel_name}Create, {camel_name}Update, {camel_name}Response
 
@@ -299,6 +300,7 @@ async def update_{snake_name}({snake_name}_id: str, {snake_name}_data: {camel_na
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="{model_name} not found")
 
     update_data = {snake_name}_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await {snake_name}.update({{"$set": update_data}})
     return await {model_name}Model.get({snake_name}_id)
 
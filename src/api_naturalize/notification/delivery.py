@@ -0,0 +1,36 @@
+from collections import Counter
+from typing import List
+from pymongo.errors import BulkWriteError
+from api_naturalize.notification.hub import notification_hub
+from api_naturalize.notification.models.notification_model import notificationModel
+from api_naturalize.notification.unread import add_unread
+
+DUPLICATE_KEY = 11000
+
+
+async def insert_unique(notifications: List[notificationModel]) -> List[notificationModel]:
+    """
+    insert_many that skips notifications whose fixed id already exists, returns the ones stored
+    """
+    if not notifications:
+        return []
+    failed = set()
+    try:
+        # Unordered, so an existing notification does not stop the rest
+        await notificationModel.insert_many(notifications, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error["code"] != DUPLICATE_KEY for error in errors):
+            raise
+        failed = {error["index"] for error in errors}
+    return [notification for index, notification in enumerate(notifications) if index not in failed]
+
+
+async def deliver(notifications: List[notificationModel]) -> List[notificationModel]:
+    """
+    Store the notifications, raise the unread badges and push them to open streams
+    """
+    inserted = await insert_unique(notifications)
+    await add_unread(Counter(notification.user_id for notification in inserted))
+    notification_hub.publish(inserted)
+    return inserted
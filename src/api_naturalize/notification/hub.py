@@ -0,0 +1,197 @@
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+import asyncio
+import inspect
+import json
+import os
+from api_naturalize.notification.models.notification_model import notificationModel
+from api_naturalize.notification.schemas.notification_schemas import NotificationResponse
+
+SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "2000"))
+SSE_MAX_PER_USER = int(os.getenv("SSE_MAX_PER_USER", "5"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Streams end after this long and the client reconnects, which also keeps shutdowns short
+SSE_MAX_STREAM_SECONDS = float(os.getenv("SSE_MAX_STREAM_SECONDS", "300"))
+# Events a slow client may fall behind before its stream is closed
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+# Relay inserts from every worker through a change stream, needs a replica set
+NOTIFICATION_CHANGE_STREAM = os.getenv("NOTIFICATION_CHANGE_STREAM", "false").lower() == "true"
+
+# Queued in place of an event when the client is too slow, and to end streams on shutdown
+_RESYNC = "resync"
+_CLOSE = "close"
+
+
+def _format_event(notification: dict) -> str:
+    data = json.dumps(jsonable_encoder(NotificationResponse.model_validate(notification)))
+    return f"id: {notification['id']}\nevent: notification\ndata: {data}\n\n"
+
+
+class _Connection:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+
+    def offer(self, item) -> bool:
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def force(self, item):
+        # Drop whatever is waiting, the client is told to refetch its inbox instead
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+
+
+class NotificationHub:
+    """
+    Fans new notifications out to the SSE streams open on this worker.
+    Without the change stream relay a notification only reaches clients connected to the worker
+    that created it; with NOTIFICATION_CHANGE_STREAM=true every worker relays every insert.
+    """
+
+    def __init__(self):
+        self._connections: Dict[str, Set[_Connection]] = defaultdict(set)
+        self._count = 0
+        self._relay: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.resyncs = 0
+        self.rejected = 0
+
+    def _check_capacity(self, user_id: str):
+        if self._count >= SSE_MAX_CONNECTIONS or len(self._connections.get(user_id, ())) >= SSE_MAX_PER_USER:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many open notification streams",
+                headers={"Retry-After": "30"},
+            )
+
+    def _register(self, user_id: str) -> _Connection:
+        connection = _Connection(user_id)
+        self._connections[user_id].add(connection)
+        self._count += 1
+        return connection
+
+    def _unregister(self, connection: _Connection):
+        connections = self._connections.get(connection.user_id)
+        if connections and connection in connections:
+            connections.discard(connection)
+            self._count -= 1
+            if not connections:
+                del self._connections[connection.user_id]
+
+    def publish(self, notifications: Iterable[notificationModel]):
+        """
+        Called after notifications are stored, a no-op when the change stream relay delivers them
+        """
+        if NOTIFICATION_CHANGE_STREAM:
+            return
+        for notification in notifications:
+            self._deliver(notification.model_dump())
+
+    def _deliver(self, notification: dict):
+        for connection in list(self._connections.get(notification["user_id"], ())):
+            if connection.offer(notification):
+                self.delivered += 1
+            else:
+                self.resyncs += 1
+                connection.force(_RESYNC)
+
+    def stream(self, user_id: str) -> AsyncIterator[str]:
+        """
+        Check the caps before the response starts, so a full worker answers with a plain 503
+        """
+        self._check_capacity(user_id)
+        return self._stream(user_id)
+
+    async def _stream(self, user_id: str) -> AsyncIterator[str]:
+        # Registered inside the generator, so the finally below always unregisters it
+        connection = self._register(user_id)
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + SSE_MAX_STREAM_SECONDS
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                remaining = closes_at - loop.time()
+                if remaining <= 0:
+                    return
+                try:
+                    item = await asyncio.wait_for(connection.queue.get(), timeout=min(SSE_HEARTBEAT_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    # Comment line, keeps proxies from closing an idle stream
+                    yield ": ping\n\n"
+                    continue
+                if item == _CLOSE:
+                    return
+                if item == _RESYNC:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                yield _format_event(item)
+        finally:
+            self._unregister(connection)
+
+    def start(self):
+        if NOTIFICATION_CHANGE_STREAM and self._relay is None:
+            self._relay = asyncio.create_task(self._run_relay())
+
+    async def stop(self):
+        if self._relay is not None:
+            self._relay.cancel()
+            await asyncio.gather(self._relay, return_exceptions=True)
+            self._relay = None
+        for connections in list(self._connections.values()):
+            for connection in list(connections):
+                connection.force(_CLOSE)
+
+    async def _run_relay(self):
+        resume_token = None
+        delay = 1
+        while True:
+            try:
+                stream = notificationModel.get_pymongo_collection().watch(
+                    [{"$match": {"$or": [
+                        {"operationType": {"$in": ["insert", "replace"]}},
+                        # Coalesced digests are updated in place, marking as read is not relayed
+                        {"operationType": "update", "updateDescription.updatedFields.occurrences": {"$exists": True}},
+                    ]}}],
+                    resume_after=resume_token,
+                    full_document="updateLookup"
+                )
+                if inspect.isawaitable(stream):
+                    stream = await stream
+                async with stream:
+                    async for change in stream:
+                        resume_token = change["_id"]
+                        delay = 1
+                        document = change.get("fullDocument")
+                        if document is None:
+                            # Deleted before the lookup, nothing left to show
+                            continue
+                        document["id"] = document.pop("_id")
+                        self._deliver(document)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Notification change stream failed, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self._count,
+            "users": len(self._connections),
+            "max_connections": SSE_MAX_CONNECTIONS,
+            "delivered": self.delivered,
+            "resyncs": self.resyncs,
+            "rejected": self.rejected,
+            "change_stream": NOTIFICATION_CHANGE_STREAM,
+        }
+
+
+notification_hub = NotificationHub()
@@ -0,0 +1,16 @@
+from beanie import Document
+from datetime import datetime, timezone
+from pydantic import Field
+from typing import Optional
+
+
+class NotificationCounterModel(Document):
+    # Keyed by user id, holds the badge count so it never needs the inbox
+    id: str = Field(alias="_id")
+    unread: int = 0
+    # Last count from the inbox itself, rows removed by the TTL index are only caught by a recount
+    recounted_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "notification_counters"
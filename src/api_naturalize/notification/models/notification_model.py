@@ -1,7 +1,10 @@
 from beanie import Document, before_event, Replace, Save
-from datetime import datetime, timezone
-from pydantic import Field
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pydantic import Field, model_validator
+from typing import Optional
 import uuid
+from api_naturalize.utils.notification_category import NotificationCategory, NOTIFICATION_RETENTION_DAYS
 
 
 class notificationModel(Document):
@@ -9,9 +12,23 @@ class notificationModel(Document):
     title: str = ""
     user_id:str=""
     description: str = ""
+    category: NotificationCategory = NotificationCategory.GENERAL
+    is_read: bool = False
+    read_at: Optional[datetime] = None
+    # Digests stand for `occurrences` coalesced notifications of their category
+    digest: bool = False
+    occurrences: int = 1
+    # Removed by the TTL index at this time, set from the category's retention
+    expires_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    @model_validator(mode="after")
+    def set_expiry(self):
+        if self.expires_at is None:
+            self.expires_at = self.created_at + timedelta(days=NOTIFICATION_RETENTION_DAYS[self.category])
+        return self
+
     # Auto-update "updated_at" on update
     @before_event([Save, Replace])
     def update_timestamp(self):
@@ -19,3 +36,15 @@ class notificationModel(Document):
 
     class Settings:
         name = "notifications"
+        indexes = [
+            # A user's inbox, newest first, with (created_at, _id) as the keyset cursor
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+            # At most one open digest per user and category, concurrent upserts meet on it
+            IndexModel(
+                [("user_id", ASCENDING), ("category", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"digest": True, "is_read": False},
+                name="open_digest"
+            ),
+        ]
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import uuid
+from api_naturalize.notification.models.notification_model import notificationModel
+from api_naturalize.utils.notification_category import NOTIFICATION_RETENTION_DAYS
+
+
+async def coalesce(notification: notificationModel, occurrences: int = 1) -> Tuple[notificationModel, bool]:
+    """
+    Fold the notification into the user's open digest of its category, or open one.
+    Returns the digest and whether it was newly created.
+    """
+    now = datetime.now(timezone.utc)
+    collection = notificationModel.get_pymongo_collection()
+    query = {"user_id": notification.user_id, "category": notification.category.value, "digest": True, "is_read": False}
+    update = {
+        "$inc": {"occurrences": occurrences},
+        # The latest occurrence moves the digest to the top of the inbox and restarts its retention
+        "$set": {
+            "title": notification.title,
+            "description": notification.description,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + timedelta(days=NOTIFICATION_RETENTION_DAYS[notification.category]),
+        },
+        "$setOnInsert": {"_id": str(uuid.uuid4()), "read_at": None},
+    }
+    try:
+        document = await collection.find_one_and_update(query, update, upsert=True, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        # A concurrent upsert opened the digest first and the open_digest index rejected ours, fold into that one
+        document = await collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+        if document is None:
+            # It was read in the meantime, so no digest is open any more
+            document = await collection.find_one_and_update(
+                query, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+    return notificationModel.model_validate(document), document["occurrences"] == occurrences
+
+
+async def coalesce_many(notifications: List[notificationModel]) -> List[Tuple[notificationModel, bool]]:
+    """
+    Coalesce a batch, repeats within the batch cost a single update
+    """
+    grouped = {}
+    for notification in notifications:
+        key = (notification.user_id, notification.category)
+        _, occurrences = grouped.get(key, (None, 0))
+        # The latest notification's text stands for the whole group
+        grouped[key] = (notification, occurrences + 1)
+    return [await coalesce(notification, occurrences) for notification, occurrences in grouped.values()]
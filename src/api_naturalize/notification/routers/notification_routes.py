@@ -1,11 +1,22 @@
 from fastapi import APIRouter, HTTPException,status,Depends
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from pymongo.errors import DuplicateKeyError
+import uuid
 
 from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.jobs.queue import enqueue_job
 from api_naturalize.lesson.models.lesson_model import LessonModel
+from api_naturalize.notification.hub import notification_hub
 from api_naturalize.notification.models.notification_model import notificationModel
-from api_naturalize.notification.schemas.notification_schemas import NotificationCreate, NotificationUpdate, NotificationResponse
-from api_naturalize.utils.user_info import get_user_info
+from api_naturalize.notification.subscribers import lesson_completed_notification_id
+from api_naturalize.notification.schemas.notification_schemas import NotificationCreate, NotificationUpdate, NotificationResponse, \
+    NotificationMarkRead, BroadcastCreate
+from api_naturalize.notification.unread import UNREAD, add_unread, get_unread, mark_read
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct_many, json_response
+from api_naturalize.utils.notification_category import NotificationCategory
+from api_naturalize.utils.user_info import get_current_user, get_current_admin
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -20,18 +31,53 @@ router = APIRouter(prefix="/notifications", tags=["notifications"])
 #     return notifications
 
 @router.get("/all/me", response_model=List[NotificationResponse])
-async def get_notification_all_for_me(user_data: dict = Depends(get_user_info)):
+async def get_notification_all_for_me(
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        unread_only: bool = False,
+        db_user: UserModel = Depends(get_current_user)
+):
+    """
+    The current user's notifications, newest first, pass the X-Next-Cursor header back as cursor for the next page
+    """
+    query = {"user_id": db_user.id, **(UNREAD if unread_only else {})}
+    notifications, next_cursor, _ = await paginate(notificationModel.find(query), skip, limit, cursor)
+    return json_response(
+        List[NotificationResponse],
+        construct_many(NotificationResponse, notifications),
+        headers=cursor_headers(next_cursor)
+    )
+
+
+@router.get("/stream/me")
+async def stream_notifications_for_me(db_user: UserModel = Depends(get_current_user)):
+    """
+    Server-sent events with each new notification as it is created.
+    A `resync` event means the client fell behind, refetch /all/me and reconnect.
+    """
+    return StreamingResponse(
+        notification_hub.stream(db_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    u_id = user_data.get("user_id")
-    db_user = await UserModel.get(u_id)
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found in DB")
 
-    notifications = await notificationModel.find(
-        notificationModel.user_id == db_user.id
-    ).to_list()
+@router.get("/unread/count/me", status_code=status.HTTP_200_OK)
+async def get_unread_count_for_me(db_user: UserModel = Depends(get_current_user)):
+    """
+    Badge count from the per-user counter, the inbox itself is not read
+    """
+    return {"unread": await get_unread(db_user.id)}
 
-    return notifications
+
+@router.post("/read/me", status_code=status.HTTP_200_OK)
+async def mark_notifications_read(data: NotificationMarkRead, db_user: UserModel = Depends(get_current_user)):
+    """
+    Mark the given notifications as read, or all of them when ids is left out
+    """
+    marked = await mark_read(db_user.id, data.ids)
+    return {"marked": marked, "unread": await get_unread(db_user.id)}
 
 # # GET notification by ID
 # @router.get("/{notification_id}", response_model=NotificationResponse,status_code=status.HTTP_200_OK)
@@ -56,28 +102,51 @@ async def create_notification(notification_data: NotificationCreate):
     notification_dict = notification_data.model_dump()
     notification = notificationModel(**notification_dict)
     await notification.create()
+    await add_unread({notification.user_id: 1})
+    notification_hub.publish([notification])
     return notification
 
 
 @router.post("/lesson/complete/notification", response_model=NotificationResponse,status_code=status.HTTP_201_CREATED)
-async def create_lesson_notification(lesson_id:str,user:dict=Depends(get_user_info)):
-    db_user=await UserModel.get(user["user_id"])
-    if not db_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User does not exist")
-
+async def create_lesson_notification(lesson_id:str,db_user:UserModel=Depends(get_current_user)):
     db_lesson=await LessonModel.get(lesson_id)
     if not db_lesson:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lesson does not exist")
 
 
+    # The LessonCompleted event writes the same notification id, whichever comes first wins
+    notification_id = lesson_completed_notification_id(db_user.id, lesson_id)
+    existing = await notificationModel.get(notification_id)
+    if existing:
+        return existing
+
     new_notification=notificationModel(
+        id=notification_id,
         user_id=db_user.id,
+        category=NotificationCategory.LESSON,
         title="Great job!",
         description=f"You’ve successfully completed the lesson {db_lesson.name}.Keep going and start the next lesson now"
     )
-    await new_notification.insert()
+    try:
+        await new_notification.insert()
+    except DuplicateKeyError:
+        return await notificationModel.get(notification_id)
+    await add_unread({db_user.id: 1})
+    notification_hub.publish([new_notification])
     return new_notification
 
+@router.post("/broadcast", status_code=status.HTTP_202_ACCEPTED)
+async def broadcast_notification(data: BroadcastCreate, _: UserModel = Depends(get_current_admin)):
+    """
+    Send a notification to every user from a background job, follow it at /jobs/{job_id}
+    """
+    broadcast_id = str(uuid.uuid4())
+    job = await enqueue_job(
+        "notification.broadcast",
+        {"broadcast_id": broadcast_id, "title": data.title, "description": data.description}
+    )
+    return {"message": "Broadcast queued", "broadcast_id": broadcast_id, "job_id": job.id}
+
 # DELETE notification
 @router.delete("/{notification_id}",status_code=status.HTTP_200_OK)
 async def delete_notification(notification_id: str):
@@ -90,4 +159,6 @@ async def delete_notification(notification_id: str):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="notification not found")
 
     await notification.delete()
+    if not notification.is_read:
+        await add_unread({notification.user_id: -1})
     return {"message": "notification deleted successfully"}
\ No newline at end of file
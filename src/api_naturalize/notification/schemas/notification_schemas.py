@@ -1,12 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+from api_naturalize.utils.notification_category import NotificationCategory
 
 # Schema for creating new notification
 class NotificationCreate(BaseModel):
     user_id:str
     title: str
     description: str
+    category: NotificationCategory = NotificationCategory.GENERAL
 
 # Schema for updating notification
 class NotificationUpdate(BaseModel):
@@ -20,8 +22,23 @@ class NotificationResponse(BaseModel):
     user_id:str
     title: str
     description: str
+    category: NotificationCategory = NotificationCategory.GENERAL
+    is_read: bool = False
+    read_at: Optional[datetime] = None
+    occurrences: int = 1
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+# Schema for marking notifications as read, all of them when ids is left out
+class NotificationMarkRead(BaseModel):
+    ids: Optional[List[str]] = None
+
+
+# Schema for an admin announcement sent to every user
+class BroadcastCreate(BaseModel):
+    title: str
+    description: str
@@ -0,0 +1,86 @@
+from collections import Counter
+from typing import List
+import uuid
+from api_naturalize.lesson.models.lesson_model import LessonModel
+from api_naturalize.notification.delivery import insert_unique
+from api_naturalize.notification.hub import notification_hub
+from api_naturalize.notification.models.notification_model import notificationModel
+from api_naturalize.notification.retention import coalesce_many
+from api_naturalize.notification.unread import add_unread
+from api_naturalize.utils.event_bus import event_bus
+from api_naturalize.utils.events import UserLoggedIn, UserVerified, PasswordChanged, LessonCompleted
+from api_naturalize.utils.notification_category import NotificationCategory, COALESCED_CATEGORIES
+
+
+def lesson_completed_notification_id(user_id: str, lesson_id: str) -> str:
+    """
+    Fixed id, so the event and the /lesson/complete/notification route never both insert one
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"lesson-completed:{user_id}:{lesson_id}"))
+
+
+def _full_name(event) -> str:
+    return f"{event.first_name}{event.last_name}"
+
+
+@event_bus.subscriber(UserLoggedIn, UserVerified, PasswordChanged, LessonCompleted, batch_size=200, max_wait=0.05)
+async def insert_notifications(events: List):
+    """
+    Turn a batch of events into notifications with a single insert_many,
+    repeated logins are folded into the user's open login digest instead
+    """
+    lesson_ids = list({event.lesson_id for event in events if isinstance(event, LessonCompleted)})
+    lesson_names = {}
+    if lesson_ids:
+        lessons = await LessonModel.find({"_id": {"$in": lesson_ids}}).to_list()
+        lesson_names = {lesson.id: lesson.name for lesson in lessons}
+
+    notifications = []
+    for event in events:
+        if isinstance(event, UserLoggedIn) and event.auth_provider == "google":
+            notifications.append(notificationModel(
+                user_id=event.user_id,
+                category=NotificationCategory.LOGIN,
+                title="Account created securely",
+                description="You signed up using your Google account.No password needed—your account is protected."
+            ))
+        elif isinstance(event, UserLoggedIn):
+            notifications.append(notificationModel(
+                user_id=event.user_id,
+                category=NotificationCategory.LOGIN,
+                title=f"Welcome back! {_full_name(event)}",
+                description="You’re successfully logged in. Let’s continue where you left off"
+            ))
+        elif isinstance(event, UserVerified):
+            notifications.append(notificationModel(
+                user_id=event.user_id,
+                category=NotificationCategory.ACCOUNT,
+                title=f"Welcome {_full_name(event)}",
+                description="Your account has been created successfully.Let’s get started with your first theme"
+            ))
+        elif isinstance(event, PasswordChanged):
+            notifications.append(notificationModel(
+                user_id=event.user_id,
+                category=NotificationCategory.SECURITY,
+                title="Password updated successfully",
+                description="Your account password was changed successfully.If this wasn’t you, please reset your password immediately."
+            ))
+        elif isinstance(event, LessonCompleted) and event.lesson_id in lesson_names:
+            notifications.append(notificationModel(
+                id=lesson_completed_notification_id(event.user_id, event.lesson_id),
+                user_id=event.user_id,
+                category=NotificationCategory.LESSON,
+                title="Great job!",
+                description=f"You’ve successfully completed the lesson {lesson_names[event.lesson_id]}.Keep going and start the next lesson now"
+            ))
+
+    coalesced = [notification for notification in notifications if notification.category in COALESCED_CATEGORIES]
+    notifications = [notification for notification in notifications if notification.category not in COALESCED_CATEGORIES]
+
+    inserted = await insert_unique(notifications)
+    digests = await coalesce_many(coalesced) if coalesced else []
+    # An updated digest was already unread, only newly opened ones raise the badge
+    await add_unread(Counter(
+        [notification.user_id for notification in inserted] + [digest.user_id for digest, created in digests if created]
+    ))
+    notification_hub.publish(inserted + [digest for digest, _ in digests])
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+import os
+from api_naturalize.notification.models.notification_counter_model import NotificationCounterModel
+from api_naturalize.notification.models.notification_model import notificationModel
+
+# Notifications stored before the read flag existed have no is_read field and count as unread
+UNREAD = {"is_read": {"$ne": True}}
+# Expired notifications vanish without touching the counter, so a counter older than this is rebuilt when read
+UNREAD_RECOUNT_SECONDS = float(os.getenv("UNREAD_RECOUNT_SECONDS", "3600"))
+
+
+def _as_utc(value: Optional[datetime]) -> datetime:
+    if value is None:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    # Motor returns naive UTC datetimes unless the client is tz_aware
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _adjust(delta: int, now: datetime) -> list:
+    # Pipeline update, so a drifted counter bottoms out at zero instead of going negative
+    return [{"$set": {
+        "unread": {"$max": [0, {"$add": [{"$ifNull": ["$unread", 0]}, delta]}]},
+        "updated_at": now,
+    }}]
+
+
+async def add_unread(counts: Dict[str, int]):
+    """
+    Apply per-user changes to the unread counters, users without a counter yet are skipped,
+    their counter is built from the inbox the first time it is read
+    """
+    counts = {user_id: delta for user_id, delta in counts.items() if delta}
+    if not counts:
+        return
+    now = datetime.now(timezone.utc)
+    await NotificationCounterModel.get_pymongo_collection().bulk_write(
+        [UpdateOne({"_id": user_id}, _adjust(delta, now)) for user_id, delta in counts.items()],
+        ordered=False
+    )
+
+
+async def recount_unread(user_id: str) -> int:
+    unread = await notificationModel.get_pymongo_collection().count_documents({"user_id": user_id, **UNREAD})
+    now = datetime.now(timezone.utc)
+    try:
+        await NotificationCounterModel.get_pymongo_collection().update_one(
+            {"_id": user_id},
+            {"$set": {"unread": unread, "recounted_at": now, "updated_at": now}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A concurrent recount created it first, its value is as good as ours
+        pass
+    return unread
+
+
+async def get_unread(user_id: str) -> int:
+    counter = await NotificationCounterModel.get_pymongo_collection().find_one(
+        {"_id": user_id}, {"unread": 1, "recounted_at": 1}
+    )
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=UNREAD_RECOUNT_SECONDS)
+    if counter is None or _as_utc(counter.get("recounted_at")) < stale_before:
+        return await recount_unread(user_id)
+    return counter["unread"]
+
+
+async def mark_read(user_id: str, ids: Optional[List[str]] = None) -> int:
+    """
+    Mark the given notifications, or all of them, as read with one update_many.
+    Returns how many were unread before.
+    """
+    query = {"user_id": user_id, **UNREAD}
+    if ids is not None:
+        query["_id"] = {"$in": ids}
+    now = datetime.now(timezone.utc)
+    result = await notificationModel.get_pymongo_collection().update_many(
+        query, {"$set": {"is_read": True, "read_at": now, "updated_at": now}}
+    )
+    if ids is None:
+        # Everything is read now, the recount also repairs any drift
+        await recount_unread(user_id)
+    else:
+        await add_unread({user_id: -result.modified_count})
+    return result.modified_count
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from typing import List, Optional
 from api_naturalize.auth.models.user_model import UserModel
 from api_naturalize.database.database import get_database
 from api_naturalize.payments.models.payments_model import PaymentsModel
 from api_naturalize.payments.schemas.payments_schemas import PaymentsCreate, PaymentsUpdate, PaymentsResponse
-from api_naturalize.utils.user_info import get_user_info
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct_many, json_response
+from api_naturalize.utils.user_info import get_current_user
 from datetime import datetime, timedelta, timezone
 from typing import Dict
 
@@ -15,13 +17,13 @@ router = APIRouter(prefix="/paymentss", tags=["paymentss"])
 
 # GET all paymentss
 @router.get("/", response_model=List[PaymentsResponse],status_code=status.HTTP_200_OK)
-async def get_all_paymentss(skip: int = 0, limit: int = 10):
+async def get_all_paymentss(skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     
     """
-    Get all paymentss with pagination
+    Get all paymentss with pagination, pass the X-Next-Cursor header back as cursor for the next page
     """
-    paymentss = await PaymentsModel.find_all().skip(skip).limit(limit).to_list()
-    return paymentss
+    paymentss, next_cursor, _ = await paginate(PaymentsModel.find_all(), skip, limit, cursor, descending=False)
+    return json_response(List[PaymentsResponse], construct_many(PaymentsResponse, paymentss), headers=cursor_headers(next_cursor))
 
 # GET payments by ID
 @router.get("/{payments_id}", response_model=PaymentsResponse,status_code=status.HTTP_200_OK)
@@ -37,19 +39,16 @@ async def get_payments(payments_id: str):
 
 # POST create new payments
 @router.post("/", response_model=PaymentsResponse,status_code=status.HTTP_201_CREATED)
-async def create_payments(payments_data: PaymentsCreate,user_data:dict=Depends(get_user_info)):
+async def create_payments(payments_data: PaymentsCreate,db_user:UserModel=Depends(get_current_user)):
     
     """
     Create a new payments
     """
-    db_user=await UserModel.get(user_data["user_id"])
-    if not db_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User does not exist")
     payments_dict = payments_data.model_dump()
     payments_dict["user_id"]=db_user.id
     payments = PaymentsModel(**payments_dict)
     await db_user.update(
-        {"$set": {"plan": payments_data.subscription_name}}
+        {"$set": {"plan": payments_data.subscription_name, "updated_at": datetime.now(timezone.utc)}}
     )
     await payments.create()
     return payments
@@ -66,6 +65,7 @@ async def update_payments(payments_id: str, payments_data: PaymentsUpdate):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payments not found")
 
     update_data = payments_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await payments.update({"$set": update_data})
     return await PaymentsModel.get(payments_id)
 
@@ -1,5 +1,6 @@
 from beanie import Document, before_event, Replace, Save
 from datetime import datetime, timezone
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import Field
 import uuid
 
@@ -20,3 +21,10 @@ class ProgressLessonModel(Document):
 
     class Settings:
         name = "progress_lessons"
+        # (sort key, _id) indexes back keyset pagination
+        indexes = [
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+            # One row per user and lesson, answer flushes upsert on it
+            IndexModel([("user_id", ASCENDING), ("lesson_id", ASCENDING)], unique=True),
+        ]
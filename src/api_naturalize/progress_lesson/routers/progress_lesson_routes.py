@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException,status,Depends
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
 from api_naturalize.answer.models.answer_model import AnswerModel
 from api_naturalize.leader_board.models.leader_board_model import LeaderBoardModel
 from api_naturalize.lesson.models.lesson_model import LessonModel
@@ -7,19 +9,21 @@ from api_naturalize.progress_lesson.models.progress_lesson_model import Progress
 from api_naturalize.progress_lesson.schemas.progress_lesson_schemas import ProgresslessonCreate, ProgresslessonUpdate, \
     ProgresslessonResponse, FilteredLessonResponse, DashboardStatsResponse
 from api_naturalize.question.models.question_model import QuestionModel
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct, construct_many, json_response
 from api_naturalize.utils.user_info import get_user_info
 
 router = APIRouter(prefix="/progress", tags=["progress_lessons"])
 
 # GET all progress_lessons
 @router.get("/", response_model=List[ProgresslessonResponse],status_code=status.HTTP_200_OK)
-async def get_all_progress_lessons(skip: int = 0, limit: int = 10):
+async def get_all_progress_lessons(skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     
     """
-    Get all progress_lessons with pagination
+    Get all progress_lessons with pagination, pass the X-Next-Cursor header back as cursor for the next page
     """
-    progress_lessons = await ProgressLessonModel.find_all().skip(skip).limit(limit).to_list()
-    return progress_lessons
+    progress_lessons, next_cursor, _ = await paginate(ProgressLessonModel.find_all(), skip, limit, cursor, descending=False)
+    return json_response(List[ProgresslessonResponse], construct_many(ProgresslessonResponse, progress_lessons), headers=cursor_headers(next_cursor))
 
 # GET progress_lesson by ID
 @router.get("/{id}", response_model=ProgresslessonResponse,status_code=status.HTTP_200_OK)
@@ -42,7 +46,10 @@ async def create_progress_lesson(progress_lesson_data: ProgresslessonCreate):
     """
     progress_lesson_dict = progress_lesson_data.model_dump()
     progress_lesson = ProgressLessonModel(**progress_lesson_dict)
-    await progress_lesson.create()
+    try:
+        await progress_lesson.create()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This user already has progress for this lesson")
     return progress_lesson
 
 # PATCH update progress_lesson
@@ -57,6 +64,7 @@ async def update_progress_lesson(id: str, progress_lesson_data: ProgresslessonUp
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="ProgressLesson not found")
 
     update_data = progress_lesson_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await progress_lesson.update({"$set": update_data})
     return await ProgressLessonModel.get(id)
 
@@ -82,7 +90,8 @@ async def get_lessons_by_progress_range(
         min_progress: float = 0.0,
         max_progress: float = 100.0,
         skip: int = 0,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None
 ):
     """
     Get lessons where user's progress is between min_progress and max_progress
@@ -101,11 +110,14 @@ async def get_lessons_by_progress_range(
         )
 
     # Get all progress records for this user within the range
-    progress_records = await ProgressLessonModel.find(
-        ProgressLessonModel.user_id == user_id,
-        ProgressLessonModel.progress >= min_progress,
-        ProgressLessonModel.progress <= max_progress
-    ).skip(skip).limit(limit).to_list()
+    progress_records, next_cursor, _ = await paginate(
+        ProgressLessonModel.find(
+            ProgressLessonModel.user_id == user_id,
+            ProgressLessonModel.progress >= min_progress,
+            ProgressLessonModel.progress <= max_progress
+        ),
+        skip, limit, cursor, descending=False
+    )
 
     if not progress_records:
         return []
@@ -128,21 +140,16 @@ async def get_lessons_by_progress_range(
         ).to_list()
         total_right_answers = sum(1 for answer in user_answers if answer.score == 1)
 
-        filtered_lesson = FilteredLessonResponse(
-            id=lesson.id,
-            name=lesson.name,
-            description=lesson.description,
-            image_url=lesson.image_url,
-            course_id=lesson.course_id,
+        filtered_lesson = construct(
+            FilteredLessonResponse,
+            lesson,
             my_progress=progress.progress,
             total_right_answers=total_right_answers,
-            total_questions=total_questions,
-            created_at=lesson.created_at,
-            updated_at=lesson.updated_at
+            total_questions=total_questions
         )
         filtered_lessons.append(filtered_lesson)
 
-    return filtered_lessons
+    return json_response(List[FilteredLessonResponse], filtered_lessons, headers=cursor_headers(next_cursor))
 
 
 # GET dashboard statistics
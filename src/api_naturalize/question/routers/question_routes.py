@@ -1,35 +1,49 @@
-from fastapi import APIRouter, HTTPException,status
-from typing import List
+from fastapi import APIRouter, HTTPException,status,Request
+from typing import List, Optional
+from datetime import datetime, timezone
 
 from api_naturalize.course.models.course_model import CourseModel
 from api_naturalize.lesson.models.lesson_model import LessonModel
 from api_naturalize.question.models.question_model import QuestionModel
 from api_naturalize.question.schemas.question_schemas import QuestionCreate, QuestionUpdate, QuestionResponse, \
     BulkQuestionResponse, BulkQuestionCreate
+from api_naturalize.utils.conditional import conditional
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct, construct_many, json_response
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
 # GET all questions
 @router.get("/", response_model=List[QuestionResponse],status_code=status.HTTP_200_OK)
-async def get_all_questions(skip: int = 0, limit: int = 10):
+async def get_all_questions(request: Request, skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     
     """
-    Get all questions with pagination
+    Get all questions with pagination, pass the X-Next-Cursor header back as cursor for the next page
     """
-    questions = await QuestionModel.find_all().skip(skip).limit(limit).to_list()
-    return questions
+    questions, next_cursor, _ = await paginate(QuestionModel.find_all(), skip, limit, cursor, descending=False)
+    not_modified, headers = conditional(request, questions, next_cursor)
+    if not_modified:
+        return not_modified
+    return json_response(
+        List[QuestionResponse],
+        construct_many(QuestionResponse, questions),
+        headers=cursor_headers(next_cursor, headers)
+    )
 
 # GET question by ID
 @router.get("/{id}", response_model=QuestionResponse,status_code=status.HTTP_200_OK)
-async def get_question(id: str):
+async def get_question(id: str, request: Request):
     
     """
-    Get question by ID
+    Get question by ID, answers 304 when If-None-Match still matches
     """
     question = await QuestionModel.get(id)
     if not question:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
-    return question
+    not_modified, headers = conditional(request, [question])
+    if not_modified:
+        return not_modified
+    return json_response(QuestionResponse, construct(QuestionResponse, question), headers=headers)
 
 # POST create new question
 @router.post("/", response_model=QuestionResponse,status_code=status.HTTP_201_CREATED)
@@ -55,6 +69,7 @@ async def update_question(id: str, question_data: QuestionUpdate):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
 
     update_data = question_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await question.update({"$set": update_data})
     return await QuestionModel.get(id)
 
@@ -0,0 +1,23 @@
+from beanie import Document
+from datetime import datetime
+from pydantic import Field
+from typing import Optional
+from api_naturalize.utils.job_status import JobStatus
+
+
+class ScheduledTaskModel(Document):
+    # Keyed by task name, so the next leader continues where the last one stopped
+    id: str = Field(alias="_id")
+    schedule: str = ""
+    next_run_at: Optional[datetime] = None
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_duration_ms: Optional[float] = None
+    last_outcome: Optional[JobStatus] = None
+    last_error: Optional[str] = None
+    last_run_by: Optional[str] = None
+    run_count: int = 0
+    failure_count: int = 0
+
+    class Settings:
+        name = "scheduled_tasks"
@@ -0,0 +1,15 @@
+from beanie import Document
+from datetime import datetime, timezone
+from pydantic import Field
+from typing import Optional
+
+
+class SchedulerLeaseModel(Document):
+    # One document per lease name, whoever holds an unexpired lease is the leader
+    id: str = Field(alias="_id")
+    holder: Optional[str] = None
+    lease_until: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    acquired_at: Optional[datetime] = None
+
+    class Settings:
+        name = "scheduler_leases"
@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import os
+import random
+import socket
+import uuid
+from api_naturalize.scheduler.models.scheduled_task_model import ScheduledTaskModel
+from api_naturalize.scheduler.models.scheduler_lease_model import SchedulerLeaseModel
+from api_naturalize.utils.cron import CronSchedule
+from api_naturalize.utils.job_status import JobStatus
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "5"))
+# Must be comfortably longer than a tick, the leader renews its lease every tick
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", "30"))
+SCHEDULER_STOP_SECONDS = float(os.getenv("SCHEDULER_STOP_SECONDS", "10"))
+LEASE_NAME = "scheduler"
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class ScheduledTask:
+    def __init__(
+            self,
+            name: str,
+            func: Callable[[], Awaitable[None]],
+            interval: Optional[float] = None,
+            cron: Optional[CronSchedule] = None,
+            jitter: float = 0
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.cron = cron
+        self.jitter = jitter
+        self.schedule = f"cron {cron.expression}" if cron else f"every {interval:g}s"
+
+    def next_run(self, after: datetime) -> datetime:
+        # Jitter spreads tasks that share a schedule so they do not all hit the database at once
+        offset = timedelta(seconds=random.uniform(0, self.jitter))
+        if self.cron is not None:
+            return self.cron.next_after(after) + offset
+        return after + timedelta(seconds=self.interval) + offset
+
+    def first_run(self, now: datetime) -> datetime:
+        # Interval tasks run shortly after the first deploy, cron tasks wait for their slot
+        if self.cron is not None:
+            return self.next_run(now)
+        return now + timedelta(seconds=random.uniform(0, self.jitter))
+
+
+class Scheduler:
+    """
+    Periodic tasks for the API processes. Every process runs the loop, but only the one holding
+    the lease document in MongoDB dispatches tasks, the others take over when its lease expires.
+    Next run times and last outcomes live in scheduled_tasks, so a new leader keeps the timetable.
+    """
+
+    def __init__(self):
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.is_leader = False
+        self._tasks: Dict[str, ScheduledTask] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def interval(self, name: str, seconds: float, jitter: float = 0):
+        """
+        Run the decorated coroutine every `seconds`, plus up to `jitter` seconds
+        """
+        def decorator(func):
+            self._tasks[name] = ScheduledTask(name, func, interval=seconds, jitter=jitter)
+            return func
+        return decorator
+
+    def cron(self, name: str, expression: str, jitter: float = 0):
+        """
+        Run the decorated coroutine on a five-field UTC cron schedule, plus up to `jitter` seconds
+        """
+        def decorator(func):
+            self._tasks[name] = ScheduledTask(name, func, cron=CronSchedule(expression), jitter=jitter)
+            return func
+        return decorator
+
+    def start(self):
+        if SCHEDULER_ENABLED and self._loop_task is None:
+            self._stopping.clear()
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = SCHEDULER_STOP_SECONDS):
+        """
+        Stop dispatching, give running tasks `timeout` seconds, then hand the lease back
+        """
+        if self._loop_task is None:
+            return
+        self._stopping.set()
+        await self._loop_task
+        self._loop_task = None
+        running = list(self._running.values())
+        if running:
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        if self.is_leader:
+            await self._release()
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                leader = await self._acquire()
+                if leader != self.is_leader:
+                    print(f"Scheduler {self.instance_id} {'is now' if leader else 'is no longer'} the leader")
+                self.is_leader = leader
+                if leader:
+                    await self._dispatch()
+            except Exception as e:
+                print(f"Scheduler tick failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=SCHEDULER_TICK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _acquire(self) -> bool:
+        """
+        Take the lease if it is free or expired, or renew it if we already hold it
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            lease = await SchedulerLeaseModel.get_pymongo_collection().find_one_and_update(
+                {"_id": LEASE_NAME, "$or": [{"holder": self.instance_id}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"holder": self.instance_id, "lease_until": now + timedelta(seconds=SCHEDULER_LEASE_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Someone else holds a live lease, the upsert collided with their document
+            return False
+        return lease is not None
+
+    async def _release(self):
+        await SchedulerLeaseModel.get_pymongo_collection().update_one(
+            {"_id": LEASE_NAME, "holder": self.instance_id},
+            {"$set": {"lease_until": datetime.now(timezone.utc)}}
+        )
+        self.is_leader = False
+
+    async def _dispatch(self):
+        now = datetime.now(timezone.utc)
+        collection = ScheduledTaskModel.get_pymongo_collection()
+        records = {doc["_id"]: doc async for doc in collection.find({"_id": {"$in": list(self._tasks)}})}
+        for name, task in self._tasks.items():
+            if name in self._running:
+                continue
+            record = records.get(name) or {}
+            next_run_at = record.get("next_run_at")
+            if next_run_at is None or record.get("schedule") != task.schedule:
+                # New task or changed schedule
+                await collection.update_one(
+                    {"_id": name},
+                    {"$set": {"schedule": task.schedule, "next_run_at": task.first_run(now)}},
+                    upsert=True
+                )
+                continue
+            if _as_utc(next_run_at) > now:
+                continue
+            # Moving next_run_at forward first means a second leader during a handover cannot run it again
+            claimed = await collection.update_one(
+                {"_id": name, "next_run_at": {"$lte": now}},
+                {"$set": {
+                    "next_run_at": task.next_run(now),
+                    "last_started_at": now,
+                    "last_outcome": JobStatus.RUNNING.value,
+                    "last_run_by": self.instance_id,
+                }}
+            )
+            if claimed.modified_count:
+                running = asyncio.create_task(self._execute(task))
+                self._running[name] = running
+                running.add_done_callback(lambda _, name=name: self._running.pop(name, None))
+
+    async def _execute(self, task: ScheduledTask):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        outcome, error = JobStatus.SUCCEEDED, None
+        try:
+            await task.func()
+        except asyncio.CancelledError:
+            outcome, error = JobStatus.FAILED, "Cancelled on shutdown"
+            raise
+        except Exception as e:
+            outcome, error = JobStatus.FAILED, f"{type(e).__name__}: {e}"
+            print(f"Scheduled task {task.name} failed: {error}")
+        finally:
+            await ScheduledTaskModel.get_pymongo_collection().update_one(
+                {"_id": task.name},
+                {
+                    "$set": {
+                        "last_finished_at": datetime.now(timezone.utc),
+                        "last_duration_ms": round((loop.time() - started) * 1000, 1),
+                        "last_outcome": outcome.value,
+                        "last_error": error,
+                    },
+                    "$inc": {"run_count": 1, "failure_count": 1 if outcome == JobStatus.FAILED else 0},
+                }
+            )
+
+    def stats(self) -> dict:
+        return {
+            "instance": self.instance_id,
+            "enabled": SCHEDULER_ENABLED,
+            "leader": self.is_leader,
+            "registered": {name: task.schedule for name, task in self._tasks.items()},
+            "running": sorted(self._running),
+        }
+
+
+scheduler = Scheduler()
@@ -0,0 +1,176 @@
+"""
+Mark-and-sweep for uploads no course, lesson or user points at any more:
+
+    python -m api_naturalize.storage.gc [--apply] [--grace-hours 24]
+
+Runs nightly as the uploads.gc job. It only reports what it would delete unless
+UPLOAD_GC_DRY_RUN=false (or --apply on the command line).
+"""
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Set, Tuple, Union
+import argparse
+import asyncio
+import os
+import re
+import time
+from api_naturalize.database.database import initialize_database, close_database
+from api_naturalize.storage.models.stored_file_model import StoredFileModel
+from api_naturalize.storage.refs import STATIC_PREFIX
+from api_naturalize.storage.variants import VARIANT_TARGETS
+from api_naturalize.utils.uploads import INCOMING_DIR, UPLOAD_DIR
+
+UPLOAD_GC_DRY_RUN = os.getenv("UPLOAD_GC_DRY_RUN", "true").lower() == "true"
+# Files younger than this are never deleted, it covers uploads that happen while the job runs
+UPLOAD_GC_GRACE_HOURS = float(os.getenv("UPLOAD_GC_GRACE_HOURS", "24"))
+UPLOAD_GC_DELETES_PER_SECOND = float(os.getenv("UPLOAD_GC_DELETES_PER_SECOND", "50"))
+UPLOAD_GC_BATCH_SIZE = int(os.getenv("UPLOAD_GC_BATCH_SIZE", "1000"))
+
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}")
+
+# 32-byte digests for content-addressed files, the plain name for legacy flat uploads
+FileKey = Union[bytes, str]
+
+
+def file_key(name: str) -> FileKey:
+    """
+    Variants ("<sha256>_w160.webp") share the key of their original, so they live and die with it
+    """
+    if _CONTENT_ADDRESSED.match(name):
+        return bytes.fromhex(name[:64])
+    return name
+
+
+def _scan(directory: str) -> Tuple[List[Tuple[str, str, float, int]], List[str]]:
+    """
+    The files (name, path, mtime, size) and subdirectories of one directory, dot entries skipped
+    """
+    files, directories = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                directories.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                stat_result = entry.stat(follow_symlinks=False)
+                files.append((entry.name, entry.path, stat_result.st_mtime, stat_result.st_size))
+    return files, directories
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+class UploadCollector:
+    def __init__(
+            self,
+            dry_run: bool = UPLOAD_GC_DRY_RUN,
+            grace_hours: float = UPLOAD_GC_GRACE_HOURS,
+            deletes_per_second: float = UPLOAD_GC_DELETES_PER_SECOND,
+            progress: Optional[Callable[[float, str], Awaitable[None]]] = None
+    ):
+        self.dry_run = dry_run
+        self.cutoff = time.time() - grace_hours * 3600
+        self.delay = 1 / deletes_per_second if deletes_per_second > 0 else 0
+        self.progress = progress
+        self.referenced: Set[FileKey] = set()
+        self.scanned = 0
+        self.deleted = 0
+        self.deleted_bytes = 0
+        self.stale_incoming = 0
+
+    async def mark(self):
+        """
+        Stream every image URL with a projection, only the keys are kept in memory
+        """
+        for document, field, _ in VARIANT_TARGETS.values():
+            cursor = document.get_pymongo_collection().find(
+                {field: {"$regex": STATIC_PREFIX}}, {field: 1, "_id": 0}
+            ).batch_size(UPLOAD_GC_BATCH_SIZE)
+            async for row in cursor:
+                url = row.get(field)
+                if url and STATIC_PREFIX in url:
+                    self.referenced.add(file_key(url.rsplit("/", 1)[1]))
+        if self.progress:
+            await self.progress(20, f"{len(self.referenced)} referenced files")
+
+    async def _sweep_files(self, files: List[Tuple[str, str, float, int]]):
+        for name, path, mtime, size in files:
+            self.scanned += 1
+            if mtime >= self.cutoff or file_key(name) in self.referenced:
+                continue
+            await self._delete(path, size)
+
+    async def sweep(self):
+        # Legacy flat files sit in the root, everything else below the 256 first-level shards
+        files, shards = await asyncio.to_thread(_scan, UPLOAD_DIR)
+        await self._sweep_files(files)
+        for index, shard in enumerate(shards):
+            pending = [shard]
+            while pending:
+                files, directories = await asyncio.to_thread(_scan, pending.pop())
+                pending.extend(directories)
+                await self._sweep_files(files)
+            if self.progress and (index + 1) % 16 == 0:
+                await self.progress(20 + 80 * (index + 1) / len(shards), f"{self.deleted} files deleted")
+        await self._sweep_incoming()
+
+    async def _sweep_incoming(self):
+        # Parts left behind by uploads that crashed mid-write
+        if not INCOMING_DIR.is_dir():
+            return
+        files, _ = await asyncio.to_thread(_scan, str(INCOMING_DIR))
+        for _, path, mtime, size in files:
+            if mtime < self.cutoff:
+                self.stale_incoming += 1
+                await self._delete(path, size, stored=False)
+
+    async def _delete(self, path: str, size: int, stored: bool = True):
+        if not self.dry_run:
+            if not await asyncio.to_thread(_remove, path):
+                return
+            if stored:
+                relative = Path(path).relative_to(UPLOAD_DIR).as_posix()
+                await StoredFileModel.get_pymongo_collection().delete_one({"_id": relative})
+            if self.delay:
+                # Spread the unlinks out so a large sweep does not starve uploads of disk I/O
+                await asyncio.sleep(self.delay)
+        self.deleted += 1
+        self.deleted_bytes += size
+
+    async def run(self) -> dict:
+        await self.mark()
+        await self.sweep()
+        return {
+            "dry_run": self.dry_run,
+            "referenced": len(self.referenced),
+            "scanned": self.scanned,
+            "deleted": self.deleted,
+            "deleted_bytes": self.deleted_bytes,
+            "stale_incoming": self.stale_incoming,
+        }
+
+
+async def _main(dry_run: bool, grace_hours: float):
+    await initialize_database()
+    try:
+        result = await UploadCollector(dry_run=dry_run, grace_hours=grace_hours).run()
+        print(result)
+    finally:
+        await close_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete uploads nothing references")
+    parser.add_argument("--apply", action="store_true", help="delete files, without it only report them")
+    parser.add_argument("--grace-hours", type=float, default=UPLOAD_GC_GRACE_HOURS)
+    args = parser.parse_args()
+    asyncio.run(_main(not args.apply, args.grace_hours))
+
+
+if __name__ == "__main__":
+    main()
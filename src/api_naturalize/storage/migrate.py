@@ -0,0 +1,198 @@
+"""
+Move flat uploads into the content-addressed layout:
+
+    python -m api_naturalize.storage.migrate --batch-size 500 [--dry-run]
+
+Documents are walked first: every flat file they reference is hashed, hard-linked into its
+shard path and the documents are pointed at the new URL, batch by batch. The flat originals are
+kept, so clients still holding the old URL keep working; their mtime is reset and the upload
+garbage collector removes them once its grace period has passed. A crash leaves every URL working
+and the tool can simply be run again. Flat files no document references are moved last.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.course.models.course_model import CourseModel
+from api_naturalize.database.database import initialize_database, close_database
+from api_naturalize.lesson.models.lesson_model import LessonModel
+from api_naturalize.storage.refs import STATIC_PREFIX, retain, shard_path
+from api_naturalize.utils.uploads import UPLOAD_DIR
+
+# (document, URL field) pairs that point at uploads
+REFERENCES = [
+    (CourseModel, "image_url"),
+    (LessonModel, "image_url"),
+    (UserModel, "profile_image"),
+]
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def _hash_file(path: Path) -> Tuple[str, int]:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while chunk := source.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest(), path.stat().st_size
+
+
+def _link_into_place(source: Path, target: Path):
+    if target.exists():
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        # Hard links need the same filesystem, fall back to a copy
+        shutil.copy2(source, target)
+
+
+def _flat_name(url: Optional[str]) -> Optional[str]:
+    if not url or STATIC_PREFIX not in url:
+        return None
+    name = url.split(STATIC_PREFIX, 1)[1]
+    return name if "/" not in name else None
+
+
+class Migration:
+    def __init__(self, batch_size: int, dry_run: bool):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.root = Path(UPLOAD_DIR)
+        # Flat name -> (shard path, digest, size) for files moved in this run
+        self.moved: Dict[str, Tuple[str, str, int]] = {}
+        self.documents = 0
+        self.missing = 0
+        self.unreferenced = 0
+
+    async def _relink(self, name: str) -> Optional[Tuple[str, str, int]]:
+        if name in self.moved:
+            return self.moved[name]
+        source = self.root / name
+        if not source.is_file():
+            self.missing += 1
+            return None
+        digest, size = await asyncio.to_thread(_hash_file, source)
+        path = shard_path(digest, source.suffix.lower())
+        if not self.dry_run:
+            await asyncio.to_thread(_link_into_place, source, self.root / path)
+        self.moved[name] = (path, digest, size)
+        return self.moved[name]
+
+    async def _flush(self, document, field: str, batch: List[dict]):
+        updates = []
+        now = datetime.now(timezone.utc)
+        references: Dict[str, Tuple[str, int, int]] = {}
+        for row in batch:
+            name = _flat_name(row.get(field))
+            moved = await self._relink(name)
+            if moved is None:
+                continue
+            path, digest, size = moved
+            _, _, count = references.get(path, (digest, size, 0))
+            references[path] = (digest, size, count + 1)
+            updates.append(UpdateOne(
+                {"_id": row["_id"], field: row[field]},
+                {"$set": {
+                    field: row[field].replace(f"{STATIC_PREFIX}{name}", f"{STATIC_PREFIX}{path}"),
+                    "updated_at": now,
+                }}
+            ))
+        self.documents += len(updates)
+        if self.dry_run or not updates:
+            return
+        await document.get_pymongo_collection().bulk_write(updates, ordered=False)
+        for path, (digest, size, count) in references.items():
+            await retain(path, digest, size, references=count)
+
+    async def migrate_references(self):
+        for document, field in REFERENCES:
+            cursor = document.get_pymongo_collection().find(
+                {field: {"$regex": f"{STATIC_PREFIX}[^/]+$"}}, {field: 1}
+            )
+            batch = []
+            async for row in cursor:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    await self._flush(document, field, batch)
+                    batch = []
+            if batch:
+                await self._flush(document, field, batch)
+            print(f"{document.Settings.name}.{field}: {self.documents} documents relinked so far")
+
+    def touch_relinked(self):
+        """
+        Start the garbage collector's grace period for the flat originals now, not at their upload time
+        """
+        if self.dry_run:
+            return
+        for name in self.moved:
+            try:
+                os.utime(self.root / name)
+            except FileNotFoundError:
+                pass
+
+    async def migrate_unreferenced(self):
+        """
+        Flat files left over are referenced by nothing, move them so the garbage collector sees them
+        """
+        batch = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith(".") and entry.name not in self.moved:
+                    batch.append(entry.name)
+                if len(batch) >= self.batch_size:
+                    await self._move_unreferenced(batch)
+                    batch = []
+        if batch:
+            await self._move_unreferenced(batch)
+
+    async def _move_unreferenced(self, names: List[str]):
+        for name in names:
+            source = self.root / name
+            digest, _ = await asyncio.to_thread(_hash_file, source)
+            target = self.root / shard_path(digest, source.suffix.lower())
+            if target.exists():
+                # Relinked by an earlier run, old URLs may still point here, the collector removes it
+                continue
+            if not self.dry_run:
+                await asyncio.to_thread(_link_into_place, source, target)
+                source.unlink(missing_ok=True)
+            self.unreferenced += 1
+        print(f"{self.unreferenced} unreferenced files moved")
+
+    async def run(self):
+        await self.migrate_references()
+        self.touch_relinked()
+        await self.migrate_unreferenced()
+        prefix = "[dry run] " if self.dry_run else ""
+        print(
+            f"{prefix}{self.documents} documents relinked, {len(self.moved)} referenced files, "
+            f"{self.unreferenced} unreferenced files, {self.missing} references to missing files"
+        )
+
+
+async def _main(batch_size: int, dry_run: bool):
+    await initialize_database()
+    try:
+        await Migration(batch_size, dry_run).run()
+    finally:
+        await close_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move flat uploads into the content-addressed layout")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without touching anything")
+    args = parser.parse_args()
+    asyncio.run(_main(args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from beanie import Document, before_event, Replace, Save
+from datetime import datetime, timezone
+from pymongo import ASCENDING, IndexModel
+from pydantic import Field
+from typing import Optional
+
+
+class StoredFileModel(Document):
+    # Path below UPLOAD_DIR, "ab/cd/<sha256><ext>"
+    id: str = Field(alias="_id")
+    sha256: str
+    size: int = 0
+    # Documents pointing at the file, advisory: deletes through delete_many do not release
+    refcount: int = 0
+    released_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    # Auto-update "updated_at" on update
+    @before_event([Save, Replace])
+    def update_timestamp(self):
+        self.updated_at = datetime.now(timezone.utc)
+
+    class Settings:
+        name = "stored_files"
+        indexes = [
+            # Unreferenced files for the garbage collector
+            IndexModel([("refcount", ASCENDING), ("released_at", ASCENDING)]),
+        ]
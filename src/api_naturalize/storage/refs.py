@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+from pymongo import UpdateOne
+from api_naturalize.storage.models.stored_file_model import StoredFileModel
+
+STATIC_PREFIX = "/static/"
+
+
+def shard_path(digest: str, extension: str) -> str:
+    """
+    Two directory levels from the hash keep every directory small: "ab/cd/abcd...<ext>"
+    """
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def path_from_url(url: Optional[str]) -> Optional[str]:
+    """
+    The stored path of one of our /static URLs, None for external or pre-migration flat URLs
+    """
+    if not url or STATIC_PREFIX not in url:
+        return None
+    path = url.split(STATIC_PREFIX, 1)[1]
+    return path if path.count("/") == 2 else None
+
+
+async def retain(path: str, digest: str, size: int, references: int = 1):
+    now = datetime.now(timezone.utc)
+    await StoredFileModel.get_pymongo_collection().update_one(
+        {"_id": path},
+        {
+            "$inc": {"refcount": references},
+            "$set": {"updated_at": now, "released_at": None},
+            "$setOnInsert": {"sha256": digest, "size": size, "created_at": now},
+        },
+        upsert=True
+    )
+
+
+async def release_urls(urls: Iterable[Optional[str]]):
+    """
+    Drop one reference per URL, the garbage collector removes files nobody points at
+    """
+    paths = [path for path in map(path_from_url, urls) if path]
+    if not paths:
+        return
+    now = datetime.now(timezone.utc)
+    await StoredFileModel.get_pymongo_collection().bulk_write(
+        [
+            UpdateOne({"_id": path}, [{"$set": {
+                "refcount": {"$max": [0, {"$subtract": ["$refcount", 1]}]},
+                "released_at": now,
+                "updated_at": now,
+            }}])
+            for path in paths
+        ],
+        ordered=False
+    )
@@ -0,0 +1,17 @@
+from api_naturalize.jobs.models.job_model import JobModel
+from api_naturalize.jobs.queue import enqueue_job
+from api_naturalize.scheduler.scheduler import scheduler
+from api_naturalize.utils.job_status import JobStatus
+
+
+@scheduler.cron("uploads.gc", "45 4 * * *", jitter=600)
+async def collect_uploads():
+    """
+    Nightly sweep of uploads no course, lesson or user references any more
+    """
+    pending = await JobModel.find({
+        "name": "uploads.gc",
+        "status": {"$in": [JobStatus.QUEUED.value, JobStatus.RUNNING.value]},
+    }).count()
+    if not pending:
+        await enqueue_job("uploads.gc", priority=-1, max_attempts=1)
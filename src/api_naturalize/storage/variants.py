@@ -0,0 +1,145 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import asyncio
+import multiprocessing
+import os
+from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.course.models.course_model import CourseModel
+from api_naturalize.jobs.models.job_model import JobModel
+from api_naturalize.jobs.queue import enqueue_job
+from api_naturalize.lesson.models.lesson_model import LessonModel
+from api_naturalize.storage.refs import path_from_url
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+except ImportError:  # Pillow is optional, without it only the originals are served
+    Image = None
+
+# Failures a retry will not fix: files Pillow cannot identify and images over its pixel limit.
+# Other OSErrors (disk full, I/O errors, permissions) are left to the job's retries.
+PERMANENT_ERRORS = (ValueError,) + (
+    (UnidentifiedImageError, Image.DecompressionBombError) if Image is not None else ()
+)
+
+# Thumbnail widths, a variant is only made when the original is wider
+IMAGE_VARIANT_WIDTHS = [int(width) for width in os.getenv("IMAGE_VARIANT_WIDTHS", "160,480").split(",") if width.strip()]
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+# Resizing and encoding hold the GIL, so they run in worker processes
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", str(min(2, os.cpu_count() or 1))))
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+
+# Name of the full size WebP copy next to the w<width> thumbnails
+FULL_SIZE = "webp"
+
+# target -> (document, image URL field, variants field)
+VARIANT_TARGETS = {
+    "course": (CourseModel, "image_url", "image_variants"),
+    "lesson": (LessonModel, "image_url", "image_variants"),
+    "user": (UserModel, "profile_image", "profile_image_variants"),
+}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def variant_path(path: str, name: str) -> str:
+    """
+    "ab/cd/<sha256>.jpg" -> "ab/cd/<sha256>_w160.webp", variants share the original's shard
+    """
+    return f"{os.path.splitext(path)[0]}_{name}.webp"
+
+
+def _render_variants(root: str, path: str, widths: Tuple[int, ...], quality: int) -> Dict[str, str]:
+    """
+    Runs in a worker process. Existing variants are kept, so a retried or repeated job is cheap.
+    """
+    source = Path(root) / path
+    variants = {}
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+        targets = [(f"w{width}", width) for width in sorted(widths) if width < image.width]
+        if Path(path).suffix.lower() == ".webp":
+            variants[FULL_SIZE] = path
+        else:
+            targets.append((FULL_SIZE, image.width))
+        for name, width in targets:
+            variant = variant_path(path, name)
+            target = Path(root) / variant
+            if not target.exists():
+                resized = image
+                if width < image.width:
+                    resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+                # Dot-prefixed until complete, the static route and the collector skip it
+                temp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+                resized.save(temp, "WEBP", quality=quality, method=4)
+                os.replace(temp, target)
+            variants[name] = variant
+    return variants
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # The job worker runs an event loop and driver threads, spawn keeps them out of the children
+        _executor = ProcessPoolExecutor(
+            max_workers=IMAGE_VARIANT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def render_variants(path: str, root: str) -> Dict[str, str]:
+    """
+    Generate the variants of a stored image and return {name: path below root}
+    """
+    if Image is None:
+        return {}
+    loop = asyncio.get_running_loop()
+    args = (root, path, tuple(IMAGE_VARIANT_WIDTHS), IMAGE_VARIANT_QUALITY)
+    for attempt in range(2):
+        executor = _get_executor()
+        try:
+            return await loop.run_in_executor(executor, _render_variants, *args)
+        except BrokenProcessPool:
+            # A child died (out of memory, killed), the pool refuses all further work until replaced
+            _reset_executor(executor)
+            if attempt:
+                raise
+
+
+def variant_urls(url: str, path: str, variants: Dict[str, str]) -> Dict[str, str]:
+    base = url[:-len(path)]
+    return {name: f"{base}{variant}" for name, variant in variants.items()}
+
+
+async def request_variants(target: str, document_id: str, url: Optional[str]) -> Optional[JobModel]:
+    """
+    Queue variant generation for a freshly stored image, a no-op for external URLs
+    """
+    path = path_from_url(url)
+    if Image is None or path is None or Path(path).suffix.lower() not in IMAGE_EXTENSIONS:
+        return None
+    return await enqueue_job(
+        "image.variants",
+        {"target": target, "document_id": document_id, "url": url, "path": path},
+        priority=-1,
+        max_attempts=3
+    )
+
+
+def _reset_executor(broken: ProcessPoolExecutor):
+    global _executor
+    # Jobs that hit the same broken pool concurrently must not replace a fresh one
+    if _executor is broken:
+        _executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_variant_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
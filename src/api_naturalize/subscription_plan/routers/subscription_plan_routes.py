@@ -1,31 +1,45 @@
-from fastapi import APIRouter, HTTPException,status
-from typing import List
+from fastapi import APIRouter, HTTPException,status,Request
+from typing import List, Optional
+from datetime import datetime, timezone
 from api_naturalize.subscription_plan.models.subscription_plan_model import SubscriptionPlanModel
 from api_naturalize.subscription_plan.schemas.subscription_plan_schemas import SubscriptionplanCreate, SubscriptionplanUpdate, SubscriptionplanResponse
+from api_naturalize.utils.conditional import conditional
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct, construct_many, json_response
 
 router = APIRouter(prefix="/subscription_plans", tags=["subscription_plans"])
 
 # GET all subscription_plans
 @router.get("/", response_model=List[SubscriptionplanResponse],status_code=status.HTTP_200_OK)
-async def get_all_subscription_plans(skip: int = 0, limit: int = 10):
+async def get_all_subscription_plans(request: Request, skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     
     """
-    Get all subscription_plans with pagination
+    Get all subscription_plans with pagination, pass the X-Next-Cursor header back as cursor for the next page
     """
-    subscription_plans = await SubscriptionPlanModel.find_all().skip(skip).limit(limit).to_list()
-    return subscription_plans
+    subscription_plans, next_cursor, _ = await paginate(SubscriptionPlanModel.find_all(), skip, limit, cursor, descending=False)
+    not_modified, headers = conditional(request, subscription_plans, next_cursor)
+    if not_modified:
+        return not_modified
+    return json_response(
+        List[SubscriptionplanResponse],
+        construct_many(SubscriptionplanResponse, subscription_plans),
+        headers=cursor_headers(next_cursor, headers)
+    )
 
 # GET subscription_plan by ID
 @router.get("/{subscription_plan_id}", response_model=SubscriptionplanResponse,status_code=status.HTTP_200_OK)
-async def get_subscription_plan(subscription_plan_id: str):
+async def get_subscription_plan(subscription_plan_id: str, request: Request):
     
     """
-    Get subscription_plan by ID
+    Get subscription_plan by ID, answers 304 when If-None-Match still matches
     """
     subscription_plan = await SubscriptionPlanModel.get(subscription_plan_id)
     if not subscription_plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SubscriptionPlan not found")
-    return subscription_plan
+    not_modified, headers = conditional(request, [subscription_plan])
+    if not_modified:
+        return not_modified
+    return json_response(SubscriptionplanResponse, construct(SubscriptionplanResponse, subscription_plan), headers=headers)
 
 # POST create new subscription_plan
 @router.post("/", response_model=SubscriptionplanResponse,status_code=status.HTTP_201_CREATED)
@@ -51,6 +65,7 @@ async def update_subscription_plan(subscription_plan_id: str, subscription_plan_
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SubscriptionPlan not found")
 
     update_data = subscription_plan_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await subscription_plan.update({"$set": update_data})
     return await SubscriptionPlanModel.get(subscription_plan_id)
 
@@ -0,0 +1,185 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Hashable, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
+import os
+import time
+import uuid
+from api_naturalize.time_storage.models.study_day_model import StudyDayModel
+from api_naturalize.time_storage.models.time_storage_model import TimeStorageModel
+
+# Seconds between flushes of the heartbeat buffer, 0 writes every heartbeat straight through
+TIME_FLUSH_SECONDS = float(os.getenv("TIME_FLUSH_SECONDS", "5"))
+# Flush early once this many users are waiting
+TIME_BUFFER_MAX_USERS = int(os.getenv("TIME_BUFFER_MAX_USERS", "20000"))
+# While Mongo is down the buffer only keeps growing, past this many users or day buckets time of new ones is dropped
+TIME_BUFFER_LIMIT = int(os.getenv("TIME_BUFFER_LIMIT", str(TIME_BUFFER_MAX_USERS * 5)))
+
+
+def _increment(seconds: int, now: datetime) -> dict:
+    return {
+        "$inc": {"total_time": seconds},
+        "$set": {"updated_at": now},
+        "$setOnInsert": {"_id": str(uuid.uuid4()), "created_at": now},
+    }
+
+
+def day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _day_increment(user_id: str, day: datetime, seconds: int, now: datetime) -> UpdateOne:
+    return UpdateOne(
+        {"_id": f"{user_id}:{day.date().isoformat()}"},
+        {"$inc": {"seconds": seconds}, "$set": {"updated_at": now}, "$setOnInsert": {"user_id": user_id, "day": day}},
+        upsert=True
+    )
+
+
+async def _write(collection, items: List[Tuple[Hashable, int]], operations: List[UpdateOne]) -> List[Tuple[Hashable, int]]:
+    """
+    Unordered bulk write, returns the items whose $inc was not applied
+    """
+    try:
+        await collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # Every operation not listed in writeErrors was applied and must not be sent again
+        return [items[error["index"]] for error in e.details.get("writeErrors", [])]
+    return []
+
+
+class TimeAccumulator:
+    """
+    Merges study-time heartbeats per user in memory and writes them with one bulk_write per flush,
+    both to the running total in time_storages and to the user's bucket for the day in study_days.
+    Every write is an $inc upsert, so several app processes can each run their own buffer.
+    A crash loses at most one flush interval of time.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._pending_days: Dict[Tuple[str, datetime], int] = defaultdict(int)
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.heartbeats = 0
+        self.flushes = 0
+        self.written = 0
+        self.failed_flushes = 0
+        self.dropped_seconds = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def buffering(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if TIME_FLUSH_SECONDS > 0 and self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the flush loop and write whatever is still buffered
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await self.flush()
+
+    async def add(self, user_id: str, seconds: int):
+        self.heartbeats += 1
+        now = datetime.now(timezone.utc)
+        if not self.buffering:
+            await TimeStorageModel.get_pymongo_collection().update_one(
+                {"user_id": user_id}, _increment(seconds, now), upsert=True
+            )
+            await StudyDayModel.get_pymongo_collection().bulk_write([_day_increment(user_id, day_start(now), seconds, now)])
+            return
+        self._keep(self._pending, user_id, seconds)
+        self._keep(self._pending_days, (user_id, day_start(now)), seconds)
+        if len(self._pending) >= TIME_BUFFER_MAX_USERS:
+            self._wakeup.set()
+
+    def _keep(self, pending: Dict[Hashable, int], key: Hashable, seconds: int):
+        if key not in pending and len(pending) >= TIME_BUFFER_LIMIT:
+            self.dropped_seconds += seconds
+            return
+        pending[key] += seconds
+
+    async def flush(self):
+        if not self._pending and not self._pending_days:
+            return
+        # Swap the buffer first, heartbeats arriving during the write go into the new one
+        pending, self._pending = self._pending, defaultdict(int)
+        pending_days, self._pending_days = self._pending_days, defaultdict(int)
+        now = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        totals = list(pending.items())
+        days = list(pending_days.items())
+        failed_totals, failed_days = [], []
+        try:
+            if totals:
+                failed_totals = await _write(
+                    TimeStorageModel.get_pymongo_collection(),
+                    totals,
+                    [UpdateOne({"user_id": user_id}, _increment(seconds, now), upsert=True) for user_id, seconds in totals]
+                )
+        except Exception as e:
+            # Nothing says which writes landed, so all of them go around again. A partially applied
+            # batch may count a few users twice, which is better than dropping the whole batch.
+            print(f"Study time flush failed: {e}")
+            failed_totals = totals
+        try:
+            if days:
+                failed_days = await _write(
+                    StudyDayModel.get_pymongo_collection(),
+                    days,
+                    [_day_increment(user_id, day, seconds, now) for (user_id, day), seconds in days]
+                )
+        except Exception as e:
+            print(f"Study day flush failed: {e}")
+            failed_days = days
+        if failed_totals or failed_days:
+            self.failed_flushes += 1
+            for user_id, seconds in failed_totals:
+                self._keep(self._pending, user_id, seconds)
+            for key, seconds in failed_days:
+                self._keep(self._pending_days, key, seconds)
+            print(f"Study time kept for retry: {len(failed_totals)} users, {len(failed_days)} day buckets")
+        self.flushes += 1
+        self.written += len(totals) - len(failed_totals)
+        self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=TIME_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._stopping:
+                await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "buffering": self.buffering,
+            "flush_seconds": TIME_FLUSH_SECONDS,
+            "pending_users": len(self._pending),
+            "pending_days": len(self._pending_days),
+            "heartbeats": self.heartbeats,
+            "flushes": self.flushes,
+            "users_written": self.written,
+            "failed_flushes": self.failed_flushes,
+            "buffer_limit": TIME_BUFFER_LIMIT,
+            "dropped_seconds": self.dropped_seconds,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+time_accumulator = TimeAccumulator()
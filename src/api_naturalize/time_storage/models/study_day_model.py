@@ -0,0 +1,23 @@
+from beanie import Document
+from datetime import datetime, timezone
+from pymongo import ASCENDING, IndexModel
+from pydantic import Field
+
+
+class StudyDayModel(Document):
+    # "<user_id>:<YYYY-MM-DD>", so concurrent upserts for the same day always meet on the same _id
+    id: str = Field(alias="_id")
+    user_id: str
+    # Midnight UTC of the bucket's day
+    day: datetime
+    seconds: int = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "study_days"
+        indexes = [
+            # Per-user ranges
+            IndexModel([("user_id", ASCENDING), ("day", ASCENDING)]),
+            # Ranges across all users, seconds included so the sums can be answered from the index
+            IndexModel([("day", ASCENDING), ("seconds", ASCENDING)]),
+        ]
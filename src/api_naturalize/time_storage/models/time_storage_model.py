@@ -1,5 +1,6 @@
 from beanie import Document, before_event, Replace, Save
 from datetime import datetime, timezone
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import Field
 import uuid
 
@@ -18,3 +19,9 @@ class TimeStorageModel(Document):
 
     class Settings:
         name = "time_storages"
+        # (sort key, _id) indexes back keyset pagination
+        indexes = [
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+            # One row per user, heartbeats upsert on it
+            IndexModel([("user_id", ASCENDING)], unique=True),
+        ]
@@ -1,21 +1,139 @@
 from fastapi import APIRouter, HTTPException,status,Depends
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
 from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.time_storage.accumulator import time_accumulator
+from api_naturalize.time_storage.models.study_day_model import StudyDayModel
 from api_naturalize.time_storage.models.time_storage_model import TimeStorageModel
-from api_naturalize.time_storage.schemas.time_storage_schemas import TimestorageCreate, TimestorageUpdate, TimestorageResponse
-from api_naturalize.utils.user_info import get_user_info
+from api_naturalize.time_storage.schemas.time_storage_schemas import TimestorageCreate, TimestorageUpdate, TimestorageResponse, \
+    StudyDayPoint, StudyTimeSeriesResponse, StudyTimeSumResponse
+from api_naturalize.utils.pagination import paginate, cursor_headers
+from api_naturalize.utils.serialization import construct_many, json_response
+from api_naturalize.utils.user_info import get_current_user
 
 router = APIRouter(prefix="/time", tags=["time_storages"])
 
+# Longest range the daily endpoints accept
+STUDY_RANGE_MAX_DAYS = 366
+
+
+def _resolve_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    """
+    Inclusive day range, the last 7 days up to today (UTC) by default
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=6)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+    if (end - start).days + 1 > STUDY_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Range is limited to {STUDY_RANGE_MAX_DAYS} days")
+    return start, end
+
+
+async def _daily_totals(start: date, end: date, user_id: Optional[str] = None) -> Dict[date, Tuple[int, int]]:
+    """
+    (seconds, users) per day, bounded by the (user_id, day) or (day, seconds) index
+    """
+    match = {"day": {
+        "$gte": datetime(start.year, start.month, start.day, tzinfo=timezone.utc),
+        "$lte": datetime(end.year, end.month, end.day, tzinfo=timezone.utc),
+    }}
+    if user_id is not None:
+        match = {"user_id": user_id, **match}
+    rows = await StudyDayModel.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$day", "seconds": {"$sum": "$seconds"}, "users": {"$sum": 1}}},
+    ]).to_list()
+    return {row["_id"].date(): (row["seconds"], row["users"]) for row in rows}
+
+
+async def _series(start: Optional[date], end: Optional[date], user_id: Optional[str] = None) -> StudyTimeSeriesResponse:
+    start, end = _resolve_range(start, end)
+    totals = await _daily_totals(start, end, user_id)
+    days = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        seconds, users = totals.get(day, (0, 0))
+        days.append(StudyDayPoint(day=day, seconds=seconds, active_users=users if user_id is None else None))
+    return StudyTimeSeriesResponse(
+        user_id=user_id, start=start, end=end, total_seconds=sum(point.seconds for point in days), days=days
+    )
+
+
+async def _sum(start: Optional[date], end: Optional[date], user_id: Optional[str] = None) -> StudyTimeSumResponse:
+    start, end = _resolve_range(start, end)
+    totals = await _daily_totals(start, end, user_id)
+    return StudyTimeSumResponse(
+        user_id=user_id,
+        start=start,
+        end=end,
+        seconds=sum(seconds for seconds, _ in totals.values()),
+        active_days=sum(1 for seconds, _ in totals.values() if seconds > 0),
+    )
+
 # GET all time_storages
 @router.get("/", response_model=List[TimestorageResponse],status_code=status.HTTP_200_OK)
-async def get_all_time_storages(skip: int = 0, limit: int = 10):
+async def get_all_time_storages(skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     
     """
-    Get all time_storages with pagination
+    Get all time_storages with pagination, pass the X-Next-Cursor header back as cursor for the next page
+    """
+    time_storages, next_cursor, _ = await paginate(TimeStorageModel.find_all(), skip, limit, cursor, descending=False)
+    return json_response(
+        List[TimestorageResponse],
+        construct_many(TimestorageResponse, time_storages),
+        headers=cursor_headers(next_cursor)
+    )
+
+# GET daily study time across all users
+@router.get("/daily", response_model=StudyTimeSeriesResponse, status_code=status.HTTP_200_OK)
+async def get_daily_study_time(start: Optional[date] = None, end: Optional[date] = None):
+    """
+    Study seconds and active users per day, start and end are inclusive
     """
-    time_storages = await TimeStorageModel.find_all().skip(skip).limit(limit).to_list()
-    return time_storages
+    return await _series(start, end)
+
+
+# GET study time across all users for a range
+@router.get("/sum", response_model=StudyTimeSumResponse, status_code=status.HTTP_200_OK)
+async def get_study_time_sum(start: Optional[date] = None, end: Optional[date] = None):
+    return await _sum(start, end)
+
+
+# GET daily study time of the current user
+@router.get("/daily/me", response_model=StudyTimeSeriesResponse, status_code=status.HTTP_200_OK)
+async def get_my_daily_study_time(
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        db_user: UserModel = Depends(get_current_user)
+):
+    return await _series(start, end, db_user.id)
+
+
+# GET study time of the current user for a range
+@router.get("/sum/me", response_model=StudyTimeSumResponse, status_code=status.HTTP_200_OK)
+async def get_my_study_time_sum(
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        db_user: UserModel = Depends(get_current_user)
+):
+    """
+    E.g. seconds studied this week
+    """
+    return await _sum(start, end, db_user.id)
+
+
+# GET daily study time of a user
+@router.get("/user/{user_id}/daily", response_model=StudyTimeSeriesResponse, status_code=status.HTTP_200_OK)
+async def get_user_daily_study_time(user_id: str, start: Optional[date] = None, end: Optional[date] = None):
+    return await _series(start, end, user_id)
+
+
+# GET study time of a user for a range
+@router.get("/user/{user_id}/sum", response_model=StudyTimeSumResponse, status_code=status.HTTP_200_OK)
+async def get_user_study_time_sum(user_id: str, start: Optional[date] = None, end: Optional[date] = None):
+    return await _sum(start, end, user_id)
+
 
 # GET time_storage by ID
 @router.get("/{time_storage_id}", response_model=TimestorageResponse,status_code=status.HTTP_200_OK)
@@ -49,24 +167,12 @@ async def get_time_storage(user_id:str):
 
 # POST create new time_storage
 @router.post("/",status_code=status.HTTP_201_CREATED)
-async def create_time_storage(time_storage_data: TimestorageCreate,user:dict=Depends(get_user_info)):
+async def create_time_storage(time_storage_data: TimestorageCreate,db_user:UserModel=Depends(get_current_user)):
     
     """
-    Create a new time_storage
+    Add study time for the current user, heartbeats are merged and written in batches
     """
-    db_user=await  UserModel.get(user["user_id"])
-    if not db_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User does not exist")
-
-    db_time_storage=await TimeStorageModel.find_one(TimeStorageModel.user_id==db_user.id)
-    if not db_time_storage:
-        time_storage_dict = time_storage_data.model_dump()
-        time_storage_dict["user_id"]=db_user.id
-        time_storage = TimeStorageModel(**time_storage_dict)
-        await time_storage.insert()
-    else:
-        db_time_storage.total_time += time_storage_data.total_time
-        await db_time_storage.save()
+    await time_accumulator.add(db_user.id, time_storage_data.total_time)
 
     return {"message":"successfully saved time"}
 
@@ -82,6 +188,7 @@ async def update_time_storage(time_storage_id: str, time_storage_data: Timestora
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="TimeStorage not found")
 
     update_data = time_storage_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await time_storage.update({"$set": update_data})
     return await TimeStorageModel.get(time_storage_id)
 
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 
 # Schema for creating new TimeStorage
 class TimestorageCreate(BaseModel):
@@ -21,3 +21,29 @@ class TimestorageResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# One day of a study-time series
+class StudyDayPoint(BaseModel):
+    day: date
+    seconds: int
+    # Only set on series across all users
+    active_users: Optional[int] = None
+
+
+# Schema for daily study-time series
+class StudyTimeSeriesResponse(BaseModel):
+    user_id: Optional[str] = None
+    start: date
+    end: date
+    total_seconds: int
+    days: List[StudyDayPoint]
+
+
+# Schema for study time summed over a range
+class StudyTimeSumResponse(BaseModel):
+    user_id: Optional[str] = None
+    start: date
+    end: date
+    seconds: int
+    active_days: int
@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import gzip
+import os
+import time
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+# Compressed bodies of strong-ETag responses, 0 disables the cache
+COMPRESSION_CACHE_ENTRIES = int(os.getenv("COMPRESSION_CACHE_ENTRIES", "256"))
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# Compressed bodies are their own representation, their ETag carries the encoding as a suffix
+ENCODINGS = ("br", "gzip")
+
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/plain", "text/css", "application/javascript", "image/svg+xml")
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """
+    Content codings of an Accept-Encoding header with their q values
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick br or gzip from an Accept-Encoding header, honouring q=0
+    """
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    '"abc"' -> '"abc-gzip"', weak tags keep their W/ prefix
+    """
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def strip_encoded_etags(if_none_match: str) -> Optional[str]:
+    """
+    Map the encoded ETags a client sends back to the identity ETags the handlers compute.
+    Returns None when no tag carried an encoding suffix.
+    """
+    tags = []
+    stripped = False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        for encoding in ENCODINGS:
+            suffix = f'-{encoding}"'
+            if tag.endswith(suffix):
+                tag = f'{tag[:-len(suffix)]}"'
+                stripped = True
+                break
+        tags.append(tag)
+    return ", ".join(tags) if stripped else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by (path and query, ETag, encoding), bounded by entries and bytes
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        body = self._items.get(key)
+        if body is not None:
+            self._items.move_to_end(key)
+        return body
+
+    def put(self, key: Tuple[str, str, str], body: bytes):
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._items[key] = body
+        self.size += len(body)
+        while len(self._items) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+
+_stats = {
+    "compressed": 0,
+    "cache_hits": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "compress_seconds": 0.0,
+}
+# Cache of the app's middleware, for compression_stats
+_cache: Optional[CompressedBodyCache] = None
+
+
+def compression_stats() -> dict:
+    return {
+        **_stats,
+        "compress_seconds": round(_stats["compress_seconds"], 3),
+        "ratio": round(_stats["bytes_out"] / _stats["bytes_in"], 3) if _stats["bytes_in"] else 0.0,
+        "brotli": brotli is not None,
+        "cache_entries": len(_cache) if _cache is not None else 0,
+        "cache_bytes": _cache.size if _cache is not None else 0,
+    }
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli for buffered responses above a size threshold.
+    Streaming bodies (files, server-sent events) and already encoded responses pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, cache_entries: int = COMPRESSION_CACHE_ENTRIES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = CompressedBodyCache(cache_entries, COMPRESSION_CACHE_BYTES)
+        global _cache
+        _cache = self.cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict((k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"])
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Validators of a compressed body carry the encoding, the handlers only know the identity ETag
+        if_none_match = strip_encoded_etags(headers["if-none-match"]) if "if-none-match" in headers else None
+        if if_none_match is not None:
+            scope = {**scope, "headers": [
+                (k, if_none_match.encode("latin-1") if k.lower() == b"if-none-match" else v)
+                for k, v in scope["headers"]
+            ]}
+        query = scope.get("query_string", b"").decode("latin-1")
+        cache_path = f"{scope['path']}?{query}"
+        start_message = None
+        passthrough = False
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                # Streaming response: send what we have as is and stop buffering
+                passthrough = True
+                await send(start_message)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                return
+
+            body = b"".join(chunks)
+            if start_message["status"] == 304 and if_none_match is not None:
+                # The client revalidated the compressed body, answer with the tag it holds
+                start_message = {**start_message, "headers": _with_encoded_etag(start_message, encoding)}
+            await self._send_buffered(start_message, body, encoding, cache_path, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _is_compressible(self, status: int, response_headers: Dict[str, str], body: bytes) -> bool:
+        if status < 200 or status in (204, 206, 304) or len(body) < self.minimum_size:
+            return False
+        if "content-encoding" in response_headers:
+            return False
+        content_type = response_headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _send_buffered(self, start_message, body: bytes, encoding: str, cache_path: str, send):
+        raw_headers = list(start_message.get("headers", []))
+        response_headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in raw_headers}
+        if not self._is_compressible(start_message["status"], response_headers, body):
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = response_headers.get("etag")
+        cache_key = (cache_path, etag, encoding) if etag and not etag.startswith("W/") else None
+        compressed = self.cache.get(cache_key) if cache_key else None
+        if compressed is not None:
+            _stats["cache_hits"] += 1
+        else:
+            started = time.perf_counter()
+            compressed = compress(body, encoding)
+            _stats["compress_seconds"] += time.perf_counter() - started
+            if cache_key:
+                self.cache.put(cache_key, compressed)
+        _stats["compressed"] += 1
+        _stats["bytes_in"] += len(body)
+        _stats["bytes_out"] += len(compressed)
+
+        vary = response_headers.get("vary")
+        new_headers = [(k, v) for k, v in _with_encoded_etag(start_message, encoding) if k.lower() not in (b"content-length", b"vary")]
+        new_headers.append((b"content-encoding", encoding.encode("latin-1")))
+        new_headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+        new_headers.append((b"vary", (f"{vary}, Accept-Encoding" if vary else "Accept-Encoding").encode("latin-1")))
+
+        await send({**start_message, "headers": new_headers})
+        await send({"type": "http.response.body", "body": compressed})
+
+
+def _with_encoded_etag(start_message, encoding: str) -> list:
+    return [
+        (k, encoded_etag(v.decode("latin-1"), encoding).encode("latin-1") if k.lower() == b"etag" else v)
+        for k, v in start_message.get("headers", [])
+    ]
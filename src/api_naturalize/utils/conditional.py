@@ -0,0 +1,78 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+import hashlib
+
+
+def _as_utc(value: datetime) -> datetime:
+    # MongoDB hands back naive datetimes that are already UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def document_validators(docs: Iterable[Any], *extra: Any) -> Tuple[str, Optional[datetime]]:
+    """
+    Strong ETag and Last-Modified for a set of documents.
+    The ETag covers every (id, updated_at) pair, so edits, deletes and reorders all change it;
+    extra carries anything else the body depends on, such as counts or the requesting user.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    last_modified = None
+    for doc in docs:
+        updated_at = _as_utc(doc.updated_at)
+        digest.update(f"{doc.id}:{updated_at.timestamp()}|".encode())
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    for value in extra:
+        digest.update(f"{value!r}|".encode())
+    return f'"{digest.hexdigest()}"', last_modified
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime], private: bool = False) -> Dict[str, str]:
+    headers = {
+        "ETag": etag,
+        # Clients may keep the body but must revalidate it on every use
+        "Cache-Control": "private, no-cache" if private else "no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    RFC 9110 evaluation: If-None-Match wins, If-Modified-Since is only used without it
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def conditional(
+        request: Request,
+        docs: Iterable[Any],
+        *extra: Any,
+        private: bool = False
+) -> Tuple[Optional[Response], Dict[str, str]]:
+    """
+    Returns (304 response or None, validator headers for the full response)
+    """
+    etag, last_modified = document_validators(docs, *extra)
+    headers = cache_headers(etag, last_modified, private=private)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers), headers
+    return None, headers
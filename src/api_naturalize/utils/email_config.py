@@ -1,12 +1,6 @@
 
 from pydantic import BaseModel, EmailStr
-from email.message import EmailMessage
-import aiosmtplib
-import os
-
-APP_PASSWORD = os.getenv("APP_PASSWORD")
-EMAIL = os.getenv("EMAIL")
-HOST_NAME = os.getenv("HOST_NAME")
+from api_naturalize.email_outbox.sender import enqueue_email
 
 
 
@@ -18,21 +12,12 @@ class SendOtpModel(BaseModel):
     model_config = {"from_attributes": True}
 
 
-async def send_otp(otp_user: SendOtpModel):
+async def queue_otp(otp_user: SendOtpModel):
     """
-    Send OTP to user's email asynchronously
+    Queue the OTP email, the outbox sender delivers it in the background
     """
-    message = EmailMessage()
-    message["From"] = EMAIL
-    message["To"] = otp_user.email
-    message["Subject"] = "🔑 Your OTP Code"
-    message.set_content(f"Your OTP code is: {otp_user.otp}")
-
-    await aiosmtplib.send(
-        message,
-        hostname=HOST_NAME,
-        port=465,
-        use_tls=True,
-        username=EMAIL,
-        password=APP_PASSWORD,
-    )
\ No newline at end of file
+    await enqueue_email(
+        to=otp_user.email,
+        subject="🔑 Your OTP Code",
+        body=f"Your OTP code is: {otp_user.otp}",
+    )
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class EmailStatus(Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Type
+from pydantic import BaseModel
+import asyncio
+import os
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+EVENT_DRAIN_SECONDS = float(os.getenv("EVENT_DRAIN_SECONDS", "10"))
+
+
+class Subscription:
+    """
+    One handler with its own bounded queue and worker task.
+    The handler always receives a list, up to batch_size events collected within max_wait seconds.
+    """
+
+    def __init__(self, handler: Callable[[List[BaseModel]], Awaitable[None]], batch_size: int, max_wait: float):
+        self.handler = handler
+        self.name = f"{handler.__module__}.{handler.__name__}"
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.task: Optional[asyncio.Task] = None
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+
+    async def _next_batch(self) -> List[BaseModel]:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.handler(batch)
+                self.processed += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Event handler {self.name} failed: {e}")
+            finally:
+                self.batches += 1
+                for _ in batch:
+                    self.queue.task_done()
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for side effects that do not need to finish before the response.
+    Events are lost if the process dies, so only use it for work that is safe to miss or rebuild.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[Type[BaseModel], List[Subscription]] = defaultdict(list)
+        self._all: List[Subscription] = []
+        self._started = False
+
+    def subscriber(self, *event_types: Type[BaseModel], batch_size: int = 1, max_wait: float = 0.0):
+        """
+        Register the decorated coroutine for event_types
+        """
+        def decorator(handler):
+            subscription = Subscription(handler, batch_size, max_wait)
+            self._all.append(subscription)
+            for event_type in event_types:
+                self._subscriptions[event_type].append(subscription)
+            if self._started:
+                subscription.task = asyncio.create_task(subscription.run())
+            return handler
+        return decorator
+
+    async def publish(self, event: BaseModel):
+        """
+        Queue the event for every subscriber, waits only when a subscriber's queue is full
+        """
+        for subscription in self._subscriptions.get(type(event), []):
+            await subscription.queue.put(event)
+
+    def start(self):
+        self._started = True
+        for subscription in self._all:
+            if subscription.task is None:
+                subscription.task = asyncio.create_task(subscription.run())
+
+    async def drain(self, timeout: float = EVENT_DRAIN_SECONDS):
+        """
+        Wait for queued events to be handled, then stop the workers
+        """
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(subscription.queue.join() for subscription in self._all)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            left = sum(subscription.queue.qsize() for subscription in self._all)
+            print(f"Event bus stopped with {left} events still queued")
+        for subscription in self._all:
+            if subscription.task is not None:
+                subscription.task.cancel()
+                subscription.task = None
+        self._started = False
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "subscriber": subscription.name,
+                "queued": subscription.queue.qsize(),
+                "processed": subscription.processed,
+                "failed": subscription.failed,
+                "batches": subscription.batches,
+            }
+            for subscription in self._all
+        ]
+
+
+event_bus = EventBus()
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class UserLoggedIn(BaseModel):
+    user_id: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    auth_provider: str = "email"
+
+
+class UserVerified(BaseModel):
+    user_id: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+
+class PasswordChanged(BaseModel):
+    user_id: str
+
+
+class AnswerSubmitted(BaseModel):
+    user_id: str
+    question_id: str
+    lesson_id: str
+    course_id: str
+    # Change to the user's total score, an edited answer moves it by new - old
+    score_delta: int
+
+
+class LessonCompleted(BaseModel):
+    user_id: str
+    lesson_id: str
+    course_id: str
@@ -0,0 +1,92 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Type
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+# Projection models, one per (document, fieldset)
+_projection_models: Dict[Tuple[type, FrozenSet[str]], Type[BaseModel]] = {}
+
+EXPAND_NONE = "none"
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Set[str]]:
+    """
+    Parse a comma separated fields= parameter against a response schema.
+    None means every field; id is always returned.
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    requested.add("id")
+    return requested
+
+
+def parse_expand(expand: Optional[str], allowed: Iterable[str]) -> Set[str]:
+    """
+    Parse a comma separated expand= parameter, "none" asks for counts only
+    """
+    allowed = set(allowed)
+    if expand is None:
+        return allowed
+    requested = {name.strip() for name in expand.split(",") if name.strip()}
+    requested.discard(EXPAND_NONE)
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot expand: {', '.join(sorted(unknown))}"
+        )
+    return requested
+
+
+def projection_model(document: Type[BaseModel], fields: Iterable[str]) -> Type[BaseModel]:
+    """
+    Pydantic model Beanie can use with .project(), so MongoDB only returns the requested fields
+    """
+    document_fields = document.model_fields
+    names = frozenset(name for name in fields if name in document_fields) | {"id"}
+    key = (document, names)
+    model = _projection_models.get(key)
+    if model is None:
+        definitions: Dict[str, Any] = {}
+        for name in names:
+            field = document_fields[name]
+            if name == "id":
+                definitions[name] = (field.annotation, Field(alias="_id"))
+            else:
+                definitions[name] = (Optional[field.annotation], None)
+        model = create_model(
+            f"{document.__name__}Projection",
+            __config__=ConfigDict(populate_by_name=True),
+            **definitions
+        )
+        _projection_models[key] = model
+    return model
+
+
+async def count_by(document, key_field: str, keys: List[str]) -> Dict[str, int]:
+    """
+    Count documents per key for a whole page in one aggregation
+    """
+    if not keys:
+        return {}
+    pipeline = [{"$group": {"_id": f"${key_field}", "count": {"$sum": 1}}}]
+    rows = await document.find({key_field: {"$in": keys}}).aggregate(pipeline).to_list()
+    return {row["_id"]: row["count"] for row in rows}
+
+
+async def group_by(document, key_field: str, keys: List[str]) -> Dict[str, List[Any]]:
+    """
+    Load the nested documents for a whole page in one query, grouped by key
+    """
+    grouped: Dict[str, List[Any]] = {key: [] for key in keys}
+    if not keys:
+        return grouped
+    for item in await document.find({key_field: {"$in": keys}}).to_list():
+        grouped[getattr(item, key_field)].append(item)
+    return grouped
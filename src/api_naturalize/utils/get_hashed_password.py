@@ -1,7 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+import asyncio
+import os
+import threading
+import time
 
+# argon2 cost, hashes made with other values are upgraded on the next successful login
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# argon2 releases the GIL, so a thread pool keeps the event loop free
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Calls waiting for a worker beyond this are rejected with 503 instead of piling up
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+# Counters are updated from the event loop and the worker threads
+_stats_lock = threading.Lock()
+_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "rejected": 0,
+    "wait_seconds": 0.0,
+    "hash_seconds": 0.0,
+}
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 def get_hashed_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,3 +45,75 @@ def get_hashed_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+    return _executor
+
+
+async def _run_in_pool(func: Callable, *args):
+    if _stats["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        with _stats_lock:
+            _stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"}
+        )
+    submitted = time.perf_counter()
+    with _stats_lock:
+        _stats["queued"] += 1
+
+    def task():
+        started = time.perf_counter()
+        with _stats_lock:
+            _stats["queued"] -= 1
+            _stats["running"] += 1
+            _stats["wait_seconds"] += started - submitted
+        try:
+            return func(*args)
+        finally:
+            with _stats_lock:
+                _stats["running"] -= 1
+                _stats["completed"] += 1
+                _stats["hash_seconds"] += time.perf_counter() - started
+
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), task)
+
+
+async def get_hashed_password_async(password: str) -> str:
+    return await _run_in_pool(pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_pool(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Returns (valid, new_hash). new_hash is set when the stored hash used other cost parameters
+    """
+    return await _run_in_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def hash_pool_stats() -> dict:
+    completed = _stats["completed"]
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "queued": _stats["queued"],
+        "running": _stats["running"],
+        "completed": completed,
+        "rejected": _stats["rejected"],
+        "avg_wait_ms": round(_stats["wait_seconds"] / completed * 1000, 2) if completed else 0.0,
+        "avg_hash_ms": round(_stats["hash_seconds"] / completed * 1000, 2) if completed else 0.0,
+    }
+
+
+def shutdown_hash_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
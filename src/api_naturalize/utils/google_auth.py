@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+import hashlib
+import httpx
+import os
+import time
+from api_naturalize.utils.http_client import get_http_client
+
+# Point this at a local fake to run without Google
+GOOGLE_USERINFO_URL = os.getenv("GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v2/userinfo")
+GOOGLE_TOKEN_CACHE_SECONDS = int(os.getenv("GOOGLE_TOKEN_CACHE_SECONDS", "60"))
+GOOGLE_TOKEN_CACHE_SIZE = 1024
+
+
+class GoogleUserInfoProvider:
+    """
+    Resolves a Google access token to its userinfo, None when Google rejects the token
+    """
+
+    def __init__(self, userinfo_url: str = GOOGLE_USERINFO_URL):
+        self.userinfo_url = userinfo_url
+
+    async def fetch_user_info(self, access_token: str) -> Optional[dict]:
+        try:
+            response = await get_http_client().get(
+                self.userinfo_url,
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
+        except httpx.HTTPError:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Could not reach Google")
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+
+class CachedGoogleUserInfoProvider:
+    """
+    Keeps successful lookups for a short TTL, keyed by a hash of the token,
+    so retries and double taps skip the remote call
+    """
+
+    def __init__(self, provider, ttl_seconds: int = GOOGLE_TOKEN_CACHE_SECONDS, max_size: int = GOOGLE_TOKEN_CACHE_SIZE):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    async def fetch_user_info(self, access_token: str) -> Optional[dict]:
+        key = hashlib.sha256(access_token.encode()).hexdigest()
+        now = time.monotonic()
+        cached = self._items.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                return cached[1]
+            del self._items[key]
+
+        user_info = await self.provider.fetch_user_info(access_token)
+        if user_info is not None and self.ttl_seconds > 0:
+            self._items[key] = (now + self.ttl_seconds, user_info)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return user_info
+
+
+google_provider = CachedGoogleUserInfoProvider(GoogleUserInfoProvider())
+
+
+def get_google_provider():
+    """
+    Dependency for the Google login route, tests swap it with app.dependency_overrides
+    """
+    return google_provider
@@ -0,0 +1,30 @@
+from typing import Optional
+import httpx
+
+# One pooled client for outbound calls, opened and closed in the app lifespan
+_client: Optional[httpx.AsyncClient] = None
+
+
+async def open_http_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, raises if the lifespan has not opened it
+    """
+    if _client is None:
+        raise RuntimeError("HTTP client not initialized. Call open_http_client first.")
+    return _client
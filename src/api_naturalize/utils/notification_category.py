@@ -0,0 +1,30 @@
+from enum import Enum
+import os
+
+
+class NotificationCategory(Enum):
+    LOGIN = "LOGIN"
+    ACCOUNT = "ACCOUNT"
+    SECURITY = "SECURITY"
+    LESSON = "LESSON"
+    BROADCAST = "BROADCAST"
+    GENERAL = "GENERAL"
+
+
+_DEFAULT_RETENTION_DAYS = {
+    NotificationCategory.LOGIN: 7,
+    NotificationCategory.ACCOUNT: 90,
+    NotificationCategory.SECURITY: 180,
+    NotificationCategory.LESSON: 90,
+    NotificationCategory.BROADCAST: 30,
+    NotificationCategory.GENERAL: 90,
+}
+
+# Days a notification is kept, e.g. NOTIFICATION_RETENTION_LOGIN_DAYS=14
+NOTIFICATION_RETENTION_DAYS = {
+    category: int(os.getenv(f"NOTIFICATION_RETENTION_{category.value}_DAYS", str(days)))
+    for category, days in _DEFAULT_RETENTION_DAYS.items()
+}
+
+# Repeats of these collapse into one unread digest with a count instead of new rows
+COALESCED_CATEGORIES = {NotificationCategory.LOGIN}
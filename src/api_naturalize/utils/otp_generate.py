@@ -1,4 +1,62 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
 from random import randint
+import hashlib
+import hmac
+import os
+from api_naturalize.auth.models.otp_challenge_model import OtpChallengeModel
+
+OTP_EXPIRE_MINUTES = int(os.getenv("OTP_EXPIRE_MINUTES", "10"))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+
 
 def generate_otp():
-    return str(randint(100000, 999999))
\ No newline at end of file
+    return str(randint(100000, 999999))
+
+
+def _hash_otp(user_id: str, otp: str) -> str:
+    return hashlib.sha256(f"{user_id}:{otp}".encode()).hexdigest()
+
+
+async def issue_otp(user_id: str, email: str) -> str:
+    """
+    Start a new challenge for the user, replacing any open one, and return the code
+    """
+    otp = generate_otp()
+    now = datetime.now(timezone.utc)
+    await OtpChallengeModel.get_pymongo_collection().update_one(
+        {"_id": user_id},
+        {"$set": {
+            "email": email,
+            "otp_hash": _hash_otp(user_id, otp),
+            "attempts": 0,
+            "expires_at": now + timedelta(minutes=OTP_EXPIRE_MINUTES),
+            "created_at": now,
+        }},
+        upsert=True
+    )
+    return otp
+
+
+async def check_otp(user_id: str, otp: str):
+    """
+    Count an attempt against the user's open challenge and close it on success.
+    Raises 400 for a missing, expired or wrong code and 429 once the attempts are used up.
+    """
+    collection = OtpChallengeModel.get_pymongo_collection()
+    now = datetime.now(timezone.utc)
+    # The TTL monitor runs once a minute, so expiry is checked here as well
+    challenge = await collection.find_one_and_update(
+        {"_id": user_id, "expires_at": {"$gt": now}},
+        {"$inc": {"attempts": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if challenge is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP expired, please request a new one")
+    if challenge["attempts"] > OTP_MAX_ATTEMPTS:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            detail="Too many wrong attempts, please request a new OTP")
+    if not hmac.compare_digest(challenge["otp_hash"], _hash_otp(user_id, otp)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Wrong OTP")
+    await collection.delete_one({"_id": user_id})
@@ -0,0 +1,81 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from fastapi import HTTPException, status
+import base64
+import json
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, doc_id: str, position: int) -> str:
+    """
+    Opaque cursor holding the (sort key, _id) of the last item on a page
+    """
+    if isinstance(sort_value, datetime):
+        payload = {"t": "dt", "v": sort_value.isoformat()}
+    else:
+        payload = {"t": "raw", "v": sort_value}
+    payload["id"] = doc_id
+    payload["p"] = position
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = payload["v"]
+        if payload["t"] == "dt":
+            value = datetime.fromisoformat(value)
+        return value, payload["id"], int(payload["p"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_filter(sort_field: str, sort_value: Any, doc_id: str, descending: bool) -> Dict[str, Any]:
+    op = "$lt" if descending else "$gt"
+    return {
+        "$or": [
+            {sort_field: {op: sort_value}},
+            {sort_field: sort_value, "_id": {op: doc_id}},
+        ]
+    }
+
+
+async def paginate(
+        query,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        sort_field: str = "created_at",
+        descending: bool = True
+) -> Tuple[List[Any], Optional[str], int]:
+    """
+    Run a Beanie find query one page at a time.
+    With a cursor the page starts right after the encoded (sort key, _id) and skip is ignored,
+    so deep pages cost the same as the first one. Returns (items, next_cursor, offset of the first item).
+    """
+    direction = -1 if descending else 1
+    offset = skip
+    if cursor:
+        sort_value, doc_id, offset = decode_cursor(cursor)
+        query = query.find(keyset_filter(sort_field, sort_value, doc_id, descending))
+    query = query.sort([(sort_field, direction), ("_id", direction)])
+    if not cursor and skip:
+        query = query.skip(skip)
+    items = await query.limit(limit).to_list()
+
+    next_cursor = None
+    if limit and len(items) == limit:
+        last = items[-1]
+        last_value = last.id if sort_field == "_id" else getattr(last, sort_field)
+        next_cursor = encode_cursor(last_value, last.id, offset + len(items))
+    return items, next_cursor, offset
+
+
+def cursor_headers(next_cursor: Optional[str], headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, str]]:
+    headers = dict(headers or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return headers or None
@@ -0,0 +1,178 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Union
+from fastapi import HTTPException, Request, status
+from pymongo import ASCENDING, ReturnDocument
+import ipaddress
+import math
+import os
+import time
+from api_naturalize.database.database import get_database
+
+# "capacity/seconds": a client may burst `capacity` calls, then gets capacity per `seconds`
+RATE_LIMITS = {
+    "login:ip": os.getenv("RATE_LIMIT_LOGIN_IP", "20/60"),
+    "login:account": os.getenv("RATE_LIMIT_LOGIN_ACCOUNT", "5/60"),
+    "signup:ip": os.getenv("RATE_LIMIT_SIGNUP_IP", "5/300"),
+    "signup:account": os.getenv("RATE_LIMIT_SIGNUP_ACCOUNT", "3/300"),
+    "resend_otp:ip": os.getenv("RATE_LIMIT_RESEND_OTP_IP", "5/300"),
+    "resend_otp:account": os.getenv("RATE_LIMIT_RESEND_OTP_ACCOUNT", "3/300"),
+}
+# memory keeps buckets per worker, mongo shares them between workers
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+# Peers allowed to set X-Forwarded-For, the reverse proxy in front of uvicorn. Loopback only by default:
+# behind Docker port publishing every client arrives from the bridge gateway, and trusting it would let
+# anyone pick their own IP. Add the proxy's address or network (e.g. "172.18.0.0/16") to opt in.
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1")
+
+
+def parse_limit(limit: str) -> Tuple[int, float]:
+    capacity, seconds = limit.split("/")
+    return int(capacity), int(capacity) / float(seconds)
+
+
+class RateLimitBackend(ABC):
+    """
+    Token bucket storage. take() refills the bucket, spends one token if it can
+    and returns (allowed, seconds until a token is available).
+    """
+
+    @abstractmethod
+    async def take(self, key: str, capacity: int, refill_rate: float) -> Tuple[bool, float]:
+        ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    MAX_BUCKETS = 100_000
+
+    def __init__(self):
+        # Least recently used first, so eviction drops the buckets that have refilled the longest
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.evicted = 0
+
+    async def take(self, key: str, capacity: int, refill_rate: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        while len(self._buckets) >= self.MAX_BUCKETS:
+            # One bucket at a time, rotating keys can no longer wipe the limits of everyone else
+            self._buckets.popitem(last=False)
+            self.evicted += 1
+        self._buckets[key] = (tokens, now)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill_rate
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in the rate_limits collection, refilled and spent atomically by one update pipeline
+    """
+
+    def __init__(self):
+        self._indexed = False
+
+    async def take(self, key: str, capacity: int, refill_rate: float) -> Tuple[bool, float]:
+        collection = get_database()["rate_limits"]
+        if not self._indexed:
+            await collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+            self._indexed = True
+
+        now = datetime.now(timezone.utc)
+        idle_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        doc = await collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": {"$min": [capacity, {"$add": [
+                    {"$ifNull": ["$tokens", capacity]},
+                    {"$multiply": [idle_seconds, refill_rate]},
+                ]}]}}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "updated_at": now,
+                    # Past this point the bucket is full again and can be dropped
+                    "expires_at": now + timedelta(seconds=math.ceil(capacity / refill_rate)),
+                }},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (1 - doc["tokens"]) / refill_rate
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+        self.allowed: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+
+    async def hit(self, rule: str, key: Optional[str]):
+        """
+        Spend a token from the rule's bucket for key, raises 429 when it is empty
+        """
+        capacity, refill_rate = parse_limit(RATE_LIMITS[rule])
+        allowed, retry_after = await self.backend.take(f"{rule}:{(key or '').lower()}", capacity, refill_rate)
+        if allowed:
+            self.allowed[rule] += 1
+            return
+        self.rejected[rule] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "limits": RATE_LIMITS,
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+            "evicted": getattr(self.backend, "evicted", 0),
+        }
+
+
+rate_limiter = RateLimiter(MongoRateLimitBackend() if RATE_LIMIT_BACKEND == "mongo" else InMemoryRateLimitBackend())
+
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+_trusted_networks: List[Network] = [
+    ipaddress.ip_network(network.strip(), strict=False) for network in TRUSTED_PROXIES.split(",") if network.strip()
+]
+
+
+def _is_trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_networks)
+
+
+def client_ip(request: Request) -> str:
+    """
+    The peer address, or behind a trusted proxy the right-most X-Forwarded-For entry
+    that is not a proxy itself. Entries further left are client supplied and ignored.
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted(host):
+        return host
+    forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",") if entry.strip()]
+    for entry in reversed(forwarded):
+        if not _is_trusted(entry):
+            return entry
+    return forwarded[0] if forwarded else host
+
+
+def limit_by_ip(action: str):
+    """
+    Dependency that spends a token from the caller's IP bucket for action
+    """
+    async def dependency(request: Request):
+        await rate_limiter.hit(f"{action}:ip", client_ip(request))
+    return dependency
@@ -0,0 +1,87 @@
+from copy import copy
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+from fastapi import Response, status
+from pydantic import BaseModel, TypeAdapter
+
+
+T = TypeVar("T", bound=BaseModel)
+
+# Compiled adapters, one per response type
+_adapters: Dict[Any, TypeAdapter] = {}
+
+# (name, required, default, default_factory) per response schema, resolved once
+_field_plans: Dict[type, Tuple[Tuple[str, bool, Any, Optional[Callable[[], Any]]], ...]] = {}
+
+_object_setattr = object.__setattr__
+
+
+def get_adapter(response_type: Any) -> TypeAdapter:
+    """
+    Return a cached TypeAdapter for a response type such as List[UserResponse]
+    """
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = TypeAdapter(response_type)
+        _adapters[response_type] = adapter
+    return adapter
+
+
+def _get_field_plan(schema: Type[BaseModel]):
+    plan = _field_plans.get(schema)
+    if plan is None:
+        plan = tuple(
+            (name, field.is_required(), field.default, field.default_factory)
+            for name, field in schema.model_fields.items()
+        )
+        _field_plans[schema] = plan
+    return plan
+
+
+def construct(schema: Type[T], obj: Any, **extra: Any) -> T:
+    """
+    Build a response model from an already validated document without re-validation.
+    Only use it with data read from our own database; client input must still go through validation.
+    """
+    if schema.__private_attributes__:
+        data = {name: getattr(obj, name) for name in schema.model_fields if hasattr(obj, name)}
+        data.update(extra)
+        return schema.model_construct(**data)
+
+    source = obj if isinstance(obj, dict) else obj.__dict__
+    data = {}
+    for name, required, default, default_factory in _get_field_plan(schema):
+        if name in extra:
+            data[name] = extra[name]
+        elif name in source:
+            data[name] = source[name]
+        elif default_factory is not None:
+            data[name] = default_factory()
+        elif not required:
+            data[name] = copy(default) if isinstance(default, (list, dict, set)) else default
+
+    # Same attributes model_construct sets, minus its per-field Python loop
+    response = schema.__new__(schema)
+    _object_setattr(response, "__dict__", data)
+    _object_setattr(response, "__pydantic_fields_set__", set(data))
+    _object_setattr(response, "__pydantic_extra__", None)
+    _object_setattr(response, "__pydantic_private__", None)
+    return response
+
+
+def construct_many(schema: Type[T], objs: Iterable[Any]) -> List[T]:
+    return [construct(schema, obj) for obj in objs]
+
+
+def json_response(
+        response_type: Any,
+        content: Any,
+        status_code: int = status.HTTP_200_OK,
+        headers: Optional[Dict[str, str]] = None,
+        include: Any = None
+) -> Response:
+    """
+    Serialize trusted content straight to JSON, skipping the response_model validation pass.
+    The route's response_model is still used for the OpenAPI schema.
+    """
+    body = get_adapter(response_type).dump_json(content, include=include)
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,91 @@
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+import anyio
+import os
+import re
+from api_naturalize.utils.compression import accepted_encodings
+
+# Upload names never change content, so browsers and CDNs may keep them for a year without asking
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "public, max-age=31536000, immutable")
+
+# Encodings tried in order when a precompressed sibling ("<name>.br", "<name>.gz") exists
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}")
+
+
+def static_etag(name: str, stat_result: os.stat_result) -> str:
+    """
+    Strong ETag: content-addressed names are their own validator, anything else uses size and mtime
+    """
+    if _CONTENT_ADDRESSED.match(name):
+        return f'"{name}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles for uploads: immutable caching, strong ETags and precompressed siblings.
+    Range and If-Range requests are answered by FileResponse. Dot-prefixed paths,
+    such as .incoming and half-written variants, are never served.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if any(part.startswith(".") for part in Path(path).parts):
+            raise HTTPException(status_code=404)
+        if scope["method"] in ("GET", "HEAD"):
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            if accept_encoding:
+                found = await anyio.to_thread.run_sync(self._find_precompressed, path, accept_encoding)
+                if found is not None:
+                    full_path, stat_result, encoding = found
+                    return self._response(full_path, stat_result, scope, path, encoding)
+        return await super().get_response(path, scope)
+
+    def _find_precompressed(self, path: str, accept_encoding: str) -> Optional[Tuple[str, os.stat_result, str]]:
+        accepted = accepted_encodings(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for encoding, suffix in PRECOMPRESSED:
+            if accepted.get(encoding, wildcard) <= 0:
+                continue
+            full_path, stat_result = self.lookup_path(path + suffix)
+            if stat_result is not None and os.path.isfile(full_path):
+                return full_path, stat_result, encoding
+        return None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        return self._response(full_path, stat_result, scope, os.path.basename(full_path), status_code=status_code)
+
+    def _response(
+            self,
+            full_path,
+            stat_result: os.stat_result,
+            scope: Scope,
+            path: str,
+            encoding: Optional[str] = None,
+            status_code: int = 200
+    ) -> Response:
+        headers = {
+            "Cache-Control": STATIC_CACHE_CONTROL,
+            "ETag": static_etag(os.path.basename(full_path), stat_result),
+            "Vary": "Accept-Encoding",
+        }
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            # The type of the original, not of its .br or .gz sibling
+            media_type=guess_type(path)[0] or "application/octet-stream",
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
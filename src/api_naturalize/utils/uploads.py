@@ -0,0 +1,148 @@
+from fastapi import HTTPException, Request, UploadFile, status
+from pathlib import Path
+from typing import Optional
+import aiofiles
+import aiofiles.os
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from api_naturalize.storage.refs import retain, shard_path
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploaded_images")
+# Partially written files, on the same filesystem so the final rename is atomic
+INCOMING_DIR = Path(UPLOAD_DIR) / ".incoming"
+INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(256 * 1024)))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "8"))
+# How long an upload waits for a free slot before it gets a 503
+UPLOAD_WAIT_SECONDS = float(os.getenv("UPLOAD_WAIT_SECONDS", "30"))
+
+_slots: Optional[asyncio.Semaphore] = None
+_stats = {
+    "uploads": 0,
+    "bytes": 0,
+    "bytes_written": 0,
+    "seconds": 0.0,
+    "too_large": 0,
+    "busy": 0,
+    "failed": 0,
+    "deduplicated": 0,
+    "in_flight": 0,
+    "last_bytes_per_second": 0.0,
+}
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    return _slots
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    _stats["too_large"] += 1
+    return HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"File is larger than the {max_bytes} byte limit"
+    )
+
+
+def static_url(request: Request, path: str) -> str:
+    base_url = str(request.base_url).replace("http://", "https://")
+    return f"{base_url}static/{path}"
+
+
+async def _hash_upload(upload: UploadFile, max_bytes: int):
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        # hashlib drops the GIL on large buffers, so hashing in a thread keeps the loop free
+        await asyncio.to_thread(digest.update, chunk)
+    return digest.hexdigest(), size
+
+
+async def save_upload(upload: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> str:
+    """
+    Store the upload under its content hash and return its path below UPLOAD_DIR.
+    The file is hashed first, bytes that are already stored are not written again.
+    New content is streamed to a temporary file in chunks, then renamed into place.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    try:
+        await asyncio.wait_for(_get_slots().acquire(), timeout=UPLOAD_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        _stats["busy"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many uploads in progress, try again shortly",
+            headers={"Retry-After": "5"},
+        )
+
+    temp_path = INCOMING_DIR / f"{uuid.uuid4()}.part"
+    written = 0
+    started = time.perf_counter()
+    _stats["in_flight"] += 1
+    try:
+        digest, size = await _hash_upload(upload, max_bytes)
+        path = shard_path(digest, Path(upload.filename or "").suffix.lower())
+        final_path = Path(UPLOAD_DIR) / path
+        if await aiofiles.os.path.exists(final_path):
+            _stats["deduplicated"] += 1
+            # A fresh mtime keeps the garbage collector's grace period from covering an old file
+            await asyncio.to_thread(os.utime, final_path)
+        else:
+            await upload.seek(0)
+            async with aiofiles.open(temp_path, "wb") as buffer:
+                while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+                    written += len(chunk)
+                    await buffer.write(chunk)
+            await aiofiles.os.makedirs(final_path.parent, exist_ok=True)
+            await aiofiles.os.replace(temp_path, final_path)
+        await retain(path, digest, size)
+    except HTTPException:
+        await _discard(temp_path)
+        raise
+    except Exception as e:
+        _stats["failed"] += 1
+        await _discard(temp_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Image upload failed: {e}"
+        )
+    finally:
+        _stats["in_flight"] -= 1
+        _get_slots().release()
+
+    elapsed = time.perf_counter() - started
+    _stats["uploads"] += 1
+    _stats["bytes"] += size
+    _stats["bytes_written"] += written
+    _stats["seconds"] += elapsed
+    _stats["last_bytes_per_second"] = round(size / elapsed, 1) if elapsed > 0 else 0.0
+    return path
+
+
+async def _discard(path: Path):
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def upload_stats() -> dict:
+    return {
+        **_stats,
+        "seconds": round(_stats["seconds"], 3),
+        "bytes_per_second": round(_stats["bytes"] / _stats["seconds"], 1) if _stats["seconds"] else 0.0,
+        "concurrency": UPLOAD_CONCURRENCY,
+        "max_bytes": UPLOAD_MAX_BYTES,
+    }
@@ -0,0 +1,36 @@
+from typing import Any, Dict, Optional, Tuple
+import os
+import time
+
+# Cross-request cache of loaded users, 0 keeps it off and every request reads MongoDB
+CURRENT_USER_CACHE_SECONDS = float(os.getenv("CURRENT_USER_CACHE_SECONDS", "0"))
+CURRENT_USER_CACHE_SIZE = 4096
+
+_users: Dict[str, Tuple[float, Any]] = {}
+
+
+def get_cached_user(user_id: str) -> Optional[Any]:
+    cached = _users.get(user_id)
+    if cached is None:
+        return None
+    if cached[0] <= time.monotonic():
+        _users.pop(user_id, None)
+        return None
+    return cached[1]
+
+
+def cache_user(user_id: str, user: Any):
+    if CURRENT_USER_CACHE_SECONDS <= 0:
+        return
+    if len(_users) >= CURRENT_USER_CACHE_SIZE:
+        # Drop the entry closest to expiry, the dict is small enough to scan
+        _users.pop(min(_users, key=lambda key: _users[key][0]), None)
+    _users[user_id] = (time.monotonic() + CURRENT_USER_CACHE_SECONDS, user)
+
+
+def invalidate_user(user_id: str):
+    """
+    Called by UserModel after every save, update and delete in this process;
+    other workers see the change once their entry expires
+    """
+    _users.pop(user_id, None)
@@ -1,16 +1,27 @@
+from collections import OrderedDict
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from typing import Dict, Tuple
+import hashlib
 import os
+import time
+from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.utils.user_cache import get_cached_user, cache_user
+from api_naturalize.utils.user_role import UserRole
 
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGORITHM')
 
+# Verified claims by token digest, each entry lives until the token's own exp
+TOKEN_CACHE_SIZE = 4096
+_verified_tokens: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='api/v1/auth/login')
 
 
-def get_user_info(token: str = Depends(oauth2_scheme)):
+def _decode_token(token: str, key: str) -> Dict[str, str]:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -20,7 +31,6 @@ def get_user_info(token: str = Depends(oauth2_scheme)):
     try:
 
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f"DEBUG Payload: {payload}")
 
 
         email: str = payload.get("sub")
@@ -34,4 +44,47 @@ def get_user_info(token: str = Depends(oauth2_scheme)):
 
         raise credentials_exception
 
-    return {"email": email, "user_id": user_id}
\ No newline at end of file
+    claims = {"email": email, "user_id": user_id}
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        _verified_tokens[key] = (float(expires_at), claims)
+        while len(_verified_tokens) > TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+    return claims
+
+
+def get_user_info(token: str = Depends(oauth2_scheme)):
+    key = hashlib.sha256(token.encode()).hexdigest()
+    cached = _verified_tokens.get(key)
+    if cached is not None:
+        if cached[0] > time.time():
+            _verified_tokens.move_to_end(key)
+            return dict(cached[1])
+        del _verified_tokens[key]
+    return dict(_decode_token(token, key))
+
+
+async def get_current_user(user_info: dict = Depends(get_user_info)) -> UserModel:
+    """
+    The requesting user's document, loaded once per request
+    """
+    user_id = user_info["user_id"]
+    # Handlers may modify the document, so the cache only ever hands out copies
+    cached = get_cached_user(user_id)
+    if cached is not None:
+        return cached.model_copy(deep=True)
+
+    db_user = await UserModel.get(user_id)
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    cache_user(user_id, db_user.model_copy(deep=True))
+    return db_user
+
+
+async def get_current_admin(db_user: UserModel = Depends(get_current_user)) -> UserModel:
+    """
+    Same as get_current_user, but only lets admins through
+    """
+    if db_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return db_user
@@ -0,0 +1,29 @@
+"""
+Shared fixtures: Beanie on an in-memory mongomock database, so the tests need no MongoDB server
+"""
+import mongomock
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+_list_collection_names = mongomock.database.Database.list_collection_names
+
+
+def _list_collection_names_compat(self, filter=None, session=None, **kwargs):
+    # Beanie passes authorizedCollections, which mongomock does not know
+    return _list_collection_names(self, filter=filter, session=session)
+
+
+mongomock.database.Database.list_collection_names = _list_collection_names_compat
+
+
+@pytest.fixture
+def init_models():
+    """
+    await init_models(Model, ...) binds the models to a fresh in-memory database
+    """
+    async def init(*models):
+        client = AsyncMongoMockClient()
+        await init_beanie(database=client["test"], document_models=list(models))
+        return client["test"]
+    return init
@@ -0,0 +1,147 @@
+"""
+The outbox sender against a local aiosmtpd stand-in
+"""
+from datetime import datetime, timedelta, timezone
+import asyncio
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from api_naturalize.email_outbox import sender as sender_module
+from api_naturalize.email_outbox.models.email_outbox_model import EmailOutboxModel
+from api_naturalize.email_outbox.sender import EmailSender, backoff_delay, enqueue_email
+from api_naturalize.utils.email_status import EmailStatus
+
+
+class RecordingHandler:
+    """
+    Accepts mail, or answers with the queued replies first ("451 ...", "550 ...")
+    """
+
+    def __init__(self, replies=()):
+        self.replies = list(replies)
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+async def outbox(init_models):
+    await init_models(EmailOutboxModel)
+    return EmailOutboxModel.get_pymongo_collection()
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    """
+    Starts the stand-in with the given replies and points the sender at it
+    """
+    controllers = []
+
+    def start(replies=()) -> RecordingHandler:
+        handler = RecordingHandler(replies)
+        controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        controllers.append(controller)
+        monkeypatch.setattr(sender_module, "HOST_NAME", "127.0.0.1")
+        monkeypatch.setattr(sender_module, "SMTP_PORT", controller.port)
+        monkeypatch.setattr(sender_module, "SMTP_USE_TLS", False)
+        monkeypatch.setattr(sender_module, "EMAIL", "noreply@example.com")
+        monkeypatch.setattr(sender_module, "APP_PASSWORD", None)
+        return handler
+
+    yield start
+    for controller in controllers:
+        controller.stop()
+
+
+async def _deliver_due(sender: EmailSender):
+    batch = await sender._claim_batch()
+    if batch:
+        await sender._deliver(batch)
+    return batch
+
+
+async def test_enqueued_message_is_delivered_in_the_background(outbox, smtp_server):
+    handler = smtp_server()
+    message = await enqueue_email("learner@example.com", "🔑 Your OTP Code", "Your OTP code is: 123456")
+
+    sender = EmailSender()
+    sender.start()
+    try:
+        for _ in range(100):
+            doc = await outbox.find_one({"_id": message.id})
+            if doc["status"] == EmailStatus.SENT.value:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await sender.stop()
+
+    assert doc["status"] == EmailStatus.SENT.value
+    assert doc["attempts"] == 1
+    assert doc["sent_at"] is not None
+    # The one-time code is not kept once delivered
+    assert "body" not in doc
+    assert len(handler.messages) == 1
+    assert handler.messages[0].rcpt_tos == ["learner@example.com"]
+    assert b"Your OTP code is: 123456" in handler.messages[0].content
+
+
+async def test_temporary_failure_is_retried_with_backoff(outbox, smtp_server):
+    handler = smtp_server(["451 Try again later"])
+    message = await enqueue_email("learner@example.com", "Subject", "Body")
+    sender = EmailSender()
+    try:
+        assert len(await _deliver_due(sender)) == 1
+        doc = await outbox.find_one({"_id": message.id})
+        assert doc["status"] == EmailStatus.PENDING.value
+        assert doc["attempts"] == 1
+        assert "451" in doc["last_error"]
+        assert doc["body"] == "Body"
+        next_attempt_at = doc["next_attempt_at"].replace(tzinfo=timezone.utc)
+        assert next_attempt_at > datetime.now(timezone.utc)
+
+        # Not due yet, nothing is claimed
+        assert await _deliver_due(sender) == []
+
+        await outbox.update_one(
+            {"_id": message.id}, {"$set": {"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)}}
+        )
+        assert len(await _deliver_due(sender)) == 1
+    finally:
+        await sender._disconnect()
+
+    doc = await outbox.find_one({"_id": message.id})
+    assert doc["status"] == EmailStatus.SENT.value
+    assert doc["attempts"] == 2
+    assert len(handler.messages) == 1
+
+
+async def test_permanent_failure_is_not_retried(outbox, smtp_server):
+    smtp_server(["550 No such user"])
+    message = await enqueue_email("nobody@example.com", "Subject", "Body")
+    sender = EmailSender()
+    try:
+        await _deliver_due(sender)
+    finally:
+        await sender._disconnect()
+
+    doc = await outbox.find_one({"_id": message.id})
+    assert doc["status"] == EmailStatus.FAILED.value
+    assert doc["failed_at"] is not None
+    assert "body" not in doc
+
+
+def test_backoff_grows_and_is_capped():
+    assert 1 <= backoff_delay(1) <= 2
+    assert 16 <= backoff_delay(5) <= 32
+    assert backoff_delay(30) <= 900
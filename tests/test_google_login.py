@@ -0,0 +1,79 @@
+"""
+POST /auth/google-login with the Google provider swapped for a local fake
+"""
+import hashlib
+import httpx
+import pytest
+from fastapi import FastAPI
+from api_naturalize.auth.models.user_model import UserModel
+from api_naturalize.auth.routers.auth_routers import router
+from api_naturalize.utils import token_generation
+from api_naturalize.utils.google_auth import CachedGoogleUserInfoProvider, get_google_provider
+
+VALID_TOKEN = "ya29.valid-token"
+
+
+class FakeGoogleProvider:
+    """
+    Knows one token and counts how often it is asked, like Google's userinfo endpoint would be
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch_user_info(self, access_token: str):
+        self.calls += 1
+        if access_token != VALID_TOKEN:
+            return None
+        return {"email": "ada@example.com", "name": "Ada Lovelace", "picture": "https://example.com/ada.png"}
+
+
+@pytest.fixture
+async def client(init_models, monkeypatch):
+    await init_models(UserModel)
+    monkeypatch.setattr(token_generation, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(token_generation, "ALGORITHM", "HS256")
+
+    fake = FakeGoogleProvider()
+    provider = CachedGoogleUserInfoProvider(fake, ttl_seconds=60)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_google_provider] = lambda: provider
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        yield http, fake, provider
+
+
+async def test_first_login_creates_a_verified_google_user(client):
+    http, fake, _ = client
+    response = await http.post("/auth/google-login", params={"access_token": VALID_TOKEN})
+
+    assert response.status_code == 201
+    assert response.json()["token_type"] == "bearer"
+    user = await UserModel.find_one(UserModel.email == "ada@example.com")
+    assert user.auth_provider == "google"
+    assert user.is_verified
+    assert (user.first_name, user.last_name) == ("Ada", "Lovelace")
+    assert fake.calls == 1
+
+
+async def test_repeated_token_is_served_from_the_cache(client):
+    http, fake, provider = client
+    first = await http.post("/auth/google-login", params={"access_token": VALID_TOKEN})
+    second = await http.post("/auth/google-login", params={"access_token": VALID_TOKEN})
+
+    assert first.status_code == second.status_code == 201
+    # The double tap never reached the provider
+    assert fake.calls == 1
+    # Keyed by a hash, the raw token is not kept in memory
+    assert list(provider._items) == [hashlib.sha256(VALID_TOKEN.encode()).hexdigest()]
+
+
+async def test_rejected_token_is_not_cached(client):
+    http, fake, provider = client
+    for _ in range(2):
+        response = await http.post("/auth/google-login", params={"access_token": "ya29.revoked"})
+        assert response.status_code == 400
+
+    assert fake.calls == 2
+    assert len(provider._items) == 0
+    assert await UserModel.find_one(UserModel.email == "ada@example.com") is None